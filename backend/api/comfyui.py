@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, BackgroundTasks
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional
 import os
+import json
+import time
+import asyncio
 
 # Import utility functions
-from utils.comfyui_manager import ComfyUIManager
+from utils.comfyui_manager import ComfyUIManager, get_comfyui_supervisor
+from utils.comfyui_pool import get_comfyui_pool
 from utils.settings_manager import SettingsManager
+from utils.log_store import LEVELS as LOG_LEVELS
+from utils.metrics_sampler import get_metrics_sampler
+from utils.model_preloader import (
+    start_preload,
+    cancel_preload,
+    get_preload_status,
+    get_preload_paths,
+    get_residency
+)
 
 # Create router
 router = APIRouter()
@@ -14,44 +28,196 @@ def get_settings_manager():
     settings_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "settings.json")
     return SettingsManager(settings_file)
 
-# Helper function to get ComfyUI manager
+# Helper function to get the shared ComfyUI supervisor
 def get_comfyui_manager(settings_manager: SettingsManager = Depends(get_settings_manager)):
     settings = settings_manager.get_settings()
     comfyui_path = settings.get("comfyUIPath", "")
     
-    # Create ComfyUIManager even if path doesn't exist - it will handle this case internally
-    return ComfyUIManager(comfyui_path)
+    # The supervisor handles a missing path internally
+    return get_comfyui_supervisor(comfyui_path)
+
+def _preload_models_on_start(settings_manager: SettingsManager):
+    """Warm the model files into the page cache while ComfyUI boots"""
+    settings = settings_manager.get_settings()
+    if settings.get("preloadOnStart", False):
+        start_preload(get_preload_paths(settings))
+
+def _track_started_process(start_result: Dict[str, Any]):
+    """Point the resource accounting at the process we just started"""
+    if start_result.get("pid"):
+        get_metrics_sampler().process_tracker.set_root_pid(start_result["pid"])
 
 @router.get("/status")
 async def get_status(
+    max_age: Optional[float] = None,
     comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
 ) -> Dict[str, Any]:
-    """Get the current status of ComfyUI"""
+    """Get the current status of ComfyUI.
+
+    Served from the supervisor's state. With max_age (seconds), queue and
+    resource figures older than that are probed first; simultaneous callers
+    share one probe.
+    """
+    if max_age is not None and comfyui_manager.pid is not None and time.time() - comfyui_manager.probed_at > max_age:
+        await comfyui_manager.probe_async(max_age)
     return comfyui_manager.get_status()
 
 @router.post("/start")
 async def start_comfyui(
     port: Optional[int] = Body(8188, embed=True),
-    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
+    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager),
+    settings_manager: SettingsManager = Depends(get_settings_manager)
 ) -> Dict[str, Any]:
-    """Start the ComfyUI process"""
-    return comfyui_manager.start_comfyui(port)
+    """Start the ComfyUI process; readiness is followed through /operations/{id}, /status and /events"""
+    await asyncio.to_thread(_preload_models_on_start, settings_manager)
+    result = comfyui_manager.start_comfyui(port)
+    _track_started_process(result)
+    return result
 
 @router.post("/stop")
 async def stop_comfyui(
     comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
 ) -> Dict[str, Any]:
     """Stop the ComfyUI process"""
-    return comfyui_manager.stop_comfyui()
+    # Waits for a graceful shutdown, so keep it off the event loop
+    return await asyncio.to_thread(comfyui_manager.stop_comfyui)
 
 @router.post("/restart")
 async def restart_comfyui(
     port: Optional[int] = Body(8188, embed=True),
-    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
+    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager),
+    settings_manager: SettingsManager = Depends(get_settings_manager)
 ) -> Dict[str, Any]:
-    """Restart the ComfyUI process"""
+    """Restart the ComfyUI process in the background; returns an operation ID"""
+    await asyncio.to_thread(_preload_models_on_start, settings_manager)
     return comfyui_manager.restart_comfyui(port)
 
+@router.get("/operations/{operation_id}")
+async def get_operation(
+    operation_id: str,
+    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
+) -> Dict[str, Any]:
+    """Get the progress of a start or restart"""
+    operation = comfyui_manager.get_operation(operation_id)
+    if operation is None:
+        raise HTTPException(status_code=404, detail="Operation not found")
+    return operation
+
+@router.get("/events")
+async def get_events(
+    since: int = 0,
+    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
+) -> Dict[str, Any]:
+    """Get status changes and operation updates after the given sequence number"""
+    events, truncated = comfyui_manager.events.since(since)
+    return {"events": events, "last": comfyui_manager.events.last_seq, "truncated": truncated}
+
+@router.get("/events/stream")
+async def stream_events(
+    since: Optional[int] = None,
+    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
+) -> StreamingResponse:
+    """Stream status changes and operation updates as server-sent events"""
+    events = comfyui_manager.events
+    return StreamingResponse(
+        events.stream(events.last_seq if since is None else since, "comfyui"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "none"}
+    )
+
+@router.get("/live")
+async def get_live_state(
+    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
+) -> Dict[str, Any]:
+    """Get the queue, running prompt, node progress and recent prompt timings pushed by ComfyUI"""
+    return comfyui_manager.bridge.get_state()
+
+@router.get("/live/stream")
+async def stream_live_state(
+    since: Optional[int] = None,
+    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
+) -> StreamingResponse:
+    """Stream ComfyUI's queue, execution and progress events as server-sent events"""
+    events = comfyui_manager.bridge.events
+    return StreamingResponse(
+        events.stream(events.last_seq if since is None else since, "live"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "none"}
+    )
+
+def _get_instance(name: str) -> ComfyUIManager:
+    instance = get_comfyui_pool().get(name)
+    if instance is None:
+        raise HTTPException(status_code=404, detail="ComfyUI instance not found")
+    return instance
+
+@router.get("/instances")
+async def get_instances() -> Dict[str, Any]:
+    """Get the status and resources of every ComfyUI instance, with pool totals"""
+    return await asyncio.to_thread(get_comfyui_pool().get_status)
+
+@router.post("/instances")
+async def add_instance(
+    name: str = Body(...),
+    port: Optional[int] = Body(None),
+    gpu: Optional[str] = Body("auto"),
+    cpu_affinity: Optional[List[int]] = Body(None),
+    extra_args: Optional[List[str]] = Body(None),
+    start: bool = Body(True),
+    settings_manager: SettingsManager = Depends(get_settings_manager)
+) -> Dict[str, Any]:
+    """Add a ComfyUI instance (gpu "auto" picks the least loaded GPU) and start it"""
+    pool = get_comfyui_pool()
+    try:
+        instance = pool.add_instance(name, port, gpu, cpu_affinity, extra_args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    settings_manager.update_settings({"comfyuiInstances": pool.to_settings()})
+    result = {"instance": instance.get_status()}
+    if start:
+        result["start"] = instance.start_comfyui(instance.port)
+    return result
+
+@router.get("/instances/{name}")
+async def get_instance(name: str) -> Dict[str, Any]:
+    """Get the status of one ComfyUI instance"""
+    return _get_instance(name).get_status()
+
+@router.post("/instances/{name}/start")
+async def start_instance(name: str) -> Dict[str, Any]:
+    """Start a ComfyUI instance on its port; returns an operation ID"""
+    instance = _get_instance(name)
+    return instance.start_comfyui(instance.port)
+
+@router.post("/instances/{name}/stop")
+async def stop_instance(name: str) -> Dict[str, Any]:
+    """Stop a ComfyUI instance"""
+    return await asyncio.to_thread(_get_instance(name).stop_comfyui)
+
+@router.post("/instances/{name}/restart")
+async def restart_instance(name: str) -> Dict[str, Any]:
+    """Restart a ComfyUI instance in the background; returns an operation ID"""
+    instance = _get_instance(name)
+    return instance.restart_comfyui(instance.port)
+
+@router.delete("/instances/{name}")
+async def remove_instance(
+    name: str,
+    stop: bool = True,
+    settings_manager: SettingsManager = Depends(get_settings_manager)
+) -> Dict[str, Any]:
+    """Stop a ComfyUI instance (unless stop is false) and remove it from the pool"""
+    pool = get_comfyui_pool()
+    _get_instance(name)
+    try:
+        result = await asyncio.to_thread(pool.remove_instance, name, stop)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="ComfyUI instance not found")
+    settings_manager.update_settings({"comfyuiInstances": pool.to_settings()})
+    return result
+
 @router.get("/processes")
 async def find_comfyui_processes(
     comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
@@ -60,6 +226,14 @@ async def find_comfyui_processes(
     processes = comfyui_manager.find_comfyui_processes()
     return {"processes": processes, "count": len(processes)}
 
+@router.get("/resources")
+async def get_resources() -> Dict[str, Any]:
+    """Get CPU, memory, I/O, open files, threads and GPU memory of the ComfyUI process tree"""
+    snapshot = get_metrics_sampler().get_snapshot()
+    if not snapshot or "comfyui" not in snapshot:
+        return {"running": False, "root_pid": None, "process_count": 0, "totals": {}, "processes": []}
+    return snapshot["comfyui"]
+
 @router.post("/path")
 async def set_comfyui_path(
     path: str = Body(..., embed=True),
@@ -79,10 +253,55 @@ async def set_comfyui_path(
 @router.get("/logs")
 async def get_logs(
     max_lines: int = 100,
+    since: Optional[int] = None,
+    cursor: Optional[str] = None,
     comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
 ) -> Dict[str, Any]:
-    """Get the logs from the ComfyUI process"""
-    return comfyui_manager.get_logs(max_lines)
+    """Get the logs from the ComfyUI process.
+
+    Pass the previous "last" as since (captured output) or the previous
+    "cursor" (log file) to get new lines only.
+    """
+    return await asyncio.to_thread(comfyui_manager.get_logs, max_lines, since, cursor)
+
+@router.get("/logs/search")
+async def search_logs(
+    q: str = "",
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    level: Optional[str] = None,
+    limit: int = 1000,
+    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
+) -> StreamingResponse:
+    """Search archived ComfyUI output, streaming matches as JSON lines (oldest first).
+
+    Every word of q must appear in a line; from/to are Unix timestamps and
+    level (debug, info, warning, error) keeps that severity or worse.
+    """
+    store = comfyui_manager.logs.store
+    if store is None:
+        raise HTTPException(status_code=404, detail="The ComfyUI log index is disabled")
+    if level and level not in LOG_LEVELS:
+        raise HTTPException(status_code=400, detail=f"level must be one of {', '.join(LOG_LEVELS)}")
+    matches = store.search(q, start, end, level, max(1, min(limit, 100000)))
+    # A plain generator: Starlette iterates it on a worker thread
+    return StreamingResponse(
+        (json.dumps(record, separators=(",", ":")) + "\n" for record in matches),
+        media_type="application/x-ndjson"
+    )
+
+@router.get("/logs/stream")
+async def stream_logs(
+    since: Optional[int] = None,
+    comfyui_manager: ComfyUIManager = Depends(get_comfyui_manager)
+) -> StreamingResponse:
+    """Stream captured ComfyUI output as server-sent "log" events (batches of lines)"""
+    buffer = comfyui_manager.logs.buffer
+    return StreamingResponse(
+        buffer.stream(buffer.last_seq if since is None else since, "log"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "none"}
+    )
 
 @router.post("/install")
 async def install_comfyui(
@@ -127,3 +346,32 @@ async def get_install_status(
             "message": "The configured path does not appear to be a valid ComfyUI installation",
             "path": comfyui_path
         }
+
+@router.post("/preload")
+async def preload_models(
+    paths: Optional[List[str]] = Body(None, embed=True),
+    settings_manager: SettingsManager = Depends(get_settings_manager)
+) -> Dict[str, Any]:
+    """Warm model files into the OS page cache (configured and recently used models by default)"""
+    # Picking the files stats each of them, so keep it off the event loop
+    paths = paths or await asyncio.to_thread(get_preload_paths, settings_manager.get_settings())
+    return await asyncio.to_thread(start_preload, paths)
+
+@router.get("/preload")
+async def get_preload() -> Dict[str, Any]:
+    """Get the progress of the current or last preload"""
+    return get_preload_status()
+
+@router.delete("/preload")
+async def stop_preload() -> Dict[str, Any]:
+    """Cancel the running preload"""
+    return cancel_preload()
+
+@router.get("/preload/residency")
+async def get_preload_residency(
+    settings_manager: SettingsManager = Depends(get_settings_manager)
+) -> Dict[str, Any]:
+    """Report how much of each preload candidate is already in the page cache"""
+    paths = await asyncio.to_thread(get_preload_paths, settings_manager.get_settings())
+    # mmap, mincore and a page count per file: far too slow for the event loop on a large library
+    return {"files": await asyncio.to_thread(get_residency, paths)}
@@ -13,6 +13,7 @@ from git import Repo
 # Fix imports to use absolute paths instead of relative paths
 from api.settings import get_settings_manager
 from utils.settings_manager import SettingsManager
+from utils.model_manager import count_download_bytes
 
 router = APIRouter()
 
@@ -107,6 +108,7 @@ async def _install_comfyui_task(install_path: str, method: str, settings_manager
                 
                 for chunk in response.iter_content(chunk_size=8192):
                     temp_file.write(chunk)
+                    count_download_bytes(len(chunk))
                 
                 temp_file_path = temp_file.name
             
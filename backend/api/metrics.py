@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+# Import utility functions
+from utils.metrics_exporter import render_metrics, CONTENT_TYPE
+
+# Create router
+router = APIRouter()
+
+@router.get("/metrics")
+async def get_metrics() -> Response:
+    """Prometheus/OpenMetrics scrape endpoint; reads cached samples only"""
+    return Response(content=render_metrics(), headers={"Content-Type": CONTENT_TYPE})
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 import os
@@ -6,6 +8,22 @@ import os
 # Import utility functions
 from utils.model_manager import ModelDownloader
 from utils.settings_manager import SettingsManager
+from utils.model_tiering import get_model_tier_manager
+from utils.model_transfer import (
+    start_transfer,
+    resume_transfer,
+    cancel_transfer,
+    get_transfer_status,
+    get_all_transfers,
+    get_storage_roots
+)
+from utils.thumbnail_cache import (
+    get_thumbnail_cache,
+    create_local_thumbnail,
+    get_local_thumbnail_path,
+    DisallowedURLError,
+    DEFAULT_THUMBNAIL_SIZE
+)
 
 # Create router
 router = APIRouter()
@@ -32,6 +50,44 @@ def get_model_downloader(settings_manager: SettingsManager = Depends(get_setting
     
     return ModelDownloader(models_path)
 
+# Helper function to get the hot tier manager for the models directory
+def get_tier_manager(
+    downloader: ModelDownloader = Depends(get_model_downloader),
+    settings_manager: SettingsManager = Depends(get_settings_manager)
+):
+    return get_model_tier_manager(downloader.models_dir, settings_manager.get_settings())
+
+# Model for hot tier usage reports
+class ModelUsageRequest(BaseModel):
+    paths: List[str]
+    timestamp: Optional[float] = None
+
+# Model for move/copy requests
+class ModelTransferRequest(BaseModel):
+    source: str
+    destination: str
+    mode: str = "copy"  # 'copy' or 'move'
+    bandwidthLimitMBps: Optional[float] = None
+    overwrite: bool = False  # Replace files already at the destination
+
+# Thumbnails never change for a given URL, so browsers may cache them for a year
+THUMBNAIL_CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+def _thumbnail_response(request: Request, path: str, etag: str) -> Response:
+    """Serve a WebP thumbnail, answering conditional requests with 304"""
+    headers = {**THUMBNAIL_CACHE_HEADERS, "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/webp", headers=headers)
+
+def _resolve_model_path(downloader: ModelDownloader, path: str) -> str:
+    """Make sure a model path points inside the models directory"""
+    models_dir = os.path.abspath(downloader.models_dir)
+    model_path = os.path.abspath(path)
+    if os.path.commonpath([models_dir, model_path]) != models_dir:
+        raise HTTPException(status_code=400, detail="Path is outside the models directory")
+    return model_path
+
 # Model for download request
 class ModelDownloadRequest(BaseModel):
     source: str  # 'civitai', 'huggingface', 'url'
@@ -98,7 +154,10 @@ async def delete_model(
     downloader: ModelDownloader = Depends(get_model_downloader)
 ) -> Dict[str, Any]:
     """Delete a model file"""
-    return downloader.delete_model(file_path)
+    result = downloader.delete_model(file_path)
+    if result.get("status") == "success":
+        get_model_tier_manager(downloader.models_dir, get_settings_manager().get_settings()).forget(file_path)
+    return result
 
 @router.get("/search/civitai")
 async def search_civitai(
@@ -119,3 +178,133 @@ async def search_huggingface(
 ) -> Dict[str, Any]:
     """Search for models on HuggingFace"""
     return downloader.search_huggingface_models(query, type, page)
+
+@router.get("/thumbnail")
+async def get_thumbnail(
+    request: Request,
+    url: str,
+    size: int = DEFAULT_THUMBNAIL_SIZE,
+    settings_manager: SettingsManager = Depends(get_settings_manager)
+) -> Response:
+    """Get a cached, resized WebP thumbnail of a remote preview image"""
+    settings = settings_manager.get_settings()
+    cache = get_thumbnail_cache(settings.get("thumbnailCacheSizeMB", 256))
+    
+    try:
+        path, etag = await run_in_threadpool(cache.get_thumbnail, url, size)
+    except DisallowedURLError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Could not create thumbnail: {str(e)}")
+    
+    return _thumbnail_response(request, path, etag)
+
+@router.get("/preview")
+async def get_model_preview(
+    request: Request,
+    path: str,
+    downloader: ModelDownloader = Depends(get_model_downloader)
+) -> Response:
+    """Get the thumbnail stored next to an installed model"""
+    thumbnail_path = get_local_thumbnail_path(_resolve_model_path(downloader, path))
+    if not os.path.exists(thumbnail_path):
+        raise HTTPException(status_code=404, detail="No thumbnail for this model")
+    
+    stat = os.stat(thumbnail_path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    return _thumbnail_response(request, thumbnail_path, etag)
+
+@router.post("/preview")
+async def create_model_preview(
+    file_path: str = Body(..., embed=True),
+    image_url: Optional[str] = Body(None, embed=True),
+    downloader: ModelDownloader = Depends(get_model_downloader)
+) -> Dict[str, Any]:
+    """Create the thumbnail for an installed model from a URL or a preview image next to it"""
+    model_path = _resolve_model_path(downloader, file_path)
+    if not os.path.isfile(model_path):
+        raise HTTPException(status_code=404, detail="Model file not found")
+    
+    try:
+        thumbnail_path = await run_in_threadpool(create_local_thumbnail, model_path, image_url)
+    except Exception as e:
+        return {"status": "error", "message": f"Failed to create thumbnail: {str(e)}"}
+    
+    if not thumbnail_path:
+        return {"status": "error", "message": "No preview image found next to the model"}
+    
+    return {"status": "success", "message": "Thumbnail created", "path": thumbnail_path}
+
+@router.get("/tier")
+async def get_tier_status(
+    tier_manager = Depends(get_tier_manager)
+) -> Dict[str, Any]:
+    """Get the hot tier contents and pending promotions/demotions"""
+    return tier_manager.get_status()
+
+@router.post("/tier/usage")
+async def record_model_usage(
+    request: ModelUsageRequest,
+    tier_manager = Depends(get_tier_manager)
+) -> Dict[str, Any]:
+    """Record that models were loaded, feeding the hot tier ranking.
+
+    Loads seen in ComfyUI's prompt history are recorded automatically (see
+    ModelUsageTracker); this is for loads ComfyDash can't see.
+    """
+    recorded = [path for path in request.paths if tier_manager.record_use(path, request.timestamp)]
+    return {"status": "success", "recorded": len(recorded)}
+
+@router.post("/tier/rebalance")
+async def rebalance_tier(
+    tier_manager = Depends(get_tier_manager)
+) -> Dict[str, Any]:
+    """Queue promotions and demotions to match current usage"""
+    return tier_manager.rebalance()
+
+@router.post("/tier/promote")
+async def promote_model(
+    file_path: str = Body(..., embed=True),
+    tier_manager = Depends(get_tier_manager)
+) -> Dict[str, Any]:
+    """Queue a model for promotion to the fast volume"""
+    return tier_manager.promote(file_path)
+
+@router.post("/tier/demote")
+async def demote_model(
+    file_path: str = Body(..., embed=True),
+    tier_manager = Depends(get_tier_manager)
+) -> Dict[str, Any]:
+    """Queue a model for demotion back to the library volume"""
+    return tier_manager.demote(file_path)
+
+@router.post("/transfer")
+async def transfer_model(
+    request: ModelTransferRequest,
+    settings_manager: SettingsManager = Depends(get_settings_manager)
+) -> Dict[str, Any]:
+    """Start copying or moving a model file or folder to another storage location"""
+    return start_transfer(
+        request.source, request.destination, request.mode, request.bandwidthLimitMBps,
+        roots=get_storage_roots(settings_manager.get_settings()), overwrite=request.overwrite
+    )
+
+@router.get("/transfers")
+async def get_transfers() -> List[Dict[str, Any]]:
+    """Get all move/copy jobs"""
+    return get_all_transfers()
+
+@router.get("/transfer/{transfer_id}")
+async def get_transfer(transfer_id: str) -> Dict[str, Any]:
+    """Get the progress of a move/copy job"""
+    return get_transfer_status(transfer_id)
+
+@router.post("/transfer/{transfer_id}/resume")
+async def resume_model_transfer(transfer_id: str) -> Dict[str, Any]:
+    """Resume a cancelled, failed or interrupted move/copy job"""
+    return resume_transfer(transfer_id)
+
+@router.delete("/transfer/{transfer_id}")
+async def cancel_model_transfer(transfer_id: str) -> Dict[str, Any]:
+    """Cancel a move/copy job, keeping partial files for resume"""
+    return cancel_transfer(transfer_id)
@@ -4,6 +4,12 @@ import os
 
 # Import utility functions
 from utils.settings_manager import SettingsManager
+from utils.metrics_sampler import get_metrics_sampler
+from utils.gpu_telemetry import get_gpu_provider
+from utils.alerts import get_alert_engine, configure_from_settings
+from utils.comfyui_manager import get_comfyui_supervisor
+from utils.comfyui_pool import get_comfyui_pool
+from utils.comfyui_logs import configure_from_settings as configure_log_capture
 
 # Create router
 router = APIRouter()
@@ -13,6 +19,28 @@ def get_settings_manager():
     settings_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "settings.json")
     return SettingsManager(settings_file)
 
+def _apply_settings(changed: Dict[str, Any], settings: Dict[str, Any]):
+    """Reconfigure the running services whose settings are among the changed keys"""
+    # Apply sampler settings without a restart
+    if "gpuProvider" in changed:
+        get_gpu_provider(settings.get("gpuProvider") or "auto")
+    if "metricsSampleInterval" in changed or "selectedGpuId" in changed:
+        get_metrics_sampler().configure(
+            interval=settings.get("metricsSampleInterval"),
+            gpu_id=settings.get("selectedGpuId")
+        )
+    if "comfyUIPath" in changed:
+        get_comfyui_pool().set_comfyui_path(settings.get("comfyUIPath", ""))
+    if "comfyuiInstances" in changed:
+        get_comfyui_pool().configure(settings.get("comfyuiInstances", []))
+    if "comfyuiStatusTTL" in changed or "comfyuiProbeInterval" in changed:
+        get_comfyui_pool().configure_probing(settings.get("comfyuiStatusTTL"), settings.get("comfyuiProbeInterval"))
+    if any(key in changed for key in ("comfyuiLogPersist", "comfyuiLogMaxMB", "comfyuiLogBackups",
+                                      "comfyuiLogIndexEnabled", "comfyuiLogIndexMaxMB")):
+        configure_log_capture(get_comfyui_supervisor().logs, settings)
+    if any(key in changed for key in ("alertRules", "alertWebhookUrl", "modelsPath", "comfyUIPath")):
+        configure_from_settings(get_alert_engine(), settings)
+
 @router.get("/")
 async def get_settings(
     settings_manager: SettingsManager = Depends(get_settings_manager)
@@ -26,7 +54,9 @@ async def update_settings(
     settings_manager: SettingsManager = Depends(get_settings_manager)
 ) -> Dict[str, Any]:
     """Update settings"""
-    return settings_manager.update_settings(settings)
+    updated = settings_manager.update_settings(settings)
+    _apply_settings(settings, updated)
+    return updated
 
 @router.get("/export")
 async def export_settings(
@@ -41,4 +71,7 @@ async def import_settings(
     settings_manager: SettingsManager = Depends(get_settings_manager)
 ) -> Dict[str, Any]:
     """Import settings from backup"""
-    return settings_manager.import_settings(import_data)
+    result = settings_manager.import_settings(import_data)
+    if result.get("status") == "success":
+        _apply_settings(import_data["settings"], result["settings"])
+    return result
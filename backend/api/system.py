@@ -1,16 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any, List
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional
 import os
+import asyncio
 
 # Import utility functions
-from utils.system_info import (
-    get_system_info, 
-    get_system_stats, 
-    get_storage_info, 
-    get_available_gpus,
-    get_available_storage_locations
-)
+from utils.system_info import get_storage_info
 from utils.settings_manager import SettingsManager
+from utils.metrics_sampler import get_metrics_sampler
+from utils.metrics_history import get_metrics_history
+from utils.gpu_telemetry import get_gpu_provider
+from utils.host_inventory import get_host_inventory
+from utils.stats_stream import get_stats_broadcaster
+from utils.sensors import get_sensor_registry
+from utils.alerts import get_alert_engine
+from utils.storage_breakdown import get_storage_breakdown, DEFAULT_TOP_FILES
+from utils.model_manager import resolve_models_path
 
 # Create router
 router = APIRouter()
@@ -23,14 +28,82 @@ def get_settings_manager():
 @router.get("/info")
 async def get_info() -> Dict[str, Any]:
     """Get system information"""
-    return get_system_info()
+    return get_host_inventory().get_system_info()
 
 @router.get("/stats")
 async def get_stats(settings_manager: SettingsManager = Depends(get_settings_manager)) -> Dict[str, Any]:
-    """Get system statistics"""
+    """Get the latest system statistics from the background sampler"""
     settings = settings_manager.get_settings()
     gpu_id = settings.get("selectedGpuId", None)
-    return get_system_stats(gpu_id)
+    return get_metrics_sampler().get_stats(gpu_id)
+
+@router.get("/stats/stream")
+async def stream_stats(interval: int = 1000) -> StreamingResponse:
+    """Push system statistics as server-sent events.
+
+    The first "snapshot" event carries the full stats, then "delta" events
+    carry JSON merge patches. Lists are sent as objects keyed by item
+    (pid, id or index) with their key order under "#", so a patch only
+    carries the items that changed. `interval` is the update rate in milliseconds;
+    clients that fall behind are disconnected and should reconnect.
+    """
+    if interval <= 0:
+        raise HTTPException(status_code=400, detail="interval must be positive")
+    return StreamingResponse(
+        get_stats_broadcaster().stream(interval / 1000),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Keep nginx from buffering the stream
+            "Content-Encoding": "none"  # Keep the Next.js proxy from compressing (and buffering) it
+        }
+    )
+
+@router.get("/stats/history")
+async def get_stats_history(range: float = 3600, step: Optional[float] = None,
+                            metrics: Optional[str] = None) -> Dict[str, Any]:
+    """Get recorded system statistics for the last `range` seconds.
+
+    `step` sets the spacing of the returned points (defaults to about 600
+    points) and `metrics` is an optional comma-separated list of series names.
+    """
+    if range <= 0 or (step is not None and step <= 0):
+        raise HTTPException(status_code=400, detail="range and step must be positive")
+    names = [name.strip() for name in metrics.split(",") if name.strip()] if metrics else None
+    history = get_metrics_history()
+    result = history.query(range, step, names)
+    result["available"] = history.get_metric_names()
+    return result
+
+@router.get("/gpu-stats")
+async def get_gpu_stats() -> Dict[str, Any]:
+    """Get utilization, memory, temperature, power and clocks of every GPU"""
+    snapshot = get_metrics_sampler().get_snapshot()
+    return {
+        "provider": get_gpu_provider().name,
+        "gpus": snapshot.get("gpus", []) if snapshot else get_gpu_provider().get_gpus()
+    }
+
+@router.get("/sensors")
+async def get_sensors() -> Dict[str, Any]:
+    """Get the discovered temperature sensors with their latest readings"""
+    registry = get_sensor_registry()
+    snapshot = get_metrics_sampler().get_snapshot()
+    return {
+        "source": registry.source,
+        "sensors": registry.describe(),
+        "readings": snapshot.get("sensors", []) if snapshot else registry.read()
+    }
+
+@router.get("/alerts")
+async def get_alerts() -> Dict[str, Any]:
+    """Get the alerts currently pending or firing and the configured rules"""
+    return get_alert_engine().get_active()
+
+@router.get("/alerts/events")
+async def get_alert_events(limit: int = 50) -> List[Dict[str, Any]]:
+    """Get recent alert firing/resolved events, newest first"""
+    return get_alert_engine().get_events(max(1, min(limit, 200)))
 
 @router.get("/storage")
 async def get_storage(settings_manager: SettingsManager = Depends(get_settings_manager)) -> Dict[str, Any]:
@@ -40,12 +113,51 @@ async def get_storage(settings_manager: SettingsManager = Depends(get_settings_m
     storage_path = settings.get("selectedStoragePath", None)
     return get_storage_info(comfyui_path, storage_path)
 
+@router.get("/storage/breakdown")
+async def get_storage_usage_breakdown(
+    section: Optional[str] = None,
+    top: int = DEFAULT_TOP_FILES,
+    settings_manager: SettingsManager = Depends(get_settings_manager)
+) -> Dict[str, Any]:
+    """Get a treemap-ready breakdown of models (type -> folder -> files) and custom nodes (pack -> .git/weights/code).
+
+    top is capped at the files the sizer keeps per directory; the response
+    includes the top used and, when it was capped, top_requested.
+    """
+    if section and section not in ("models", "custom_nodes"):
+        raise HTTPException(status_code=400, detail="section must be models or custom_nodes")
+    settings = settings_manager.get_settings()
+    comfyui_path = settings.get("comfyUIPath", "")
+    custom_nodes_path = settings.get("customNodesPath", "") or (
+        os.path.join(comfyui_path, "custom_nodes") if comfyui_path else ""
+    )
+    return await asyncio.to_thread(
+        get_storage_breakdown,
+        resolve_models_path(settings),
+        custom_nodes_path,
+        [section] if section else None,
+        max(1, top)
+    )
+
 @router.get("/available-gpus")
 async def get_gpus() -> List[Dict[str, Any]]:
     """Get a list of available GPUs"""
-    return get_available_gpus()
+    return get_host_inventory().get_gpus()
 
 @router.get("/available-storage")
 async def get_storage_locations() -> List[Dict[str, Any]]:
     """Get a list of available storage locations"""
-    return get_available_storage_locations()
+    return get_host_inventory().get_storage_locations()
+
+@router.get("/inventory")
+async def get_inventory() -> Dict[str, Any]:
+    """Get when each part of the cached host inventory was last rebuilt"""
+    return get_host_inventory().get_status()
+
+@router.post("/inventory/refresh")
+async def refresh_inventory(section: Optional[str] = None) -> Dict[str, Any]:
+    """Rebuild the host inventory now (or just "system", "gpus" or "storage")"""
+    if section and section not in ("system", "gpus", "storage"):
+        raise HTTPException(status_code=400, detail="section must be system, gpus or storage")
+    inventory = get_host_inventory()
+    return await asyncio.to_thread(inventory.refresh, [section] if section else None)
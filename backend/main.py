@@ -1,11 +1,26 @@
 import os
+import time
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 # Import settings manager to get configuration from settings.json
 from utils.settings_manager import SettingsManager
+from utils.model_manager import resolve_models_path
+from utils.model_tiering import get_model_tier_manager
+from utils.model_usage import get_model_usage_tracker
+from utils.metrics_sampler import get_metrics_sampler
+from utils.metrics_history import get_metrics_history
+from utils.gpu_telemetry import get_gpu_provider
+from utils.host_inventory import get_host_inventory
+from utils.directory_sizer import get_directory_sizer
+from utils.metrics_exporter import request_latency
+from utils.alerts import get_alert_engine, configure_from_settings
+from utils.comfyui_manager import get_comfyui_supervisor
+from utils.comfyui_pool import get_comfyui_pool
+from utils.comfyui_logs import configure_from_settings as configure_log_capture
 
 # Import API routers
 from api.system import router as system_router
@@ -15,15 +30,80 @@ from api.settings import router as settings_router
 from api.custom_nodes import router as custom_nodes_router
 from api.install import router as install_router
 from api.health import router as health_router
+from api.metrics import router as metrics_router
 
 # Create data directory if it doesn't exist
 os.makedirs(os.path.join(os.path.dirname(__file__), "data"), exist_ok=True)
 
+SETTINGS_FILE = os.path.join(os.path.dirname(__file__), "data", "settings.json")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services on startup and stop them on shutdown"""
+    settings = SettingsManager(SETTINGS_FILE).get_settings()
+    
+    # Persistent GPU telemetry session shared by every stats reader
+    gpu_provider = get_gpu_provider(settings.get("gpuProvider", "auto"))
+    
+    # ComfyUI supervisor re-attaches to a process left running by a previous backend
+    supervisor = get_comfyui_supervisor(settings.get("comfyUIPath", ""))
+    configure_log_capture(supervisor.logs, settings)
+    # Further instances (per GPU, CPU-only) run beside it in the pool
+    pool = get_comfyui_pool()
+    pool.configure(settings.get("comfyuiInstances", []))
+    pool.configure_probing(settings.get("comfyuiStatusTTL"), settings.get("comfyuiProbeInterval"))
+    pool.start_monitor()
+    
+    # Host facts (system info, GPUs, storage locations) built once and watched
+    inventory = get_host_inventory()
+    
+    # Start sizing the ComfyUI folders so /api/system/storage has numbers early
+    comfyui_path = settings.get("comfyUIPath", "")
+    if comfyui_path and os.path.isdir(comfyui_path):
+        sizer = get_directory_sizer()
+        for name in ("models", "custom_nodes"):
+            if os.path.isdir(os.path.join(comfyui_path, name)):
+                sizer.get_size(os.path.join(comfyui_path, name))
+    
+    # Background sampler that /api/system/stats reads from
+    sampler = get_metrics_sampler()
+    sampler.configure(
+        interval=settings.get("metricsSampleInterval", 1.0),
+        gpu_id=settings.get("selectedGpuId", None)
+    )
+    # Threshold alerts are evaluated by the sampler on every sample
+    configure_from_settings(get_alert_engine(), settings)
+    # Keep a rolling history of every sample for /api/system/stats/history
+    history = get_metrics_history()
+    sampler.add_listener(history.record)
+    
+    # Hot tier worker keeps frequently used models on the fast volume
+    tier_manager = None
+    models_path = resolve_models_path(settings)
+    if models_path and settings.get("hotTierEnabled", False):
+        tier_manager = get_model_tier_manager(models_path, settings)
+    # Model loads seen in ComfyUI's prompt history rank the hot tier and the preload set
+    usage_tracker = get_model_usage_tracker()
+    usage_tracker.start()
+    
+    yield
+    
+    sampler.remove_listener(history.record)
+    sampler.stop()
+    gpu_provider.close()
+    inventory.stop()
+    pool.stop_monitor()
+    supervisor.logs.configure_store(False)
+    usage_tracker.stop()
+    if tier_manager:
+        tier_manager.stop()
+
 # Create FastAPI app
 app = FastAPI(
     title="ComfyDash API",
     description="Backend API for ComfyDash - A comprehensive dashboard for ComfyUI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -35,6 +115,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Feed the API latency histogram exposed on /metrics"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so path parameters don't create new series
+    route = request.scope.get("route")
+    request_latency.observe(
+        request.method,
+        getattr(route, "path", "unmatched"),
+        response.status_code,
+        time.perf_counter() - started
+    )
+    return response
+
 # Include routers
 app.include_router(system_router, prefix="/api/system", tags=["System"])
 app.include_router(models_router, prefix="/api/models", tags=["Models"])
@@ -43,6 +138,7 @@ app.include_router(settings_router, prefix="/api/settings", tags=["Settings"])
 app.include_router(custom_nodes_router, prefix="/api/custom-nodes", tags=["Custom Nodes"])
 app.include_router(install_router, prefix="/api/install", tags=["Installation"])
 app.include_router(health_router, prefix="/api/health", tags=["Health"])
+app.include_router(metrics_router, tags=["Metrics"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,80 @@
+"""Scripted local stand-in for a ComfyUI server, for the WebSocket bridge tests.
+
+Each WebSocket connection replays the next script from the list it was
+given: a script is a list of (type, data) messages, floats (pauses in
+seconds) and "close" (drop the connection). After the last message the
+connection is held open until the server stops. /queue, /history and
+/system_stats answer like ComfyUI; /queue counts its calls.
+"""
+import json
+import socket
+import asyncio
+import threading
+from typing import Any, List
+
+from aiohttp import web
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class ComfyUIStandIn:
+    def __init__(self, scripts: List[List[Any]]):
+        self.scripts = list(scripts)
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.connections = 0
+        self.queue_calls = 0
+        self.queue = {"queue_running": [], "queue_pending": []}
+        self.history = {}
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    async def _ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        script = self.scripts[min(self.connections, len(self.scripts) - 1)]
+        self.connections += 1
+        for step in script:
+            if step == "close":
+                await ws.close()
+                return ws
+            if isinstance(step, (int, float)):
+                await asyncio.sleep(step)
+                continue
+            kind, data = step
+            await ws.send_str(json.dumps({"type": kind, "data": data}))
+        async for _ in ws:
+            pass
+        return ws
+
+    async def _queue(self, request):
+        self.queue_calls += 1
+        return web.json_response(self.queue)
+
+    async def _history(self, request):
+        return web.json_response(self.history)
+
+    async def _system_stats(self, request):
+        return web.json_response({"system": {"comfyui_version": "0.3.40"}, "devices": []})
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/ws", self._ws)
+        app.router.add_get("/queue", self._queue)
+        app.router.add_get("/system_stats", self._system_stats)
+        app.router.add_get("/history", self._history)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port, shutdown_timeout=0.1).start()
+
+    def start(self) -> "ComfyUIStandIn":
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(timeout=5)
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,43 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from utils.archive_stream import create_stream_extractor
+
+ENTRIES = {"loras/foo.safetensors": b"new weights", "loras/bar.safetensors": b"other weights"}
+
+def make_zip() -> bytes:
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in ENTRIES.items():
+            archive.writestr(name, content)
+    return data.getvalue()
+
+def make_tar() -> bytes:
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w:gz") as archive:
+        for name, content in ENTRIES.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+@pytest.mark.parametrize("archive_format,payload", [("zip", make_zip()), ("tar", make_tar())])
+def test_existing_files_are_skipped_not_replaced(tmp_path, archive_format, payload):
+    existing = tmp_path / "loras" / "foo.safetensors"
+    existing.parent.mkdir()
+    existing.write_bytes(b"the user's own model")
+
+    extractor = create_stream_extractor(archive_format, lambda name: str(tmp_path / name), str(tmp_path))
+    for start in range(0, len(payload), 7):
+        extractor.write(payload[start:start + 7])
+    extracted = extractor.close()
+
+    assert existing.read_bytes() == b"the user's own model"
+    assert extractor.skipped == [str(existing)]
+    assert extracted == [str(tmp_path / "loras" / "bar.safetensors")]
+    assert (tmp_path / "loras" / "bar.safetensors").read_bytes() == b"other weights"
+    assert not any(name.endswith(".partial") for name in os.listdir(tmp_path / "loras"))
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import socket
+import subprocess
+
+import psutil
+import pytest
+
+from utils.comfyui_manager import ComfyUIManager
+
+# Stands in for ComfyUI's main.py: prints the ready banner, then keeps printing
+FAKE_MAIN = """
+import sys, time
+print("Starting server")
+print("To see the GUI go to: http://127.0.0.1:0")
+print("warming up", file=sys.stderr)
+n = 0
+while True:
+    time.sleep(0.05)
+    n += 1
+    print(f"tick {n}")
+"""
+
+SPAWN_AND_EXIT = """
+import sys
+from utils.comfyui_manager import ComfyUIManager
+manager = ComfyUIManager(sys.argv[1], pidfile=sys.argv[2])
+print(manager._spawn(int(sys.argv[3]))["pid"])
+"""
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def lines(manager, stream=None):
+    return [entry["line"] for entry in manager.logs.buffer.since(0)[0] if stream in (None, entry["stream"])]
+
+@pytest.fixture
+def comfyui_path(tmp_path):
+    path = tmp_path / "ComfyUI"
+    path.mkdir()
+    (path / "main.py").write_text(FAKE_MAIN)
+    return str(path)
+
+def test_output_is_captured_from_files(comfyui_path, tmp_path):
+    manager = ComfyUIManager(comfyui_path, pidfile=str(tmp_path / "comfyui.pid"))
+    result = manager._spawn(free_port())
+    try:
+        assert result["status"] == "starting"
+        assert wait_for(manager._ready_event.is_set)
+        assert wait_for(lambda: "warming up" in lines(manager, "stderr"))
+        assert lines(manager, "stdout")[:2] == ["Starting server", "To see the GUI go to: http://127.0.0.1:0"]
+    finally:
+        manager.stop_comfyui()
+    assert not manager.logs.is_capturing()
+
+def test_process_outlives_the_backend_and_is_reattached(comfyui_path, tmp_path):
+    pidfile = str(tmp_path / "comfyui.pid")
+    # A backend that starts ComfyUI and exits at once, like a reload would
+    backend = subprocess.run(
+        [sys.executable, "-c", SPAWN_AND_EXIT, comfyui_path, pidfile, str(free_port())],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, timeout=30
+    )
+    assert backend.returncode == 0, backend.stderr
+    pid = int(backend.stdout)
+    try:
+        # Well past the first prints after the backend went away
+        time.sleep(0.5)
+        assert psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+
+        manager = ComfyUIManager(comfyui_path, pidfile=pidfile)
+        assert manager.reattach()
+        assert manager.pid == pid
+        # Earlier output is read back, then new lines keep coming
+        assert wait_for(lambda: "Starting server" in lines(manager))
+        seen = len(lines(manager))
+        assert wait_for(lambda: len(lines(manager)) > seen)
+        manager.stop_comfyui()
+        assert not psutil.pid_exists(pid)
+    finally:
+        if psutil.pid_exists(pid):
+            psutil.Process(pid).kill()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,157 @@
+import os
+import time
+
+import pytest
+
+from utils import comfyui_ws
+from utils.comfyui_ws import ComfyUIBridge
+from utils.comfyui_manager import ComfyUIManager
+from comfyui_standin import ComfyUIStandIn
+
+def status(remaining):
+    return ("status", {"status": {"exec_info": {"queue_remaining": remaining}}, "sid": "standin"})
+
+PROMPT = [
+    status(2),
+    ("execution_start", {"prompt_id": "p1"}),
+    ("execution_cached", {"nodes": ["1", "2"], "prompt_id": "p1"}),
+    ("executing", {"node": "3", "prompt_id": "p1"}),
+    ("progress", {"value": 1, "max": 3, "node": "3", "prompt_id": "p1"}),
+    ("progress", {"value": 2, "max": 3, "node": "3", "prompt_id": "p1"}),
+    ("progress", {"value": 3, "max": 3, "node": "3", "prompt_id": "p1"}),
+    ("executed", {"node": "3", "output": {"images": []}, "prompt_id": "p1"}),
+    ("executing", {"node": "9", "prompt_id": "p1"}),
+    0.05,
+    ("execution_success", {"prompt_id": "p1"}),
+    ("executing", {"node": None, "prompt_id": "p1"}),
+    status(1),
+]
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(comfyui_ws, "RECONNECT_DELAYS", (0.05, 0.1))
+
+@pytest.fixture
+def bridge():
+    bridge = ComfyUIBridge()
+    yield bridge
+    bridge.close()
+
+def run(scripts):
+    return ComfyUIStandIn(scripts).start()
+
+def test_folds_a_finished_prompt(bridge):
+    server = run([PROMPT])
+    try:
+        bridge.connect(server.url)
+        assert wait_for(lambda: bridge.get_state()["recent"])
+        assert wait_for(lambda: bridge.queue_remaining == 1)
+
+        state = bridge.get_state()
+        assert state["connected"]
+        assert state["current"] is None
+        assert state["completed"] == 1
+        finished = state["recent"][0]
+        assert finished["prompt_id"] == "p1"
+        assert finished["status"] == "success"
+        assert finished["cached"] == ["1", "2"]
+        assert set(finished["nodes"]) == {"3", "9"}
+        assert all(timing["duration"] is not None for timing in finished["nodes"].values())
+        assert finished["nodes"]["9"]["duration"] >= 0.04
+    finally:
+        server.stop()
+
+def test_tracks_progress_of_the_running_prompt(bridge):
+    server = run([PROMPT[:6]])
+    try:
+        bridge.connect(server.url)
+        assert wait_for(lambda: (bridge.get_state()["current"] or {}).get("progress"))
+
+        current = bridge.get_state()["current"]
+        assert current["prompt_id"] == "p1"
+        assert current["node"] == "3"
+        assert current["progress"] == {"node": "3", "value": 2, "max": 3}
+        assert current["nodes"]["3"]["duration"] is None
+    finally:
+        server.stop()
+
+def test_republishes_events_in_order(bridge):
+    server = run([PROMPT])
+    try:
+        bridge.connect(server.url)
+        assert wait_for(lambda: bridge.completed == 1)
+        kinds = [entry["type"] for entry in bridge.events.since(0)[0]]
+        assert kinds[:4] == ["connected", "status", "execution_start", "execution_cached"]
+        assert kinds.count("progress") == 3
+        assert "execution_success" in kinds
+    finally:
+        server.stop()
+
+def test_prompts_of_other_clients_only_change_the_queue(bridge):
+    # A prompt queued from the web UI: ComfyUI only broadcasts status to us
+    server = run([[status(1), 0.05, status(0)]])
+    try:
+        bridge.connect(server.url)
+        assert wait_for(lambda: bridge.queue_remaining == 0)
+        assert bridge.queue_version == 2
+        assert bridge.get_state()["current"] is None
+    finally:
+        server.stop()
+
+def test_reconnects_after_the_socket_drops(bridge):
+    server = run([[status(3), "close"], [status(2)]])
+    try:
+        bridge.connect(server.url)
+        assert wait_for(lambda: server.connections == 2 and bridge.connected and bridge.queue_remaining == 2)
+
+        assert bridge.reconnects >= 1
+        kinds = [entry["type"] for entry in bridge.events.since(0)[0]]
+        assert kinds.count("connected") == 2
+        assert "disconnected" in kinds
+    finally:
+        server.stop()
+
+def test_disconnect_stops_following(bridge):
+    server = run([[status(1)]])
+    try:
+        bridge.connect(server.url)
+        assert wait_for(lambda: bridge.connected)
+        bridge.disconnect()
+        assert not bridge.connected
+        assert bridge.get_state()["url"] is None
+    finally:
+        server.stop()
+
+def test_supervisor_probes_the_queue_when_the_bridge_reports_a_change(tmp_path):
+    server = run([[status(0), 0.3, status(1)]])
+    manager = ComfyUIManager(str(tmp_path), pidfile=str(tmp_path / "comfyui.pid"))
+    try:
+        # Stand in for a running ComfyUI: any live PID, the stand-in's port
+        manager._attach(os.getpid(), server.port, time.time(), False)
+        manager._set_status("running")
+        server.queue = {"queue_running": [["p1"]], "queue_pending": []}
+
+        manager.check()  # connects the bridge and probes once
+        assert wait_for(lambda: manager.bridge.is_connected(manager.api_url))
+        calls = server.queue_calls
+        assert wait_for(lambda: manager.bridge.queue_remaining == 1)
+
+        manager.check()
+        assert server.queue_calls == calls + 1
+        assert manager.get_status()["queue"] == {"pending": 0, "processing": 1, "completed": 0}
+
+        # Without a queue change a live bridge holds regular probes back
+        manager.check()
+        assert server.queue_calls == calls + 1
+    finally:
+        manager.bridge.close()
+        manager.prober.close()
+        server.stop()
@@ -0,0 +1,88 @@
+import os
+import time
+
+from utils.model_tiering import ModelTierManager
+from utils.model_usage import ModelUsageTracker
+from comfyui_standin import ComfyUIStandIn
+
+def history_item(prompt_id, started, graph):
+    return {
+        "prompt": [1, prompt_id, graph, {}, ["9"]],
+        "outputs": {},
+        "status": {
+            "status_str": "success",
+            "completed": True,
+            "messages": [["execution_start", {"prompt_id": prompt_id, "timestamp": int(started * 1000)}]]
+        }
+    }
+
+GRAPH = {
+    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sdxl/base.safetensors"}},
+    "10": {"class_type": "LoraLoader", "inputs": {"lora_name": "detail.safetensors", "model": ["4", 0]}},
+    "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "a cat", "clip": ["4", 1]}}
+}
+
+def make_library(tmp_path):
+    models = tmp_path / "models"
+    (models / "checkpoints" / "sdxl").mkdir(parents=True)
+    (models / "loras").mkdir()
+    (models / "checkpoints" / "sdxl" / "base.safetensors").write_bytes(b"c" * 1000)
+    (models / "checkpoints" / "unused.safetensors").write_bytes(b"u" * 1000)
+    (models / "loras" / "detail.safetensors").write_bytes(b"l" * 100)
+    return str(models)
+
+def make_tier(tmp_path, models):
+    tier = ModelTierManager(models, str(tmp_path / "model_tier.json"))
+    tier.configure({"hotTierEnabled": True, "hotTierPath": str(tmp_path / "fast"), "hotTierBudgetGB": 1})
+    return tier
+
+def test_models_loaded_by_comfyui_are_promoted(tmp_path):
+    models = make_library(tmp_path)
+    tier = make_tier(tmp_path, models)
+    server = ComfyUIStandIn([[]]).start()
+    server.history = {"p1": history_item("p1", time.time() - 5, GRAPH)}
+    try:
+        tracker = ModelUsageTracker()
+        assert tracker.sync(server.url, tier) == 2
+        # A prompt is only counted once however often the history is read
+        assert tracker.sync(server.url, tier) == 0
+    finally:
+        server.stop()
+
+    assert tier.usage["checkpoints/sdxl/base.safetensors"]["hits"] == 1
+    assert tier.usage["loras/detail.safetensors"]["hits"] == 1
+    assert set(tier.get_most_used(5)) == {
+        os.path.join(models, "checkpoints", "sdxl", "base.safetensors"),
+        os.path.join(models, "loras", "detail.safetensors")
+    }
+
+    tier.start(rebalance_interval=3600)
+    try:
+        plan = tier.rebalance()
+        assert sorted(plan["promote"]) == ["checkpoints/sdxl/base.safetensors", "loras/detail.safetensors"]
+        deadline = time.monotonic() + 5
+        while len(tier.promoted) < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        tier.stop()
+
+    library_path = os.path.join(models, "checkpoints", "sdxl", "base.safetensors")
+    assert "checkpoints/sdxl/base.safetensors" in tier.promoted
+    assert os.path.islink(library_path)
+    assert os.path.exists(library_path + ".cold")
+    assert "checkpoints/unused.safetensors" not in tier.promoted
+
+def test_prompts_counted_by_a_previous_run_are_skipped(tmp_path):
+    models = make_library(tmp_path)
+    tier = make_tier(tmp_path, models)
+    now = time.time()
+    tier.record_use(os.path.join(models, "loras", "detail.safetensors"), now - 60)
+
+    tracker = ModelUsageTracker()
+    history = {
+        "old": history_item("old", now - 120, GRAPH),
+        "new": history_item("new", now - 10, GRAPH)
+    }
+    assert tracker.record_history(history, tier, "http://127.0.0.1:8188") == 2
+    assert tier.usage["loras/detail.safetensors"]["hits"] == 2
+    assert tier.usage["checkpoints/sdxl/base.safetensors"]["hits"] == 1
@@ -0,0 +1,43 @@
+from utils.sensors import SensorRegistry, cpu_temperature
+
+def add_hwmon(root, index, driver, temps):
+    hwmon = root / f"hwmon{index}"
+    hwmon.mkdir(parents=True)
+    (hwmon / "name").write_text(driver + "\n")
+    for i, millidegrees in enumerate(temps, 1):
+        (hwmon / f"temp{i}_input").write_text(f"{millidegrees}\n")
+
+def add_zone(root, index, zone_type, millidegrees):
+    zone = root / f"thermal_zone{index}"
+    zone.mkdir(parents=True)
+    (zone / "type").write_text(zone_type + "\n")
+    (zone / "temp").write_text(f"{millidegrees}\n")
+
+def test_hosts_without_a_cpu_hwmon_fall_back_to_thermal_zones(tmp_path):
+    hwmon, thermal = tmp_path / "hwmon", tmp_path / "thermal"
+    add_hwmon(hwmon, 0, "acpitz", [27800])
+    add_hwmon(hwmon, 1, "nvme", [41850])
+    # The first zone has no valid reading, so the next one is used
+    add_zone(thermal, 0, "acpitz", -274000)
+    add_zone(thermal, 1, "soc_dts0", 52000)
+
+    registry = SensorRegistry(str(hwmon), str(thermal))
+    try:
+        readings = registry.read()
+        assert registry.source == "hwmon"
+        assert cpu_temperature(readings) is None
+        assert registry.thermal_zone_temperature() == 52.0
+    finally:
+        registry.close()
+
+def test_thermal_zone_source_reads_its_own_sensors(tmp_path):
+    thermal = tmp_path / "thermal"
+    add_zone(thermal, 0, "acpitz", 45000)
+
+    registry = SensorRegistry(str(tmp_path / "hwmon"), str(thermal))
+    try:
+        registry.discover()
+        assert registry.source == "thermal_zone"
+        assert registry.thermal_zone_temperature() == 45.0
+    finally:
+        registry.close()
@@ -0,0 +1,72 @@
+import time
+import asyncio
+import threading
+
+from utils.sequence_log import SequenceLog
+
+async def read_events(stream, count, timeout=2.0):
+    events = []
+    async def collect():
+        async for chunk in stream:
+            if "event: " in chunk:
+                events.append(chunk)
+                if len(events) == count:
+                    return
+    await asyncio.wait_for(collect(), timeout)
+    return events
+
+def test_since_pages_forward_and_reports_truncation():
+    log = SequenceLog(3)
+    for i in range(5):
+        log.append({"n": i})
+    entries, truncated = log.since(1, limit=2)
+    assert [entry["seq"] for entry in entries] == [3, 4]
+    assert truncated
+    assert log.since(5) == ([], False)
+
+def test_stream_wakes_on_append_from_another_thread():
+    log = SequenceLog(10)
+
+    async def main():
+        stream = log.stream(0, "test")
+        await stream.__anext__()  # retry hint
+        threading.Timer(0.1, log.append, args=({"n": 1},)).start()
+        started = time.monotonic()
+        events = await read_events(stream, 1)
+        await stream.aclose()
+        return events, time.monotonic() - started
+
+    events, waited = asyncio.run(main())
+    assert '"n":1' in events[0]
+    assert waited < 1.0
+    assert not log._waiters
+
+def test_idle_streams_hold_no_worker_threads():
+    log = SequenceLog(10)
+
+    async def main():
+        streams = [log.stream(0, "test") for _ in range(32)]
+        tasks = [asyncio.create_task(read_events(stream, 1, timeout=5)) for stream in streams]
+        await asyncio.sleep(0.1)
+        started = time.monotonic()
+        await asyncio.to_thread(time.sleep, 0)
+        waited = time.monotonic() - started
+        log.append({"n": 1})
+        await asyncio.gather(*tasks)
+        return waited
+
+    assert asyncio.run(main()) < 0.5
+
+def test_stream_resets_a_sequence_from_before_a_restart():
+    log = SequenceLog(10)
+    log.append({"n": 1})
+
+    async def main():
+        stream = log.stream(500, "test")
+        events = await read_events(stream, 2)
+        await stream.aclose()
+        return events
+
+    reset, replay = asyncio.run(main())
+    assert reset.startswith("event: reset")
+    assert '"n":1' in replay
@@ -0,0 +1,28 @@
+from utils.stats_stream import to_keyed, merge_patch
+
+BEFORE = {
+    "cpu": {"per_core": [10.0, 20.0, 30.0]},
+    "gpus": [{"index": 0, "usage": 5, "memory": {"used": 100}}, {"index": 1, "usage": 7}],
+    "comfyui": {"processes": [{"pid": 10, "cpu": 1.0}, {"pid": 11, "cpu": 2.0}]}
+}
+
+def test_patches_only_the_changed_items():
+    after = {
+        "cpu": {"per_core": [10.0, 20.0, 35.0]},
+        "gpus": [{"index": 0, "usage": 6, "memory": {"used": 100}}, {"index": 1, "usage": 7}],
+        "comfyui": {"processes": [{"pid": 10, "cpu": 1.0}, {"pid": 11, "cpu": 2.0}]}
+    }
+    assert merge_patch(to_keyed(BEFORE), to_keyed(after)) == {
+        "cpu": {"per_core": {"2": 35.0}},
+        "gpus": {"0": {"usage": 6}}
+    }
+
+def test_sends_the_order_only_when_items_change():
+    after = dict(BEFORE, comfyui={"processes": [{"pid": 11, "cpu": 2.0}, {"pid": 12, "cpu": 0.5}]})
+    assert merge_patch(to_keyed(BEFORE), to_keyed(after)) == {
+        "comfyui": {"processes": {"#": ["11", "12"], "10": None, "12": {"pid": 12, "cpu": 0.5}}}
+    }
+
+def test_duplicate_keys_fall_back_to_positions():
+    keyed = to_keyed([{"id": "a", "value": 1}, {"id": "a", "value": 2}])
+    assert keyed == {"#": ["0", "1"], "0": {"id": "a", "value": 1}, "1": {"id": "a", "value": 2}}
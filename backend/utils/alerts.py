@@ -0,0 +1,259 @@
+import time
+import queue
+import fnmatch
+import operator
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+import psutil
+import requests
+
+from utils.metrics_history import flatten_snapshot
+
+# Comparisons a rule may use
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le
+}
+
+# Recent alert transitions kept for /api/system/alerts/events
+EVENT_LOG_SIZE = 200
+
+# Seconds between free space checks of the watched storage paths
+STORAGE_INTERVAL = 30.0
+
+# Webhook deliveries waiting to be sent before new ones are dropped
+WEBHOOK_QUEUE_SIZE = 100
+WEBHOOK_TIMEOUT = 5
+
+class AlertRule:
+    """One threshold rule from the alertRules setting.
+
+    A rule fires when its metric crosses the threshold for at least "for"
+    seconds and resolves only once the metric is back past "clear", so a
+    value hovering around the threshold does not flap. The metric may use
+    wildcards (gpu.*.memory_percent) to watch every matching series.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.id = str(config.get("id") or config["metric"])
+        self.metric = config["metric"]
+        self.op = config.get("op", ">")
+        if self.op not in OPERATORS:
+            raise ValueError(f"Unknown operator {self.op!r} in alert rule {self.id}")
+        self.threshold = float(config["threshold"])
+        self.clear = float(config["clear"]) if config.get("clear") is not None else self.threshold
+        self.hold = float(config.get("for", 0))
+        self.severity = config.get("severity", "warning")
+        self.message = config.get("message", "")
+        self.enabled = config.get("enabled", True)
+
+    def breached(self, value: float) -> bool:
+        return OPERATORS[self.op](value, self.threshold)
+
+    def cleared(self, value: float) -> bool:
+        # The clear level sits on the safe side of the threshold
+        if self.clear == self.threshold:
+            return not self.breached(value)
+        return value < self.clear if self.op in (">", ">=") else value > self.clear
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "metric": self.metric,
+            "op": self.op,
+            "threshold": self.threshold,
+            "clear": self.clear,
+            "for": self.hold,
+            "severity": self.severity,
+            "message": self.message,
+            "enabled": self.enabled
+        }
+
+class AlertEngine:
+    """Evaluate alert rules against every sampler snapshot.
+
+    Runs on the sampler thread, so request handlers only read the resulting
+    state. Each (rule, metric) pair moves ok -> pending -> firing -> ok and an
+    event is recorded, and optionally posted to a webhook, only on the
+    firing and resolved transitions, never for every sample above the
+    threshold.
+    """
+
+    def __init__(self):
+        self.rules: List[AlertRule] = []
+        self.webhook_url = ""
+        self.storage_paths: Dict[str, str] = {}
+        self._states: Dict[tuple, Dict[str, Any]] = {}
+        self._events: deque = deque(maxlen=EVENT_LOG_SIZE)
+        self._storage: Dict[str, float] = {}
+        self._storage_checked = 0.0
+        self._lock = threading.Lock()
+        self._webhook_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+        self._webhook_thread: Optional[threading.Thread] = None
+        self.errors: List[str] = []
+
+    def configure(self, rules: Optional[List[Dict[str, Any]]] = None, webhook_url: Optional[str] = None,
+                  storage_paths: Optional[Dict[str, str]] = None):
+        """Replace the rules, webhook or watched storage paths; state of unchanged rules is kept"""
+        with self._lock:
+            if rules is not None:
+                parsed, errors = [], []
+                for config in rules:
+                    try:
+                        parsed.append(AlertRule(config))
+                    except (KeyError, TypeError, ValueError) as e:
+                        errors.append(f"Invalid alert rule {config!r}: {str(e)}")
+                self.rules = parsed
+                self.errors = errors
+                ids = {rule.id for rule in parsed}
+                self._states = {key: state for key, state in self._states.items() if key[0] in ids}
+            if webhook_url is not None:
+                self.webhook_url = webhook_url.strip()
+            if storage_paths is not None:
+                self.storage_paths = {name: path for name, path in storage_paths.items() if path}
+                self._storage = {}
+                self._storage_checked = 0.0
+
+    def _storage_metrics(self) -> Dict[str, float]:
+        """Free space of the watched paths, refreshed every STORAGE_INTERVAL seconds"""
+        now = time.monotonic()
+        if now - self._storage_checked >= STORAGE_INTERVAL:
+            storage = {}
+            for name, path in self.storage_paths.items():
+                try:
+                    usage = psutil.disk_usage(path)
+                except OSError:
+                    continue
+                storage[f"storage.{name}.free_gb"] = round(usage.free / (1024**3), 2)
+                storage[f"storage.{name}.percent_used"] = usage.percent
+            self._storage = storage
+            self._storage_checked = now
+        return self._storage
+
+    def evaluate(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Advance every rule with a new snapshot; returns the alert summary for it"""
+        now = time.time()
+        with self._lock:
+            if not self.rules:
+                return {"firing": 0, "pending": 0, "active": []}
+
+            metrics = flatten_snapshot(snapshot)
+            metrics.update(self._storage_metrics())
+
+            for rule in self.rules:
+                if not rule.enabled:
+                    continue
+                names = fnmatch.filter(metrics, rule.metric) if "*" in rule.metric else [rule.metric]
+                for name in names:
+                    value = metrics.get(name)
+                    if value is not None:
+                        self._advance(rule, name, value, now)
+
+            return self._summary()
+
+    def _advance(self, rule: AlertRule, metric: str, value: float, now: float):
+        key = (rule.id, metric)
+        state = self._states.get(key)
+        if state is None:
+            state = {"rule": rule.id, "metric": metric, "severity": rule.severity, "state": "ok", "since": now, "value": value}
+            self._states[key] = state
+        state["value"] = value
+
+        if state["state"] == "firing":
+            if rule.cleared(value):
+                state.update(state="ok", since=now)
+                self._record(rule, state, "resolved", now)
+        elif rule.breached(value):
+            if state["state"] == "ok":
+                state.update(state="pending", since=now)
+            if now - state["since"] >= rule.hold:
+                state.update(state="firing", since=now)
+                self._record(rule, state, "firing", now)
+        elif state["state"] == "pending":
+            state.update(state="ok", since=now)
+
+    def _record(self, rule: AlertRule, state: Dict[str, Any], status: str, now: float):
+        event = {
+            "rule": rule.id,
+            "metric": state["metric"],
+            "status": status,
+            "severity": rule.severity,
+            "value": state["value"],
+            "threshold": rule.threshold,
+            "message": rule.message or f"{state['metric']} {rule.op} {rule.threshold:g}",
+            "timestamp": now
+        }
+        self._events.append(event)
+        if self.webhook_url:
+            self._send_webhook(event)
+
+    def _summary(self) -> Dict[str, Any]:
+        active = [dict(state) for state in self._states.values() if state["state"] != "ok"]
+        return {
+            "firing": sum(1 for state in active if state["state"] == "firing"),
+            "pending": sum(1 for state in active if state["state"] == "pending"),
+            "active": active
+        }
+
+    def _send_webhook(self, event: Dict[str, Any]):
+        """Queue a delivery; posting happens on a worker thread, off the sampler"""
+        if self._webhook_thread is None or not self._webhook_thread.is_alive():
+            self._webhook_thread = threading.Thread(target=self._deliver, name="alert-webhook", daemon=True)
+            self._webhook_thread.start()
+        try:
+            self._webhook_queue.put_nowait(dict(event, url=self.webhook_url))
+        except queue.Full:
+            print(f"Alert webhook queue full, dropping {event['rule']} {event['status']}")
+
+    def _deliver(self):
+        while True:
+            event = self._webhook_queue.get()
+            url = event.pop("url")
+            try:
+                requests.post(url, json=event, timeout=WEBHOOK_TIMEOUT)
+            except requests.RequestException as e:
+                print(f"Error posting alert webhook: {str(e)}")
+
+    def get_active(self) -> Dict[str, Any]:
+        """Alerts currently pending or firing, with the configured rules"""
+        with self._lock:
+            summary = self._summary()
+            summary["rules"] = [rule.to_dict() for rule in self.rules]
+            summary["errors"] = list(self.errors)
+            summary["webhook"] = bool(self.webhook_url)
+            return summary
+
+    def get_events(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent firing/resolved events, newest first"""
+        with self._lock:
+            events = list(self._events)
+        return events[::-1][:limit]
+
+def configure_from_settings(engine: AlertEngine, settings: Dict[str, Any]):
+    """Apply the alert settings, watching free space of the models and ComfyUI folders"""
+    # Imported here: model_manager pulls in the download stack
+    from utils.model_manager import resolve_models_path
+    engine.configure(
+        rules=settings.get("alertRules") or [],
+        webhook_url=settings.get("alertWebhookUrl") or "",
+        storage_paths={
+            "models": resolve_models_path(settings) or "",
+            "comfyui": settings.get("comfyUIPath", "")
+        }
+    )
+
+# Shared engine, evaluated by the metrics sampler
+_alert_engine: Optional[AlertEngine] = None
+_alert_engine_lock = threading.Lock()
+
+def get_alert_engine() -> AlertEngine:
+    """Get the shared alert engine"""
+    global _alert_engine
+    with _alert_engine_lock:
+        if _alert_engine is None:
+            _alert_engine = AlertEngine()
+    return _alert_engine
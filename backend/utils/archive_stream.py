@@ -0,0 +1,511 @@
+import os
+import queue
+import struct
+import tarfile
+import tempfile
+import threading
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+# Archive formats we can extract while downloading, by file name suffix
+ARCHIVE_SUFFIXES = (
+    (".tar.gz", "tar"),
+    (".tar.bz2", "tar"),
+    (".tar.xz", "tar"),
+    (".tgz", "tar"),
+    (".tar", "tar"),
+    (".zip", "zip"),
+)
+
+# Suffix of files being extracted
+PARTIAL_SUFFIX = ".partial"
+
+# Zip record signatures
+_LOCAL_HEADER = b"PK\x03\x04"
+_CENTRAL_HEADER = b"PK\x01\x02"
+_DATA_DESCRIPTOR = b"PK\x07\x08"
+_END_OF_CENTRAL_DIR = b"PK\x05\x06"
+_ZIP64_END_OF_CENTRAL_DIR = b"PK\x06\x06"
+_ZIP64_LOCATOR = b"PK\x06\x07"
+
+_LOCAL_HEADER_STRUCT = struct.Struct("<4sHHHHHIIIHH")
+_CENTRAL_HEADER_STRUCT = struct.Struct("<4sHHHHHHIIIHHHHHII")
+
+_FLAG_ENCRYPTED = 0x1
+_FLAG_DATA_DESCRIPTOR = 0x8
+_FLAG_UTF8 = 0x800
+
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+
+def get_archive_format(filename: str) -> Optional[str]:
+    """Get the archive format ('zip' or 'tar') from a file name, or None.
+
+    Only the name is used: PyTorch .ckpt/.pt files are zip archives too and
+    must be stored as they are.
+    """
+    name = filename.lower()
+    for suffix, archive_format in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            return archive_format
+    return None
+
+def strip_archive_suffix(filename: str) -> str:
+    """Remove the archive suffix from a file name"""
+    for suffix, _ in ARCHIVE_SUFFIXES:
+        if filename.lower().endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+def is_safe_entry_name(name: str) -> bool:
+    """Reject absolute paths and parent references in archive entries"""
+    normalized = name.replace("\\", "/")
+    if normalized.startswith("/") or (len(normalized) > 1 and normalized[1] == ":"):
+        return False
+    return ".." not in normalized.split("/")
+
+def _move_no_clobber(source: str, target: str):
+    """Move source to target, raising FileExistsError instead of replacing a file"""
+    if os.name == "nt":
+        # rename refuses to replace an existing file on Windows
+        os.rename(source, target)
+        return
+    try:
+        # A hard link fails atomically if the target exists
+        os.link(source, target)
+    except FileExistsError:
+        raise
+    except OSError:
+        # Filesystems without hard links (FAT, some network shares)
+        if os.path.lexists(target):
+            raise FileExistsError(target)
+        os.replace(source, target)
+        return
+    os.remove(source)
+
+class _EntryWriter:
+    """Write one extracted entry through a .partial file, checking its CRC.
+
+    Existing files are never replaced: an entry whose target is already
+    there is read but not written, and ends up as skipped.
+    """
+
+    def __init__(self, target: Optional[str], expected_crc: Optional[int] = None):
+        self.target = target
+        self.expected_crc = expected_crc
+        self.crc = 0
+        self.size = 0
+        self.file = None
+        self.skipped = bool(target) and os.path.lexists(target)
+        if target and not self.skipped:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            self.file = open(target + PARTIAL_SUFFIX, "wb")
+
+    def write(self, data: bytes):
+        if data:
+            self.crc = zlib.crc32(data, self.crc)
+            self.size += len(data)
+            if self.file:
+                self.file.write(data)
+
+    def finish(self, expected_crc: Optional[int] = None) -> Optional[str]:
+        """Move the entry into place; returns its path, or None if it was skipped"""
+        expected_crc = self.expected_crc if expected_crc is None else expected_crc
+        if self.file:
+            self.file.close()
+            if expected_crc is not None and expected_crc != self.crc:
+                os.remove(self.target + PARTIAL_SUFFIX)
+                raise ValueError(f"CRC mismatch for {os.path.basename(self.target)}")
+            try:
+                _move_no_clobber(self.target + PARTIAL_SUFFIX, self.target)
+            except FileExistsError:
+                # Created while the entry was being written
+                os.remove(self.target + PARTIAL_SUFFIX)
+                self.skipped = True
+        return None if self.skipped else self.target
+
+    def abort(self):
+        if self.file:
+            self.file.close()
+            try:
+                os.remove(self.target + PARTIAL_SUFFIX)
+            except OSError:
+                pass
+
+class _Extractor:
+    """Paths of the entries written, and of those skipped because a file was there"""
+
+    def __init__(self):
+        self.extracted: List[str] = []
+        self.skipped: List[str] = []
+
+    def _collect(self, writer: _EntryWriter, crc: Optional[int] = None):
+        target = writer.finish(crc)
+        if target:
+            self.extracted.append(target)
+        elif writer.skipped:
+            self.skipped.append(writer.target)
+
+def _parse_zip64_extra(extra: bytes, fields: List[int]) -> Tuple[List[int], bool]:
+    """Replace 0xFFFFFFFF placeholders with their values from the zip64 extra field.
+
+    Also reports whether the entry has a zip64 extra field at all.
+    """
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, length = struct.unpack_from("<HH", extra, pos)
+        if header_id == 0x0001:
+            values = extra[pos + 4:pos + 4 + length]
+            offset = 0
+            result = []
+            for value in fields:
+                if value == 0xFFFFFFFF and offset + 8 <= len(values):
+                    value = struct.unpack_from("<Q", values, offset)[0]
+                    offset += 8
+                result.append(value)
+            return result, True
+        pos += 4 + length
+    return fields, False
+
+class ZipStreamExtractor(_Extractor):
+    """Extract a zip archive from a byte stream as it arrives.
+
+    Entries are decoded from their local headers, so nothing but the
+    extracted files is written to disk. Entries whose end cannot be found
+    without the central directory (stored data with a trailing data
+    descriptor) or that use unsupported features switch the extractor to
+    spooling: the rest of the stream goes to a temporary file and those
+    entries are extracted with the central directory once the download ends.
+
+    ``resolve_target`` maps an entry name to the path to extract it to, or
+    None to skip the entry. Entries whose path already exists are left
+    alone and listed in ``skipped``.
+    """
+
+    def __init__(self, resolve_target: Callable[[str], Optional[str]], spool_dir: Optional[str] = None):
+        super().__init__()
+        self.resolve_target = resolve_target
+        self.spool_dir = spool_dir
+
+        self._buffer = bytearray()
+        self._offset = 0  # absolute stream offset of the start of the buffer
+        self._state = "header"
+        self._entry: Optional[_EntryWriter] = None
+        self._decompressor = None
+        self._remaining = 0
+        self._zip64 = False
+        self._spool = None
+        self._spool_offset = 0
+
+    def write(self, data: bytes):
+        """Feed the next chunk of the archive"""
+        if self._spool:
+            self._spool.write(data)
+            return
+        if self._state == "done":
+            return
+
+        self._buffer.extend(data)
+        while self._step():
+            pass
+
+    def _consume(self, count: int) -> bytes:
+        data = bytes(self._buffer[:count])
+        del self._buffer[:count]
+        self._offset += count
+        return data
+
+    def _step(self) -> bool:
+        """Process as much of the buffer as possible; False when more input is needed"""
+        if self._state == "header":
+            return self._read_header()
+        if self._state == "data":
+            return self._read_data()
+        if self._state == "descriptor":
+            return self._read_descriptor()
+        return False
+
+    def _read_header(self) -> bool:
+        if len(self._buffer) < 4:
+            return False
+
+        signature = bytes(self._buffer[:4])
+        if signature in (_CENTRAL_HEADER, _END_OF_CENTRAL_DIR, _ZIP64_END_OF_CENTRAL_DIR):
+            # Every entry has been read; the central directory adds nothing
+            self._state = "done"
+            self._buffer.clear()
+            return False
+        if signature != _LOCAL_HEADER:
+            raise ValueError("Not a valid zip archive")
+
+        if len(self._buffer) < _LOCAL_HEADER_STRUCT.size:
+            return False
+        (_, _, flags, method, _, _, crc, compressed_size, uncompressed_size,
+         name_length, extra_length) = _LOCAL_HEADER_STRUCT.unpack_from(self._buffer)
+        header_length = _LOCAL_HEADER_STRUCT.size + name_length + extra_length
+        if len(self._buffer) < header_length:
+            return False
+
+        has_descriptor = bool(flags & _FLAG_DATA_DESCRIPTOR)
+        if (flags & _FLAG_ENCRYPTED or method not in (_METHOD_STORED, _METHOD_DEFLATED)
+                or (method == _METHOD_STORED and has_descriptor)):
+            self._start_spool()
+            return False
+
+        header = self._consume(header_length)
+        name_bytes = header[_LOCAL_HEADER_STRUCT.size:_LOCAL_HEADER_STRUCT.size + name_length]
+        extra = header[_LOCAL_HEADER_STRUCT.size + name_length:]
+        name = name_bytes.decode("utf-8" if flags & _FLAG_UTF8 else "cp437")
+
+        (uncompressed_size, compressed_size), self._zip64 = _parse_zip64_extra(
+            extra, [uncompressed_size, compressed_size]
+        )
+
+        target = None
+        if not name.endswith("/") and is_safe_entry_name(name):
+            target = self.resolve_target(name)
+
+        self._entry = _EntryWriter(target, None if has_descriptor else crc)
+        self._decompressor = zlib.decompressobj(-15) if method == _METHOD_DEFLATED else None
+        self._remaining = None if has_descriptor else compressed_size
+        self._state = "data"
+        return True
+
+    def _read_data(self) -> bool:
+        if self._remaining == 0:
+            self._finish_entry()
+            return True
+        if not self._buffer:
+            return False
+
+        if self._remaining is None:
+            # Deflate stream of unknown length: it ends where the decompressor says so
+            data = self._consume(len(self._buffer))
+            self._entry.write(self._decompressor.decompress(data))
+            if self._decompressor.eof:
+                unused = self._decompressor.unused_data
+                self._buffer[:0] = unused
+                self._offset -= len(unused)
+                self._state = "descriptor"
+            return True
+
+        data = self._consume(min(self._remaining, len(self._buffer)))
+        self._remaining -= len(data)
+        self._entry.write(self._decompressor.decompress(data) if self._decompressor else data)
+        if self._remaining == 0 and self._decompressor:
+            self._entry.write(self._decompressor.flush())
+        return True
+
+    def _read_descriptor(self) -> bool:
+        has_signature = self._buffer[:4] == _DATA_DESCRIPTOR
+        length = (4 if has_signature else 0) + (20 if self._zip64 else 12)
+        if len(self._buffer) < length:
+            return False
+
+        descriptor = self._consume(length)
+        crc = struct.unpack_from("<I", descriptor, 4 if has_signature else 0)[0]
+        self._finish_entry(crc)
+        return True
+
+    def _finish_entry(self, crc: Optional[int] = None):
+        self._collect(self._entry, crc)
+        self._entry = None
+        self._decompressor = None
+        self._state = "header"
+
+    def _start_spool(self):
+        """Switch to spooling the rest of the stream for extraction at the end"""
+        self._spool = tempfile.TemporaryFile(dir=self.spool_dir)
+        self._spool_offset = self._offset
+        self._spool.write(bytes(self._buffer))
+        self._buffer.clear()
+
+    def close(self) -> List[str]:
+        """Finish extraction once the whole archive has been fed"""
+        try:
+            if self._spool:
+                self._extract_spool()
+            elif self._state not in ("header", "done"):
+                raise ValueError("Archive ended in the middle of an entry")
+        except Exception:
+            if self._entry:
+                self._entry.abort()
+            raise
+        finally:
+            if self._spool:
+                self._spool.close()
+                self._spool = None
+        return self.extracted
+
+    def abort(self):
+        """Drop the entry being written after a failed download"""
+        if self._entry:
+            self._entry.abort()
+            self._entry = None
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+
+    def _read_spool(self, offset: int, length: int) -> bytes:
+        self._spool.seek(offset - self._spool_offset)
+        return self._spool.read(length)
+
+    def _extract_spool(self):
+        """Extract the spooled entries using the central directory"""
+        spool = self._spool
+        spool.seek(0, os.SEEK_END)
+        spool_size = spool.tell()
+        end = self._spool_offset + spool_size
+
+        tail_length = min(spool_size, 65557)
+        tail = self._read_spool(end - tail_length, tail_length)
+        eocd = tail.rfind(_END_OF_CENTRAL_DIR)
+        if eocd < 0:
+            raise ValueError("Zip central directory not found")
+        cd_size, cd_offset = struct.unpack_from("<II", tail, eocd + 12)
+
+        if cd_offset == 0xFFFFFFFF and eocd >= 20 and tail[eocd - 20:eocd - 16] == _ZIP64_LOCATOR:
+            zip64_eocd_offset = struct.unpack_from("<Q", tail, eocd - 12)[0]
+            record = self._read_spool(zip64_eocd_offset, 56)
+            cd_size, cd_offset = struct.unpack_from("<QQ", record, 40)
+
+        if cd_offset < self._spool_offset:
+            raise ValueError("Zip central directory is not in the spooled data")
+
+        directory = self._read_spool(cd_offset, cd_size)
+        pos = 0
+        while pos + _CENTRAL_HEADER_STRUCT.size <= len(directory):
+            (signature, _, _, flags, method, _, _, crc, compressed_size, uncompressed_size,
+             name_length, extra_length, comment_length, _, _, _, header_offset) = \
+                _CENTRAL_HEADER_STRUCT.unpack_from(directory, pos)
+            if signature != _CENTRAL_HEADER:
+                break
+
+            start = pos + _CENTRAL_HEADER_STRUCT.size
+            name = directory[start:start + name_length].decode("utf-8" if flags & _FLAG_UTF8 else "cp437")
+            extra = directory[start + name_length:start + name_length + extra_length]
+            pos = start + name_length + extra_length + comment_length
+
+            (uncompressed_size, compressed_size, header_offset), _ = _parse_zip64_extra(
+                extra, [uncompressed_size, compressed_size, header_offset]
+            )
+            if header_offset < self._spool_offset or name.endswith("/") or not is_safe_entry_name(name):
+                continue
+            if flags & _FLAG_ENCRYPTED or method not in (_METHOD_STORED, _METHOD_DEFLATED):
+                raise ValueError(f"Unsupported zip entry: {name}")
+
+            target = self.resolve_target(name)
+            if not target:
+                continue
+
+            local = self._read_spool(header_offset, _LOCAL_HEADER_STRUCT.size)
+            local_name_length, local_extra_length = struct.unpack_from("<HH", local, 26)
+            spool.seek(header_offset - self._spool_offset + _LOCAL_HEADER_STRUCT.size
+                       + local_name_length + local_extra_length)
+
+            self._entry = _EntryWriter(target, crc)
+            decompressor = zlib.decompressobj(-15) if method == _METHOD_DEFLATED else None
+            remaining = compressed_size
+            while remaining > 0:
+                data = spool.read(min(remaining, 1024 * 1024))
+                if not data:
+                    raise ValueError(f"Truncated zip entry: {name}")
+                remaining -= len(data)
+                self._entry.write(decompressor.decompress(data) if decompressor else data)
+            if decompressor:
+                self._entry.write(decompressor.flush())
+            self._collect(self._entry)
+            self._entry = None
+
+class _ChunkReader:
+    """File-like object fed with chunks from another thread"""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=16)
+        self._buffer = b""
+        self._eof = False
+
+    def feed(self, data: Optional[bytes]):
+        self._queue.put(data)
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self._queue.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+class TarStreamExtractor(_Extractor):
+    """Extract a (compressed) tar archive from a byte stream as it arrives.
+
+    tarfile's stream mode pulls its input, so it runs on a helper thread that
+    reads the chunks handed to ``write``. Only regular files are extracted,
+    and like zip entries never over existing files.
+    """
+
+    def __init__(self, resolve_target: Callable[[str], Optional[str]]):
+        super().__init__()
+        self.resolve_target = resolve_target
+        self._reader = _ChunkReader()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._extract, name="tar-extract", daemon=True)
+        self._thread.start()
+
+    def _extract(self):
+        try:
+            with tarfile.open(fileobj=self._reader, mode="r|*") as archive:
+                for member in archive:
+                    if not member.isfile() or not is_safe_entry_name(member.name):
+                        continue
+                    target = self.resolve_target(member.name)
+                    if not target:
+                        continue
+
+                    source = archive.extractfile(member)
+                    writer = _EntryWriter(target)
+                    try:
+                        while True:
+                            data = source.read(1024 * 1024)
+                            if not data:
+                                break
+                            writer.write(data)
+                    except Exception:
+                        writer.abort()
+                        raise
+                    self._collect(writer)
+        except BaseException as e:
+            self._error = e
+            # Keep draining so the downloading thread never blocks on a full queue
+            while self._reader.read(1024 * 1024):
+                pass
+
+    def write(self, data: bytes):
+        """Feed the next chunk of the archive"""
+        self._reader.feed(data)
+
+    def close(self) -> List[str]:
+        """Finish extraction once the whole archive has been fed"""
+        self._reader.feed(None)
+        self._thread.join()
+        if self._error:
+            raise self._error
+        return self.extracted
+
+    def abort(self):
+        """Stop extraction after a failed download"""
+        self._reader.feed(None)
+        self._thread.join(timeout=5)
+
+def create_stream_extractor(archive_format: str, resolve_target: Callable[[str], Optional[str]],
+                            spool_dir: Optional[str] = None):
+    """Create the extractor for an archive format"""
+    if archive_format == "zip":
+        return ZipStreamExtractor(resolve_target, spool_dir)
+    if archive_format == "tar":
+        return TarStreamExtractor(resolve_target)
+    raise ValueError(f"Unsupported archive format: {archive_format}")
@@ -0,0 +1,190 @@
+import os
+import time
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Any, Optional, Callable
+
+from utils.sequence_log import SequenceLog
+from utils.log_store import LogStore, STORE_DIR
+from utils.log_tail import tail_file, cursor_at, parse_cursor
+
+# Lines of ComfyUI output kept in memory
+LOG_BUFFER_LINES = 5000
+
+# Where captured output is written when persistence is on
+LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "logs", "comfyui.log")
+
+# ComfyUI prints this once its server is listening
+READY_BANNER = "To see the GUI go to"
+
+# Seconds between reads of ComfyUI's output files
+FOLLOW_INTERVAL = 0.25
+
+# An output file is emptied once it grows past this and has been read to its end
+OUTPUT_MAX_BYTES = 32 * 1024 * 1024
+
+# Lines of earlier output read back when following a process we didn't start this run
+REATTACH_LINES = 200
+
+class LogCapture:
+    """Follow ComfyUI's stdout and stderr into a bounded ring buffer.
+
+    ComfyUI writes its output to files rather than pipes, so it keeps
+    running when the backend exits and a restarted backend re-attaches to
+    it (a pipe would break on its next print). A follower thread reads new
+    lines from the files a few times a second and empties them once they
+    are large and fully read; ComfyUI appends, so it carries on at the new
+    end. Each line gets a sequence number, so clients ask for what came
+    after the last line they saw. Lines can also be appended to a
+    size-rotated file that outlives the in-memory buffer.
+    """
+
+    def __init__(self, maxlen: int = LOG_BUFFER_LINES):
+        self.buffer = SequenceLog(maxlen)
+        self.on_ready: Optional[Callable[[], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._file_logger: Optional[logging.Logger] = None
+        self._file_handler: Optional[RotatingFileHandler] = None
+        # Indexed archive for searching past output
+        self.store: Optional[LogStore] = None
+        self._lock = threading.Lock()
+
+    def configure(self, persist: bool, path: str = LOG_FILE, max_mb: float = 10, backups: int = 3):
+        """Turn persistence of captured lines on or off"""
+        with self._lock:
+            if self._file_handler is not None:
+                self._file_logger.removeHandler(self._file_handler)
+                self._file_handler.close()
+                self._file_handler = None
+            if not persist:
+                return
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                handler = RotatingFileHandler(
+                    path, maxBytes=int(max_mb * 1024 * 1024), backupCount=max(int(backups), 0), encoding="utf-8"
+                )
+            except OSError as e:
+                print(f"Error opening ComfyUI log file: {str(e)}")
+                return
+            handler.setFormatter(logging.Formatter("%(asctime)s [%(stream)s] %(message)s"))
+            logger = logging.getLogger("comfydash.comfyui_output")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            self._file_logger = logger
+            self._file_handler = handler
+
+    def configure_store(self, enabled: bool, max_mb: float = 256, root: str = STORE_DIR):
+        """Turn the indexed archive on or off, or change its size cap"""
+        with self._lock:
+            if not enabled:
+                if self.store is not None:
+                    self.store.close()
+                    self.store = None
+                return
+            if self.store is None:
+                try:
+                    self.store = LogStore(root)
+                except OSError as e:
+                    print(f"Error opening ComfyUI log store: {str(e)}")
+                    return
+            self.store.max_bytes = int(max_mb * 1024 * 1024)
+
+    def follow(self, paths: Dict[str, str], backlog: int = 0):
+        """Start following output files (stream name -> path).
+
+        A fresh process's files are read from their start; with backlog,
+        as for a process re-attached to, the last backlog lines of each are
+        read first and then only what follows.
+        """
+        self.join(0)
+        cursors = {stream: None if backlog else cursor_at(path) for stream, path in paths.items()}
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._follow, args=(dict(paths), cursors, backlog, self._stop_event),
+            name="comfyui-output", daemon=True
+        )
+        self._thread.start()
+
+    def _follow(self, paths: Dict[str, str], cursors: Dict[str, Optional[str]], backlog: int,
+                stop_event: threading.Event):
+        while True:
+            # One last pass after the stop, for what the process wrote before exiting
+            stopping = stop_event.is_set()
+            for stream, path in paths.items():
+                cursors[stream] = self._read(stream, path, cursors[stream], backlog)
+            if stopping:
+                return
+            stop_event.wait(FOLLOW_INTERVAL)
+
+    def _read(self, stream: str, path: str, cursor: Optional[str], backlog: int) -> Optional[str]:
+        if cursor is None and not backlog:
+            # Not there yet (or from an older run that used pipes); read it from its start once it is
+            cursor = cursor_at(path)
+            if cursor is None:
+                return None
+        tail = tail_file(path, backlog if cursor is None else 0, cursor)
+        if tail.get("error"):
+            return cursor
+        for line in tail["lines"]:
+            self.append(stream, line)
+
+        cursor = tail["cursor"]
+        _, offset = parse_cursor(cursor)
+        if offset > OUTPUT_MAX_BYTES:
+            try:
+                if os.path.getsize(path) == offset:
+                    os.truncate(path, 0)
+                    cursor = cursor_at(path)
+            except OSError:
+                pass
+        return cursor
+
+    def append(self, stream: str, line: str):
+        now = time.time()
+        self.buffer.append({"time": now, "stream": stream, "line": line})
+        if self._file_handler is not None:
+            self._file_logger.info(line, extra={"stream": stream})
+        store = self.store
+        if store is not None:
+            store.append(now, stream, line)
+        if self.on_ready is not None and READY_BANNER in line:
+            self.on_ready()
+
+    def join(self, timeout: float = 2.0):
+        """Read what is left in the files and stop following (the process exited)"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def is_capturing(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def get_lines(self, since: Optional[int] = None, max_lines: int = 100) -> Dict[str, Any]:
+        """Lines after since, or the last max_lines when since is not given"""
+        if since is None:
+            entries, truncated = self.buffer.tail(max_lines), False
+        elif since > self.buffer.last_seq:
+            # Numbering restarted with the backend; start over from what is kept
+            entries, truncated = self.buffer.since(0, max_lines)[0], True
+        else:
+            entries, truncated = self.buffer.since(since, max_lines)
+        return {
+            "lines": entries,
+            "last": entries[-1]["seq"] if entries else self.buffer.last_seq,
+            "truncated": truncated
+        }
+
+def configure_from_settings(capture: LogCapture, settings: Dict[str, Any]):
+    """Apply the comfyuiLog* settings"""
+    capture.configure(
+        bool(settings.get("comfyuiLogPersist", False)),
+        max_mb=float(settings.get("comfyuiLogMaxMB", 10)),
+        backups=int(settings.get("comfyuiLogBackups", 3))
+    )
+    capture.configure_store(
+        bool(settings.get("comfyuiLogIndexEnabled", True)),
+        max_mb=float(settings.get("comfyuiLogIndexMaxMB", 256))
+    )
@@ -1,21 +1,106 @@
 import os
 import sys
 import subprocess
+import threading
 import time
 import json
-import requests
-from typing import Dict, Any, Optional, List, Tuple
+import uuid
+from typing import Dict, Any, Optional, List, Tuple, Callable
 import platform
-import signal
 import psutil
 
+from utils.sequence_log import SequenceLog
+from utils.comfyui_logs import LogCapture, REATTACH_LINES
+from utils.log_tail import tail_file
+from utils.comfyui_probe import StatusProbe
+from utils.comfyui_ws import ComfyUIBridge
+
+# Where the supervised process is recorded so a restarted backend can re-attach
+PIDFILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "comfyui.pid")
+
+# Seconds between liveness checks of the supervised process
+MONITOR_INTERVAL = 1.0
+
+# Seconds between API probes (queue, VRAM) while ComfyUI is running
+PROBE_INTERVAL = 5.0
+
+# Seconds between API probes while the WebSocket bridge reports queue changes;
+# they keep version, VRAM figures and hung-API detection current
+LIVE_PROBE_INTERVAL = 30.0
+
+# Seconds between process table scans for a ComfyUI started outside ComfyDash
+DISCOVERY_INTERVAL = 10.0
+
+# Seconds to wait for a graceful shutdown before killing
+STOP_TIMEOUT = 10
+
+# Seconds a start waits for the API before settling on running_no_api
+READY_TIMEOUT = 120.0
+
+# First and longest pause between readiness probes (doubling in between)
+READY_PROBE_DELAYS = (0.25, 2.0)
+
+# Folders of a ComfyUI install that hold its own log files (older and newer layouts)
+LOG_FOLDERS = ("logs", "user")
+
+# Start/restart operations and status events kept for clients to catch up on
+MAX_OPERATIONS = 20
+EVENT_LOG_SIZE = 500
+
 class ComfyUIManager:
-    def __init__(self, comfyui_path: str = None):
+    """Supervisor of the ComfyUI process.
+
+    One instance lives for the whole backend (see get_comfyui_supervisor).
+    It keeps the process handle, the state (stopped, starting, running,
+    running_no_api, stopping, error), the start time and the port, and
+    records the process in a pidfile so a restarted backend re-attaches to
+    it. A monitor thread notices exits, probes the API every few seconds and
+    adopts a ComfyUI started outside ComfyDash, so get_status is a memory read.
+    Once ComfyUI answers, its WebSocket (see ComfyUIBridge) carries execution
+    state, and queue changes trigger a probe instead of the regular polling,
+    which slows down to LIVE_PROBE_INTERVAL while the socket is connected.
+    """
+
+    def __init__(self, comfyui_path: str = None, pidfile: str = PIDFILE, name: str = "default"):
         self.comfyui_path = comfyui_path or os.environ.get("COMFYUI_PATH", "")
-        self.process = None
+        self.pidfile = pidfile
+        self.name = name
+        # Launch options of this instance (see ComfyUIPool): "cpu", a GPU index or None for all GPUs
+        self.gpu: Optional[str] = None
+        self.cpu_affinity: Optional[List[int]] = None
+        self.extra_args: List[str] = []
+        # Which running ComfyUI processes discovery may adopt (all when None)
+        self.adopt_filter: Optional[Callable[[Dict[str, Any]], bool]] = None
+        self.process = None  # Popen handle when ComfyDash started the process
+        self.pid: Optional[int] = None
+        self.managed = False  # False for a ComfyUI found running outside ComfyDash
         self.api_url = "http://127.0.0.1:8188"
+        self.port = 8188
         self.status = "stopped"
+        self.status_since = time.time()
         self.start_time = 0
+        self.exit_code: Optional[int] = None
+        self._details: Dict[str, Any] = {}
+        self._last_probe = 0.0
+        self.probed_at = 0.0  # wall time of the last API probe
+        self.probe_interval = PROBE_INTERVAL
+        self._queue_version = 0  # bridge queue_version of the last probe
+        # Concurrent, coalesced API probing with a short result cache
+        self.prober = StatusProbe()
+        # Live queue and progress pushed by ComfyUI over /ws
+        self.bridge = ComfyUIBridge()
+        self._last_discovery = 0.0
+        self._lock = threading.RLock()
+        self._ready_event = threading.Event()
+        self.operations: Dict[str, Dict[str, Any]] = {}
+        self.current_operation: Optional[str] = None
+        # Status changes and operation updates, numbered for /api/comfyui/events
+        self.events = SequenceLog(EVENT_LOG_SIZE)
+        # Output of the process, followed from the files it writes to
+        self.logs = LogCapture()
+        self.logs.on_ready = self.mark_ready
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
     
     def set_comfyui_path(self, path: str) -> bool:
         """Set the path to the ComfyUI installation"""
@@ -23,160 +108,463 @@ class ComfyUIManager:
             self.comfyui_path = path
             return True
         return False
+
+    def _set_status(self, status: str):
+        with self._lock:
+            if status == self.status:
+                return
+            previous = self.status
+            self.status = status
+            self.status_since = time.time()
+            self.events.append({
+                "type": "status", "status": status, "previous": previous,
+                "pid": self.pid, "time": self.status_since
+            })
+
+    def _attach(self, pid: int, port: int, start_time: float, managed: bool, process=None):
+        with self._lock:
+            self.process = process
+            self.pid = pid
+            self.port = port
+            self.api_url = f"http://127.0.0.1:{port}"
+            self.start_time = start_time
+            self.managed = managed
+            self.exit_code = None
+            self._details = {}
+            self._last_probe = 0.0
+
+    def _detach(self, exit_code: Optional[int] = None):
+        with self._lock:
+            self.process = None
+            self.pid = None
+            self.start_time = 0
+            self.exit_code = exit_code
+            self._details = {}
+        self.logs.join()
+        self.bridge.disconnect()
+        self._remove_pidfile()
+
+    def _write_pidfile(self):
+        try:
+            os.makedirs(os.path.dirname(self.pidfile), exist_ok=True)
+            with open(self.pidfile, "w") as f:
+                json.dump({
+                    "pid": self.pid,
+                    "port": self.port,
+                    "create_time": psutil.Process(self.pid).create_time(),
+                    "start_time": self.start_time,
+                    "comfyui_path": self.comfyui_path
+                }, f)
+        except (OSError, psutil.Error) as e:
+            print(f"Error writing ComfyUI pidfile: {str(e)}")
+
+    def _remove_pidfile(self):
+        try:
+            os.remove(self.pidfile)
+        except OSError:
+            pass
+
+    def _output_paths(self) -> Dict[str, str]:
+        """Files ComfyUI's stdout and stderr go to, next to the pidfile"""
+        base = os.path.splitext(self.pidfile)[0]
+        return {stream: f"{base}.{stream}.log" for stream in ("stdout", "stderr")}
+
+    def _open_output(self) -> Dict[str, Any]:
+        """Empty the output files and open them for appending, for a new process"""
+        files = {}
+        try:
+            for stream, path in self._output_paths().items():
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, "wb").close()
+                # Appending, so the files can be emptied under the running process
+                files[stream] = open(path, "ab")
+        except OSError:
+            for f in files.values():
+                f.close()
+            raise
+        return files
+
+    def reattach(self) -> bool:
+        """Pick up the process recorded in the pidfile by a previous backend run"""
+        try:
+            with open(self.pidfile, "r") as f:
+                record = json.load(f)
+            process = psutil.Process(record["pid"])
+            # A recycled PID has a different creation time
+            if abs(process.create_time() - record["create_time"]) > 1 or not process.is_running():
+                raise psutil.NoSuchProcess(record["pid"])
+        except (OSError, ValueError, KeyError, psutil.Error):
+            self._remove_pidfile()
+            return False
+
+        self._attach(record["pid"], record.get("port", 8188), record.get("start_time") or process.create_time(), True)
+        self.logs.follow(self._output_paths(), backlog=REATTACH_LINES)
+        self._set_status("starting")
+        return True
+
+    def start_monitor(self):
+        """Re-attach to a previous process if any and start watching"""
+        if self._thread and self._thread.is_alive():
+            return
+        if self.pid is None:
+            self.reattach()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="comfyui-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop_monitor(self):
+        """Stop watching; ComfyUI itself keeps running for the next backend to re-attach"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.prober.close()
+        self.bridge.close()
+
+    def configure_probing(self, ttl: Optional[float] = None, interval: Optional[float] = None):
+        """Change how long probe results are reused and how often the monitor probes"""
+        if ttl is not None:
+            self.prober.ttl = max(float(ttl), 0.0)
+        if interval:
+            self.probe_interval = max(float(interval), 1.0)
+
+    def _run(self):
+        while not self._stop_event.wait(MONITOR_INTERVAL):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error supervising ComfyUI: {str(e)}")
+
+    def _alive(self) -> Tuple[bool, Optional[int]]:
+        """Whether the supervised process is still running, and its exit code if known"""
+        if self.process is not None:
+            code = self.process.poll()
+            return code is None, code
+        try:
+            process = psutil.Process(self.pid)
+            return process.is_running() and process.status() != psutil.STATUS_ZOMBIE, None
+        except psutil.Error:
+            return False, None
+
+    def check(self):
+        """One supervision step: notice exits, probe the API or look for an outside ComfyUI"""
+        now = time.monotonic()
+        with self._lock:
+            pid = self.pid
+            status = self.status
+
+        if pid is None:
+            if now - self._last_discovery >= DISCOVERY_INTERVAL and self.comfyui_path:
+                self._last_discovery = now
+                found = sorted(self.find_comfyui_processes(), key=lambda p: -p["uptime"])
+                if self.adopt_filter is not None:
+                    found = [process for process in found if self.adopt_filter(process)]
+                if found:
+                    self._attach(found[0]["pid"], found[0]["port"], time.time() - found[0]["uptime"], False)
+                    self._set_status("starting")
+            return
+
+        alive, exit_code = self._alive()
+        if not alive:
+            self._detach(exit_code)
+            self._set_status("stopped" if status == "stopping" or not exit_code else "error")
+            return
+
+        live = self.bridge.is_connected(self.api_url)
+        if status == "running" and not live:
+            self.bridge.connect(self.api_url)
+
+        # With the bridge up, a queue change pushed by ComfyUI is what asks for a probe
+        interval = max(self.probe_interval, LIVE_PROBE_INTERVAL) if live else self.probe_interval
+        queue_changed = live and self.bridge.queue_version != self._queue_version
+        if status in ("starting", "running", "running_no_api") and (queue_changed or now - self._last_probe >= interval):
+            self._last_probe = now
+            self._queue_version = self.bridge.queue_version
+            self.probe(max_age=0 if queue_changed else None)
+
+    def probe(self, max_age: Optional[float] = None) -> bool:
+        """Refresh the API details (stats and queue); returns whether ComfyUI answered.
+
+        Goes through the shared StatusProbe, so concurrent callers share one
+        probe and a result younger than max_age (the probe TTL) is reused.
+        """
+        try:
+            result = self.prober.get(self.api_url, max_age)
+        except Exception:
+            result = {"answered": False, "probed_at": time.time()}
+        return self._apply_probe(result)
+
+    async def probe_async(self, max_age: Optional[float] = None) -> bool:
+        """probe() for request handlers, without blocking the event loop"""
+        try:
+            result = await self.prober.get_async(self.api_url, max_age)
+        except Exception:
+            result = {"answered": False, "probed_at": time.time()}
+        return self._apply_probe(result)
+
+    def _apply_probe(self, result: Dict[str, Any]) -> bool:
+        answered = result["answered"]
+        details = {key: result[key] for key in ("resources", "version", "queue") if key in result}
+        with self._lock:
+            if self.pid is None or self.status == "stopping":
+                return answered
+            if result["probed_at"] < self.probed_at:
+                # A slower caller is late with an older result; don't let it undo a newer one
+                return answered
+            self._details = details
+            self.probed_at = result["probed_at"]
+            if answered:
+                self._ready_event.set()
+                self._set_status("running")
+            elif (self.status == "running" and result["probed_at"] > self.status_since) or \
+                    (not self.current_operation and time.time() - self.start_time > READY_TIMEOUT):
+                # The process is up but the API stopped answering, or never did.
+                # A cached failure from before the ready banner doesn't count
+                self._set_status("running_no_api")
+        return answered
     
-    def start_comfyui(self, port: int = 8188) -> Dict[str, Any]:
-        """Start the ComfyUI process"""
+    def _spawn(self, port: int) -> Dict[str, Any]:
+        """Launch the ComfyUI process without waiting for it to come up"""
         if not self.comfyui_path or not os.path.exists(self.comfyui_path):
             return {"status": "error", "message": "ComfyUI path not set or invalid"}
         
         if self.is_running():
-            return {"status": "already_running", "message": "ComfyUI is already running"}
+            return {"status": "already_running", "message": "ComfyUI is already running", "pid": self.pid, "port": self.port}
         
         try:
-            # Change to ComfyUI directory
-            os.chdir(self.comfyui_path)
-            
             # Determine the Python executable
             python_exe = sys.executable
             if not python_exe or not os.path.exists(python_exe):
                 python_exe = "python" if platform.system() == "Windows" else "python3"
             
             # Build the command
-            cmd = [python_exe, "main.py", f"--port={port}"]
-            
-            # Start the process
-            if platform.system() == "Windows":
-                # Use CREATE_NO_WINDOW flag on Windows to hide console
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-            else:
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-            
-            self.start_time = time.time()
-            self.status = "starting"
-            self.api_url = f"http://127.0.0.1:{port}"
-            
-            # Wait a bit for the process to start
-            time.sleep(2)
+            cmd = [python_exe, "main.py", f"--port={port}"] + list(self.extra_args)
+            # Unbuffered, so output reaches the log files as it is printed
+            env = dict(os.environ, PYTHONUNBUFFERED="1")
+            if self.gpu == "cpu":
+                env["CUDA_VISIBLE_DEVICES"] = ""
+                if "--cpu" not in cmd:
+                    cmd.append("--cpu")
+            elif self.gpu is not None:
+                # Number devices like nvidia-smi and NVML do, so the index means the same GPU
+                env["CUDA_DEVICE_ORDER"] = "PCI_BUS_ID"
+                env["CUDA_VISIBLE_DEVICES"] = str(self.gpu)
             
-            # Check if process is running
-            if self.process.poll() is None:
-                # Wait for API to become available (max 30 seconds)
-                for _ in range(15):
-                    try:
-                        response = requests.get(f"{self.api_url}/system_stats", timeout=2)
-                        if response.status_code == 200:
-                            self.status = "running"
-                            return {
-                                "status": "running",
-                                "message": "ComfyUI started successfully",
-                                "pid": self.process.pid,
-                                "port": port
-                            }
-                    except:
-                        pass
-                    time.sleep(2)
-                
-                # If we got here, the API didn't respond but process is running
-                self.status = "running_no_api"
-                return {
-                    "status": "running_no_api",
-                    "message": "ComfyUI process started but API not responding",
-                    "pid": self.process.pid,
-                    "port": port
-                }
-            else:
-                # Process failed to start
-                stdout, stderr = self.process.communicate()
-                self.status = "stopped"
-                return {
-                    "status": "error",
-                    "message": "ComfyUI failed to start",
-                    "stdout": stdout,
-                    "stderr": stderr
-                }
-        
+            # Output goes to files, not pipes: a pipe breaks when the backend exits,
+            # and ComfyUI would die on its next print instead of waiting to be re-attached
+            output = self._open_output()
+            try:
+                # Start the process in the ComfyUI directory, without changing ours
+                if platform.system() == "Windows":
+                    # Use CREATE_NO_WINDOW flag on Windows to hide console
+                    process = subprocess.Popen(
+                        cmd,
+                        cwd=self.comfyui_path,
+                        stdin=subprocess.DEVNULL,
+                        stdout=output["stdout"],
+                        stderr=output["stderr"],
+                        env=env,
+                        creationflags=subprocess.CREATE_NO_WINDOW
+                    )
+                else:
+                    # Own session, so stopping the backend with Ctrl+C doesn't take ComfyUI down
+                    process = subprocess.Popen(
+                        cmd,
+                        cwd=self.comfyui_path,
+                        stdin=subprocess.DEVNULL,
+                        stdout=output["stdout"],
+                        stderr=output["stderr"],
+                        env=env,
+                        start_new_session=True
+                    )
+            finally:
+                for f in output.values():
+                    f.close()
         except Exception as e:
-            self.status = "error"
+            self._set_status("error")
             return {"status": "error", "message": str(e)}
+        
+        if self.cpu_affinity:
+            try:
+                psutil.Process(process.pid).cpu_affinity(list(self.cpu_affinity))
+            except (AttributeError, ValueError, psutil.Error) as e:
+                # cpu_affinity is not available on macOS
+                print(f"Error setting CPU affinity of ComfyUI ({self.name}): {str(e)}")
+
+        self._ready_event.clear()
+        self.logs.follow(self._output_paths())
+        self._attach(process.pid, port, time.time(), True, process)
+        self._set_status("starting")
+        self._write_pidfile()
+        return {"status": "starting", "message": "ComfyUI is starting", "pid": process.pid, "port": port}
+
+    def mark_ready(self):
+        """Signal that ComfyUI is serving (e.g. its startup banner was seen)"""
+        self._ready_event.set()
+
+    def _await_ready(self, timeout: float = READY_TIMEOUT) -> Dict[str, Any]:
+        """Wait for the API to answer, probing quickly at first and backing off"""
+        with self._lock:
+            process = self.process
+            pid = self.pid
+            port = self.port
+        deadline = time.monotonic() + timeout
+        delay = READY_PROBE_DELAYS[0]
+        while time.monotonic() < deadline:
+            alive, exit_code = self._alive() if self.pid == pid else (False, None)
+            if not alive:
+                result = {"status": "error", "message": "ComfyUI exited while starting", "exit_code": exit_code}
+                if process is not None and self.pid == pid:
+                    process.wait()
+                    self.logs.join()
+                    result["exit_code"] = process.returncode
+                    result["output"] = [entry["line"] for entry in self.logs.buffer.tail(50)]
+                    self._detach(process.returncode)
+                    self._set_status("error")
+                return result
+            # A ready signal still gets a probe, for the queue and version
+            signalled = self._ready_event.is_set()
+            if self.probe(max_age=0) or signalled:
+                self._set_status("running")
+                return {"status": "running", "message": "ComfyUI started successfully", "pid": pid, "port": port}
+            self._ready_event.wait(delay)
+            delay = min(delay * 2, READY_PROBE_DELAYS[1])
+        
+        # The API didn't respond but the process is running
+        self._set_status("running_no_api")
+        return {
+            "status": "running_no_api",
+            "message": "ComfyUI process started but API not responding",
+            "pid": pid,
+            "port": port
+        }
+
+    def _begin_operation(self, action: str, port: int) -> Dict[str, Any]:
+        operation = {
+            "id": uuid.uuid4().hex[:12],
+            "action": action,
+            "port": port,
+            "status": "running",
+            "started": time.time(),
+            "finished": None,
+            "result": None
+        }
+        with self._lock:
+            self.operations[operation["id"]] = operation
+            # Keep the most recent operations only
+            for old in list(self.operations)[:-MAX_OPERATIONS]:
+                del self.operations[old]
+            self.current_operation = operation["id"]
+        self.events.append({"type": "operation", "operation": dict(operation), "time": time.time()})
+        return operation
+
+    def _finish_operation(self, operation: Dict[str, Any], result: Dict[str, Any]):
+        with self._lock:
+            operation.update(
+                status="succeeded" if result.get("status") in ("running", "already_running") else "failed",
+                finished=time.time(),
+                result=result
+            )
+            if self.current_operation == operation["id"]:
+                self.current_operation = None
+        self.events.append({"type": "operation", "operation": dict(operation), "time": time.time()})
+
+    def _run_operation(self, operation: Dict[str, Any], steps):
+        try:
+            result = steps()
+        except Exception as e:
+            self._set_status("error")
+            result = {"status": "error", "message": str(e)}
+        self._finish_operation(operation, result)
+
+    def start_comfyui(self, port: int = 8188) -> Dict[str, Any]:
+        """Start the ComfyUI process; returns at once with an operation ID to follow readiness"""
+        with self._lock:
+            if self.current_operation:
+                return {"status": "busy", "message": "Another start or restart is in progress",
+                        "operation_id": self.current_operation}
+            result = self._spawn(port)
+            if result["status"] != "starting":
+                return result
+            operation = self._begin_operation("start", port)
+        
+        threading.Thread(
+            target=self._run_operation, args=(operation, self._await_ready),
+            name="comfyui-start", daemon=True
+        ).start()
+        return dict(result, operation_id=operation["id"])
     
     def stop_comfyui(self) -> Dict[str, Any]:
         """Stop the ComfyUI process"""
-        if not self.process or self.process.poll() is not None:
-            self.status = "stopped"
+        with self._lock:
+            pid = self.pid
+            process = self.process
+        if pid is None or not self._alive()[0]:
+            self._detach()
+            self._set_status("stopped")
             return {"status": "not_running", "message": "ComfyUI is not running"}
         
+        self._set_status("stopping")
         try:
-            # Try to terminate gracefully first
-            if platform.system() == "Windows":
-                self.process.terminate()
-            else:
-                os.kill(self.process.pid, signal.SIGTERM)
-            
-            # Wait for process to terminate (max 10 seconds)
-            for _ in range(10):
-                if self.process.poll() is not None:
-                    self.status = "stopped"
-                    return {"status": "stopped", "message": "ComfyUI stopped successfully"}
-                time.sleep(1)
+            target = psutil.Process(pid)
+            # Try to terminate gracefully first (SIGTERM on POSIX)
+            target.terminate()
+            _, alive = psutil.wait_procs([target], timeout=STOP_TIMEOUT)
+            message = "ComfyUI stopped successfully"
             
             # If still running, force kill
-            if platform.system() == "Windows":
-                self.process.kill()
-            else:
-                os.kill(self.process.pid, signal.SIGKILL)
+            if alive:
+                target.kill()
+                psutil.wait_procs([target], timeout=5)
+                message = "ComfyUI forcefully terminated"
             
-            self.process.wait()
-            self.status = "stopped"
-            return {"status": "stopped", "message": "ComfyUI forcefully terminated"}
+            if process is not None:
+                process.wait(timeout=5)
+            self._detach(process.returncode if process is not None else None)
+            self._set_status("stopped")
+            return {"status": "stopped", "message": message}
         
+        except psutil.NoSuchProcess:
+            self._detach()
+            self._set_status("stopped")
+            return {"status": "stopped", "message": "ComfyUI stopped successfully"}
         except Exception as e:
-            self.status = "error"
+            self._set_status("error")
             return {"status": "error", "message": str(e)}
     
     def restart_comfyui(self, port: int = 8188) -> Dict[str, Any]:
-        """Restart the ComfyUI process"""
-        stop_result = self.stop_comfyui()
-        time.sleep(2)  # Wait a bit before starting again
-        start_result = self.start_comfyui(port)
-        
-        return {
-            "stop_result": stop_result,
-            "start_result": start_result,
-            "status": start_result.get("status", "error")
-        }
+        """Restart the ComfyUI process in the background; returns an operation ID"""
+        with self._lock:
+            if self.current_operation:
+                return {"status": "busy", "message": "Another start or restart is in progress",
+                        "operation_id": self.current_operation}
+            operation = self._begin_operation("restart", port)
+
+        def steps():
+            stop_result = self.stop_comfyui()
+            start_result = self._spawn(port)
+            if start_result["status"] == "starting":
+                start_result = self._await_ready()
+            return dict(start_result, stop_result=stop_result)
+
+        threading.Thread(
+            target=self._run_operation, args=(operation, steps),
+            name="comfyui-restart", daemon=True
+        ).start()
+        return {"status": "restarting", "message": "ComfyUI is restarting", "operation_id": operation["id"]}
+
+    def get_operation(self, operation_id: str) -> Optional[Dict[str, Any]]:
+        """State of a start or restart operation"""
+        with self._lock:
+            operation = self.operations.get(operation_id)
+            return dict(operation) if operation else None
     
     def is_running(self) -> bool:
-        """Check if ComfyUI process is running"""
-        # Check if ComfyUI path is configured
-        if not self.comfyui_path or not os.path.exists(self.comfyui_path):
-            return False
-            
-        if self.process and self.process.poll() is None:
-            return True
-        
-        # Also check if ComfyUI is running as a separate process
-        try:
-            response = requests.get(f"{self.api_url}/system_stats", timeout=1)
-            return response.status_code == 200
-        except Exception as e:
-            # Log the error but don't raise it
-            print(f"Error checking if ComfyUI is running: {str(e)}")
-        
-        return False
+        """Check if the supervised ComfyUI process is running"""
+        with self._lock:
+            return self.pid is not None and self._alive()[0]
     
     def get_status(self) -> Dict[str, Any]:
-        """Get the current status of ComfyUI"""
+        """Get the current status of ComfyUI from the supervisor's state"""
         # Check if ComfyUI path is configured
         if not self.comfyui_path or not os.path.exists(self.comfyui_path):
             return {
@@ -199,56 +587,27 @@ class ComfyUIManager:
                 }
             }
         
-        is_running = self.is_running()
-        
-        if is_running:
-            self.status = "running"
-        else:
-            self.status = "stopped"
-        
-        result = {
-            "status": self.status,
-            "uptime": int(time.time() - self.start_time) if self.start_time > 0 else 0,
-            "port": int(self.api_url.split(":")[-1]) if self.api_url else 8188,
-            "url": self.api_url,
-            "version": "Unknown",
-            "queue": {
-                "pending": 0,
-                "processing": 0,
-                "completed": 0
-            },
-            "resources": {
-                "gpu_usage": 0,
-                "memory_usage": 0
+        with self._lock:
+            details = self._details
+            result = {
+                "name": self.name,
+                "status": self.status,
+                "status_since": self.status_since,
+                "pid": self.pid,
+                "managed": self.managed,
+                "exit_code": self.exit_code,
+                "probed_at": self.probed_at,
+                "operation": dict(self.operations[self.current_operation]) if self.current_operation else None,
+                "last_event": self.events.last_seq,
+                "uptime": int(time.time() - self.start_time) if self.start_time > 0 else 0,
+                "port": self.port,
+                "url": self.api_url,
+                "gpu": self.gpu,
+                "version": details.get("version", "Unknown"),
+                "queue": dict(details.get("queue") or {"pending": 0, "processing": 0, "completed": 0}),
+                "live": self.bridge.is_connected(self.api_url),
+                "resources": dict(details.get("resources") or {"gpu_usage": 0, "memory_usage": 0})
             }
-        }
-        
-        # If running, try to get more detailed status
-        if is_running:
-            try:
-                # Get system stats
-                response = requests.get(f"{self.api_url}/system_stats", timeout=1)
-                if response.status_code == 200:
-                    stats = response.json()
-                    result["resources"]["gpu_usage"] = stats.get("cuda", {}).get("gpu_usage", 0)
-                    result["resources"]["memory_usage"] = stats.get("cuda", {}).get("vram_used", 0)
-                
-                # Get queue status
-                response = requests.get(f"{self.api_url}/queue", timeout=1)
-                if response.status_code == 200:
-                    queue = response.json()
-                    result["queue"]["pending"] = len(queue.get("queue_running", []))
-                    result["queue"]["processing"] = 1 if queue.get("queue_running", []) else 0
-                    result["queue"]["completed"] = queue.get("queue_completed", 0)
-                
-                # Try to get version info
-                response = requests.get(f"{self.api_url}/prompt", timeout=1)
-                if response.status_code == 200:
-                    # Version might be available in some ComfyUI API responses
-                    # This is a placeholder as the actual endpoint might vary
-                    result["version"] = "1.0.0"
-            except Exception as e:
-                result["error"] = str(e)
         
         return result
     
@@ -283,56 +642,69 @@ class ComfyUIManager:
         
         return comfyui_processes
     
-    def get_logs(self, max_lines: int = 100) -> Dict[str, Any]:
-        """Get the logs from the ComfyUI process"""
+    def _find_log_files(self) -> List[str]:
+        """ComfyUI's log files, newest first"""
+        files = []
+        for folder in LOG_FOLDERS:
+            log_path = os.path.join(self.comfyui_path, folder)
+            try:
+                with os.scandir(log_path) as entries:
+                    for entry in entries:
+                        if entry.is_file() and ".log" in entry.name:
+                            files.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                continue
+        return [path for _, path in sorted(files, reverse=True)]
+
+    def get_logs(self, max_lines: int = 100, since: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get the logs from the ComfyUI process.
+
+        Output of a process started by ComfyDash comes from the capture
+        buffer; pass since (the "last" of the previous call) to get only new
+        lines. Otherwise the newest file in ComfyUI's log folders is tailed
+        from its end; pass the returned cursor to get only new lines.
+        """
         logs = {
             "stdout": [],
             "stderr": [],
             "status": self.status
         }
         
-        # If process is running and we have access to its stdout/stderr
-        if self.process and self.process.poll() is None and hasattr(self.process, 'stdout') and hasattr(self.process, 'stderr'):
-            try:
-                # Non-blocking read from stdout
-                stdout_lines = []
-                while len(stdout_lines) < max_lines:
-                    line = self.process.stdout.readline()
-                    if not line:
-                        break
-                    stdout_lines.append(line.strip())
-                logs["stdout"] = stdout_lines
-                
-                # Non-blocking read from stderr
-                stderr_lines = []
-                while len(stderr_lines) < max_lines:
-                    line = self.process.stderr.readline()
-                    if not line:
-                        break
-                    stderr_lines.append(line.strip())
-                logs["stderr"] = stderr_lines
-            except Exception as e:
-                logs["error"] = str(e)
+        # Output captured from the process we started (it stays readable after an exit)
+        if self.logs.buffer.last_seq > 0:
+            captured = self.logs.get_lines(since, max_lines)
+            logs.update(captured, source="capture")
+            logs["stdout"] = [entry["line"] for entry in captured["lines"] if entry["stream"] == "stdout"]
+            logs["stderr"] = [entry["line"] for entry in captured["lines"] if entry["stream"] == "stderr"]
+            logs["logs"] = [entry["line"] for entry in captured["lines"]]
         
-        # If ComfyUI is not running through our manager, try to find log files
+        # If ComfyUI is not running through our manager, tail its newest log file
         elif self.comfyui_path and os.path.exists(self.comfyui_path):
-            log_path = os.path.join(self.comfyui_path, "logs")
-            if os.path.exists(log_path):
-                # Look for the most recent log file
-                log_files = [f for f in os.listdir(log_path) if f.endswith(".log")]
-                if log_files:
-                    # Sort by modification time (newest first)
-                    log_files.sort(key=lambda x: os.path.getmtime(os.path.join(log_path, x)), reverse=True)
-                    latest_log = os.path.join(log_path, log_files[0])
-                    
-                    try:
-                        with open(latest_log, 'r') as f:
-                            # Get the last max_lines lines
-                            lines = f.readlines()[-max_lines:]
-                            logs["stdout"] = [line.strip() for line in lines]
-                    except Exception as e:
-                        logs["error"] = f"Error reading log file: {str(e)}"
+            log_files = self._find_log_files()
+            if log_files:
+                tail = tail_file(log_files[0], max_lines, cursor, siblings=log_files[1:])
+                logs["stdout"] = tail["lines"]
+                logs["logs"] = tail["lines"]
+                logs["cursor"] = tail["cursor"]
+                logs["file"] = log_files[0]
+                logs["source"] = "file"
+                if tail.get("error"):
+                    logs["error"] = f"Error reading log file: {tail['error']}"
         
         # Add timestamp
         logs["timestamp"] = time.time()
         return logs
+
+# Shared supervisor, started by the app lifespan
+_comfyui_supervisor: Optional[ComfyUIManager] = None
+_comfyui_supervisor_lock = threading.Lock()
+
+def get_comfyui_supervisor(comfyui_path: Optional[str] = None) -> ComfyUIManager:
+    """Get the shared ComfyUI supervisor, pointing it at comfyui_path if given"""
+    global _comfyui_supervisor
+    with _comfyui_supervisor_lock:
+        if _comfyui_supervisor is None:
+            _comfyui_supervisor = ComfyUIManager(comfyui_path)
+        elif comfyui_path is not None:
+            _comfyui_supervisor.comfyui_path = comfyui_path
+    return _comfyui_supervisor
@@ -0,0 +1,282 @@
+import os
+import re
+import socket
+import threading
+from typing import Dict, Any, List, Optional
+
+from utils.comfyui_manager import ComfyUIManager, PIDFILE, DISCOVERY_INTERVAL, get_comfyui_supervisor
+from utils.process_stats import ProcessTracker
+from utils.gpu_telemetry import get_all_gpu_stats
+
+# First port tried for an instance added without one
+FIRST_POOL_PORT = 8189
+
+NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+class ComfyUIPool:
+    """Several ComfyUI instances on one host, each with its own supervisor.
+
+    The shared supervisor is the "default" instance; others are added with
+    their own port, GPU (CUDA_VISIBLE_DEVICES, or "cpu"), CPU affinity and
+    extra command line arguments. Every instance has its own monitor,
+    pidfile, probe and WebSocket bridge, so each is health-checked and
+    re-attached on its own. A pool-level scan adopts ComfyUI processes
+    running on ports no instance owns. Instances added with gpu "auto" go
+    to the GPU with the fewest instances, then the least memory and
+    utilization in use.
+    """
+
+    def __init__(self, default: ComfyUIManager):
+        self.instances: Dict[str, ComfyUIManager] = {"default": default}
+        # Instances that came from settings or the API, as opposed to adopted ones
+        self.configured: Dict[str, Dict[str, Any]] = {}
+        self.trackers: Dict[str, ProcessTracker] = {"default": ProcessTracker(default)}
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._monitoring = False
+        self._ttl: Optional[float] = None
+        self._interval: Optional[float] = None
+
+    @property
+    def default(self) -> ComfyUIManager:
+        return self.instances["default"]
+
+    def get(self, name: str) -> Optional[ComfyUIManager]:
+        with self._lock:
+            return self.instances.get(name)
+
+    def set_comfyui_path(self, path: str):
+        """Point every instance at the ComfyUI installation"""
+        with self._lock:
+            for instance in self.instances.values():
+                instance.comfyui_path = path
+
+    def configure(self, configs: List[Dict[str, Any]]):
+        """Match the instances to the comfyuiInstances setting.
+
+        Instances missing from configs are no longer supervised, but their
+        processes are left running; a stop goes through remove_instance.
+        """
+        wanted = {config.get("name"): config for config in configs or [] if config.get("name") != "default"}
+        with self._lock:
+            for name in list(self.configured):
+                if name not in wanted:
+                    self._drop(name)
+            for name, config in wanted.items():
+                try:
+                    self.add_instance(
+                        name, config.get("port"), config.get("gpu", "auto"),
+                        config.get("cpuAffinity"), config.get("extraArgs")
+                    )
+                except ValueError as e:
+                    print(f"Error configuring ComfyUI instance {name}: {str(e)}")
+
+    def configure_probing(self, ttl: Optional[float] = None, interval: Optional[float] = None):
+        with self._lock:
+            self._ttl, self._interval = ttl, interval
+            for instance in self.instances.values():
+                instance.configure_probing(ttl, interval)
+
+    def to_settings(self) -> List[Dict[str, Any]]:
+        """The configured instances in the form of the comfyuiInstances setting"""
+        with self._lock:
+            return [dict(config) for config in self.configured.values()]
+
+    def _free_port(self) -> int:
+        used = {instance.port for instance in self.instances.values()}
+        port = FIRST_POOL_PORT
+        while port in used or not _port_free(port):
+            port += 1
+        return port
+
+    def pick_gpu(self) -> str:
+        """The least loaded GPU index, or "cpu" when there is none"""
+        gpus = get_all_gpu_stats()
+        if not gpus:
+            return "cpu"
+        with self._lock:
+            assigned = [instance.gpu for instance in self.instances.values()]
+
+        def load(gpu: Dict[str, Any]):
+            memory = gpu.get("memory") or {}
+            used = memory.get("used", 0) / memory["total"] if memory.get("total") else 0
+            return assigned.count(str(gpu["index"])), used, gpu.get("usage", 0)
+
+        return str(min(gpus, key=load)["index"])
+
+    def add_instance(self, name: str, port: Optional[int] = None, gpu: Optional[Any] = "auto",
+                     cpu_affinity: Optional[List[int]] = None, extra_args: Optional[List[str]] = None,
+                     adopted: bool = False) -> ComfyUIManager:
+        """Create (or update the options of) an instance; it is not started"""
+        if not NAME_RE.match(name or ""):
+            raise ValueError("Instance names are 1-32 letters, digits, '-' or '_'")
+        with self._lock:
+            instance = self.instances.get(name)
+            if port is not None:
+                owner = next((other for other in self.instances.values() if other.port == port), None)
+                if owner is not None and owner is not instance:
+                    raise ValueError(f"Port {port} is already used by instance {owner.name}")
+            if instance is None:
+                pidfile = os.path.join(os.path.dirname(PIDFILE), f"comfyui-{name}.pid")
+                instance = ComfyUIManager(self.default.comfyui_path, pidfile=pidfile, name=name)
+                instance.port = port or self._free_port()
+                instance.api_url = f"http://127.0.0.1:{instance.port}"
+                instance.configure_probing(self._ttl, self._interval)
+                self.instances[name] = instance
+                self.trackers[name] = ProcessTracker(instance)
+            elif port is not None and instance.pid is None:
+                instance.port = port
+                instance.api_url = f"http://127.0.0.1:{port}"
+
+            if gpu == "auto":
+                gpu = instance.gpu if instance.gpu is not None else self.pick_gpu()
+            instance.gpu = None if gpu is None or gpu == "" else str(gpu)
+            instance.cpu_affinity = [int(cpu) for cpu in cpu_affinity] if cpu_affinity else None
+            instance.extra_args = [str(arg) for arg in extra_args or []]
+
+            if not adopted:
+                self.configured[name] = {
+                    "name": name, "port": instance.port, "gpu": instance.gpu,
+                    "cpuAffinity": instance.cpu_affinity, "extraArgs": instance.extra_args
+                }
+            self._update_filters()
+            if self._monitoring:
+                instance.start_monitor()
+            return instance
+
+    def remove_instance(self, name: str, stop: bool = True) -> Dict[str, Any]:
+        """Stop an instance's process (unless stop is False) and forget it"""
+        if name == "default":
+            raise ValueError("The default instance can't be removed")
+        with self._lock:
+            instance = self.instances.get(name)
+        if instance is None:
+            raise KeyError(name)
+        result = instance.stop_comfyui() if stop else {"status": "detached"}
+        with self._lock:
+            self._drop(name)
+        return result
+
+    def _drop(self, name: str):
+        instance = self.instances.pop(name, None)
+        self.configured.pop(name, None)
+        self.trackers.pop(name, None)
+        if instance is not None:
+            instance.stop_monitor()
+        self._update_filters()
+
+    def _update_filters(self):
+        """Let each instance adopt only processes on its own port; the default takes the rest"""
+        others = {instance.port for name, instance in self.instances.items() if name != "default"}
+        for name, instance in self.instances.items():
+            if name == "default":
+                instance.adopt_filter = (lambda process: process["port"] not in others) if others else None
+            else:
+                instance.adopt_filter = lambda process, port=instance.port: process["port"] == port
+
+    def discover(self) -> List[str]:
+        """Adopt running ComfyUI processes that no instance owns; returns the new instance names"""
+        found = self.default.find_comfyui_processes()
+        adopted = []
+        with self._lock:
+            pids = {instance.pid for instance in self.instances.values()}
+            ports = {instance.port for instance in self.instances.values()}
+            for process in found:
+                if process["pid"] in pids or process["port"] in ports:
+                    # Already supervised, or picked up by its instance's own discovery
+                    continue
+                if self.default.pid is None:
+                    # The default instance adopts it on its next discovery pass
+                    continue
+                name = f"port-{process['port']}"
+                instance = self.add_instance(name, process["port"], None, adopted=True)
+                instance.check()
+                adopted.append(name)
+            # Adopted instances whose process went away are forgotten
+            for name, instance in list(self.instances.items()):
+                if name != "default" and name not in self.configured and instance.pid is None:
+                    self._drop(name)
+        return adopted
+
+    def start_monitor(self):
+        with self._lock:
+            self._monitoring = True
+            for instance in self.instances.values():
+                instance.start_monitor()
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="comfyui-pool", daemon=True)
+        self._thread.start()
+
+    def stop_monitor(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._lock:
+            self._monitoring = False
+            instances = list(self.instances.values())
+        for instance in instances:
+            instance.stop_monitor()
+
+    def _run(self):
+        while not self._stop_event.wait(DISCOVERY_INTERVAL):
+            try:
+                self.discover()
+            except Exception as e:
+                print(f"Error discovering ComfyUI instances: {str(e)}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Status and process tree resources of every instance, with pool totals"""
+        with self._lock:
+            instances = list(self.instances.items())
+            trackers = dict(self.trackers)
+
+        rows = []
+        totals = {"pending": 0, "processing": 0, "cpu_percent": 0.0, "rss": 0.0, "gpu_memory": 0.0}
+        counts: Dict[str, int] = {}
+        for name, instance in instances:
+            status = instance.get_status()
+            status.update(
+                configured=name == "default" or name in self.configured,
+                cpu_affinity=instance.cpu_affinity,
+                extra_args=instance.extra_args
+            )
+            tracker = trackers.get(name)
+            resources = tracker.sample()["totals"] if tracker is not None and instance.pid is not None else None
+            status["process"] = resources
+            rows.append(status)
+
+            counts[status["status"]] = counts.get(status["status"], 0) + 1
+            totals["pending"] += status["queue"].get("pending", 0)
+            totals["processing"] += status["queue"].get("processing", 0)
+            for key in ("cpu_percent", "rss", "gpu_memory"):
+                totals[key] += (resources or {}).get(key) or 0
+
+        return {
+            "instances": rows,
+            "count": len(rows),
+            "states": counts,
+            "totals": {key: round(value, 2) for key, value in totals.items()}
+        }
+
+def _port_free(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind(("127.0.0.1", port))
+        except OSError:
+            return False
+    return True
+
+# Shared pool around the shared supervisor, started by the app lifespan
+_comfyui_pool: Optional[ComfyUIPool] = None
+_comfyui_pool_lock = threading.Lock()
+
+def get_comfyui_pool() -> ComfyUIPool:
+    """Get the shared pool of ComfyUI instances"""
+    global _comfyui_pool
+    with _comfyui_pool_lock:
+        if _comfyui_pool is None:
+            _comfyui_pool = ComfyUIPool(get_comfyui_supervisor())
+    return _comfyui_pool
@@ -0,0 +1,122 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Optional
+
+import aiohttp
+
+# Seconds a probe result is reused before ComfyUI is asked again
+DEFAULT_TTL = 2.0
+
+# Seconds each API call of a probe may take
+PROBE_TIMEOUT = 1.0
+
+class StatusProbe:
+    """Collect ComfyUI's API status concurrently, coalescing callers.
+
+    /system_stats and /queue are fetched at the same time over one pooled
+    aiohttp session on a private event loop thread. Callers arriving while a
+    probe is in flight share it (single flight), and a result younger than
+    the TTL is returned without asking ComfyUI at all, so any number of
+    pollers cost at most one probe per TTL.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, Future] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self.probe_count = 0
+        self.coalesced_count = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="comfyui-probe", daemon=True).start()
+            self._loop = loop
+        return self._loop
+
+    def submit(self, base_url: str, max_age: Optional[float] = None) -> Future:
+        """Future of a probe result no older than max_age (the TTL by default)"""
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            cached = self._results.get(base_url)
+            if cached is not None and time.time() - cached["probed_at"] <= max_age:
+                future: Future = Future()
+                future.set_result(cached)
+                return future
+            future = self._inflight.get(base_url)
+            if future is not None:
+                self.coalesced_count += 1
+                return future
+            loop = self._ensure_loop()
+            future = asyncio.run_coroutine_threadsafe(self._probe(base_url), loop)
+            self._inflight[base_url] = future
+            self.probe_count += 1
+        future.add_done_callback(lambda done: self._finished(base_url, done))
+        return future
+
+    def _finished(self, base_url: str, future: Future):
+        with self._lock:
+            if self._inflight.get(base_url) is future:
+                del self._inflight[base_url]
+            if not future.cancelled() and future.exception() is None:
+                self._results[base_url] = future.result()
+
+    def get(self, base_url: str, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Probe result for a blocking caller"""
+        return self.submit(base_url, max_age).result(timeout=PROBE_TIMEOUT * 3)
+
+    async def get_async(self, base_url: str, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Probe result for a coroutine on another event loop"""
+        return await asyncio.wrap_future(self.submit(base_url, max_age))
+
+    async def _get_json(self, url: str) -> Optional[Any]:
+        try:
+            async with self._session.get(url) as response:
+                if response.status != 200:
+                    return None
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return None
+
+    async def _probe(self, base_url: str) -> Dict[str, Any]:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT))
+        started = time.monotonic()
+        stats, queue = await asyncio.gather(
+            self._get_json(f"{base_url}/system_stats"),
+            self._get_json(f"{base_url}/queue")
+        )
+
+        result: Dict[str, Any] = {"answered": stats is not None, "probed_at": time.time()}
+        if stats is not None:
+            cuda = stats.get("cuda", {}) if isinstance(stats, dict) else {}
+            result["resources"] = {
+                "gpu_usage": cuda.get("gpu_usage", 0),
+                "memory_usage": cuda.get("vram_used", 0)
+            }
+            version = (stats.get("system") or {}).get("comfyui_version") if isinstance(stats, dict) else None
+            if version:
+                result["version"] = version
+        if isinstance(queue, dict):
+            result["queue"] = {
+                "pending": len(queue.get("queue_pending", [])),
+                "processing": len(queue.get("queue_running", [])),
+                "completed": 0
+            }
+        result["duration"] = round(time.monotonic() - started, 3)
+        return result
+
+    def close(self):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result(timeout=2)
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop = None
+        self._session = None
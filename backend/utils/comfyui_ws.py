@@ -0,0 +1,264 @@
+import time
+import uuid
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+import aiohttp
+
+from utils.sequence_log import SequenceLog
+
+# First and longest pause between reconnection attempts (doubling in between)
+RECONNECT_DELAYS = (0.5, 10.0)
+
+# Finished prompts kept with their node timings
+PROMPT_HISTORY_SIZE = 50
+
+# Bridge events kept for clients to catch up on
+EVENT_LOG_SIZE = 1000
+
+async def _cancel_tasks():
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+class ComfyUIBridge:
+    """Keep one WebSocket connection to a ComfyUI instance and mirror its state.
+
+    ComfyUI pushes status, execution_start, executing, progress, executed
+    and error events on /ws. The bridge folds them into an in-memory state
+    (queue depth, the prompt being run, its node progress and per-node
+    timings, recently finished prompts) and re-publishes each of them in
+    a SequenceLog, so dashboards follow execution live. The connection
+    lives on a private event loop thread and reconnects with backoff until
+    disconnect() is called.
+
+    Only status (queue_remaining) is broadcast to every client. ComfyUI
+    sends execution and progress events to the client ID that queued the
+    prompt, so prompts queued from the ComfyUI web UI, or by other API
+    clients with their own client_id, show up here only as queue changes;
+    current, per-node progress and timings cover just the prompts the
+    bridge is told about. Queue counts therefore still come from /queue
+    (see ComfyUIManager.check), which the supervisor re-reads whenever
+    queue_version changes.
+    """
+
+    def __init__(self):
+        self.client_id = uuid.uuid4().hex
+        self.base_url: Optional[str] = None
+        self.connected = False
+        self.connected_since = 0.0
+        self.last_message = 0.0
+        self.reconnects = 0
+        self.events = SequenceLog(EVENT_LOG_SIZE)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Future] = None
+        self._reset_state()
+
+    def _reset_state(self):
+        self.queue_remaining: Optional[int] = None
+        # Bumped whenever queue_remaining changes, so the supervisor knows to re-read /queue
+        self.queue_version = 0
+        self.current: Optional[Dict[str, Any]] = None
+        self.history: deque = deque(maxlen=PROMPT_HISTORY_SIZE)
+        self.completed = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="comfyui-ws", daemon=True).start()
+            self._loop = loop
+        return self._loop
+
+    def connect(self, base_url: str):
+        """Follow the instance at base_url (http://host:port), replacing any previous one"""
+        with self._lock:
+            if base_url == self.base_url and self._task is not None and not self._task.done():
+                return
+            self._cancel()
+            self.base_url = base_url
+            self._reset_state()
+            self._task = asyncio.run_coroutine_threadsafe(self._run(base_url), self._ensure_loop())
+
+    def disconnect(self):
+        """Stop following the instance (it stopped or moved)"""
+        with self._lock:
+            self._cancel()
+            self.base_url = None
+            self._reset_state()
+
+    def _cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._set_connected(False)
+
+    def close(self):
+        self.disconnect()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            # Let the cancelled connection close its session before the loop stops
+            try:
+                asyncio.run_coroutine_threadsafe(_cancel_tasks(), loop).result(timeout=2)
+            except Exception:
+                pass
+            loop.call_soon_threadsafe(loop.stop)
+        self._loop = None
+
+    def is_connected(self, base_url: str) -> bool:
+        return self.connected and self.base_url == base_url
+
+    def _set_connected(self, connected: bool):
+        if connected == self.connected:
+            return
+        self.connected = connected
+        self.connected_since = time.time() if connected else 0.0
+        self._publish("connected" if connected else "disconnected", {"url": self.base_url})
+
+    def _publish(self, event_type: str, data: Dict[str, Any]):
+        self.events.append({"type": event_type, "data": data, "time": time.time()})
+
+    async def _run(self, base_url: str):
+        url = base_url.replace("http", "ws", 1) + f"/ws?clientId={self.client_id}"
+        delay = RECONNECT_DELAYS[0]
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(url, heartbeat=30, max_msg_size=0) as ws:
+                        self._set_connected(True)
+                        delay = RECONNECT_DELAYS[0]
+                        async for message in ws:
+                            # Binary frames are preview images, not state
+                            if message.type == aiohttp.WSMsgType.TEXT:
+                                try:
+                                    self._handle(message.json())
+                                except (ValueError, TypeError, AttributeError):
+                                    continue
+                            elif message.type == aiohttp.WSMsgType.ERROR:
+                                break
+                except asyncio.CancelledError:
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                    pass
+                self._set_connected(False)
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAYS[1])
+
+    def _handle(self, message: Dict[str, Any]):
+        """Fold one ComfyUI message into the state and re-publish it"""
+        kind = message.get("type")
+        data = message.get("data") or {}
+        now = time.time()
+        self.last_message = now
+
+        with self._lock:
+            current = self.current
+            prompt_id = data.get("prompt_id")
+
+            if kind == "status":
+                exec_info = (data.get("status") or {}).get("exec_info") or {}
+                remaining = exec_info.get("queue_remaining", self.queue_remaining)
+                if remaining != self.queue_remaining:
+                    self.queue_remaining = remaining
+                    self.queue_version += 1
+                published = {"queue_remaining": self.queue_remaining}
+
+            elif kind == "execution_start":
+                if current is not None:
+                    self._finish(current, "superseded", now)
+                self.current = {
+                    "prompt_id": prompt_id, "started": now, "node": None,
+                    "progress": None, "nodes": {}, "cached": []
+                }
+                published = {"prompt_id": prompt_id}
+
+            elif kind == "execution_cached":
+                if current is not None and current["prompt_id"] == prompt_id:
+                    current["cached"] = list(data.get("nodes") or [])
+                published = {"prompt_id": prompt_id, "nodes": data.get("nodes") or []}
+
+            elif kind == "executing":
+                node = data.get("node")
+                if current is not None and (prompt_id is None or current["prompt_id"] == prompt_id):
+                    self._end_node(current, now)
+                    if node is None:
+                        # ComfyUI signals the end of a prompt with an empty node
+                        self._finish(current, "success", now)
+                    else:
+                        current["node"] = node
+                        current["progress"] = None
+                        current["nodes"][node] = {"started": now, "duration": None}
+                published = {"prompt_id": prompt_id, "node": node}
+
+            elif kind == "progress":
+                progress = {"node": data.get("node"), "value": data.get("value", 0), "max": data.get("max", 0)}
+                if current is not None and (prompt_id is None or current["prompt_id"] == prompt_id):
+                    current["progress"] = progress
+                published = dict(progress, prompt_id=prompt_id)
+
+            elif kind == "executed":
+                node = data.get("node")
+                if current is not None and node in current["nodes"]:
+                    self._end_node(current, now, node)
+                # Outputs can be large; clients fetch them from ComfyUI's history
+                published = {"prompt_id": prompt_id, "node": node}
+
+            elif kind in ("execution_success", "execution_error", "execution_interrupted"):
+                if current is not None and current["prompt_id"] == prompt_id:
+                    self._end_node(current, now)
+                    outcome = {"execution_success": "success", "execution_error": "error"}.get(kind, "interrupted")
+                    self._finish(current, outcome, now, data.get("exception_message"))
+                published = {
+                    key: data[key] for key in ("prompt_id", "node_id", "node_type", "exception_message") if key in data
+                }
+
+            else:
+                return
+
+        self._publish(kind, published)
+
+    def _end_node(self, current: Dict[str, Any], now: float, node: Optional[str] = None):
+        node = node or current["node"]
+        timing = current["nodes"].get(node)
+        if timing is not None and timing["duration"] is None:
+            timing["duration"] = round(now - timing["started"], 3)
+
+    def _finish(self, current: Dict[str, Any], outcome: str, now: float, error: Optional[str] = None):
+        finished = {
+            "prompt_id": current["prompt_id"],
+            "status": outcome,
+            "started": current["started"],
+            "duration": round(now - current["started"], 3),
+            "nodes": current["nodes"],
+            "cached": current["cached"]
+        }
+        if error:
+            finished["error"] = error
+        self.history.append(finished)
+        if outcome == "success":
+            self.completed += 1
+        if self.current is current:
+            self.current = None
+
+    def get_state(self) -> Dict[str, Any]:
+        with self._lock:
+            current = None
+            if self.current is not None:
+                current = dict(self.current, nodes={node: dict(t) for node, t in self.current["nodes"].items()})
+                current["elapsed"] = round(time.time() - current["started"], 3)
+            return {
+                "url": self.base_url,
+                "connected": self.connected,
+                "connected_since": self.connected_since,
+                "last_message": self.last_message,
+                "reconnects": self.reconnects,
+                "queue_remaining": self.queue_remaining,
+                "completed": self.completed,
+                "current": current,
+                "recent": list(self.history)[::-1],
+                "last_event": self.events.last_seq
+            }
@@ -0,0 +1,266 @@
+import os
+import time
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+# Seconds a cached total is served before a background rescan is started
+DEFAULT_MAX_AGE = 30.0
+
+# Seconds a cached listing is trusted while its directory mtime stays the same;
+# catches files that grew or shrank in place, which doesn't touch the mtime
+DEFAULT_REVALIDATE_INTERVAL = 300.0
+
+# Threads used to size the top-level subdirectories of a tree in parallel
+DEFAULT_WORKERS = 4
+
+# Largest files remembered per directory; a subtree's top-N is exact up to this N
+LARGEST_PER_DIR = 10
+
+# Files counted as model weights in breakdowns (node packs often vendor these)
+WEIGHT_EXTENSIONS = (
+    ".safetensors", ".ckpt", ".pt", ".pth", ".bin", ".onnx", ".gguf", ".sft", ".pkl", ".npz", ".h5", ".tflite"
+)
+
+class _DirNode:
+    """Cached listing of one directory: its own files and its subdirectories"""
+
+    __slots__ = ("mtime", "listed", "file_size", "file_count", "subdirs", "weight_size", "largest")
+
+    def __init__(self, mtime: float, file_size: int, file_count: int, subdirs: List[str],
+                 weight_size: int = 0, largest: Optional[List[Tuple[int, str]]] = None):
+        self.mtime = mtime
+        self.listed = time.time()
+        self.file_size = file_size
+        self.file_count = file_count
+        self.subdirs = subdirs
+        self.weight_size = weight_size
+        self.largest = largest or []  # (size, name), biggest first
+
+class DirectorySizer:
+    """Incremental directory sizing.
+
+    Every directory is listed with os.scandir, so file sizes come from the
+    directory entry (one stat per file, none for the type check). The listing
+    is cached against the directory's mtime: an unchanged directory costs a
+    single stat on the next pass, and only directories whose entries changed
+    are listed again. Subtree totals are summed from the cached nodes.
+
+    Callers get the last known total straight away; a stale total triggers a
+    background rescan that sizes each top-level subdirectory in a thread pool.
+    Writing to an existing file does not change its directory's mtime, so
+    writers call invalidate() when they finish a file, and every listing is
+    redone anyway once it is older than the revalidate interval.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_MAX_AGE, workers: int = DEFAULT_WORKERS,
+                 revalidate: float = DEFAULT_REVALIDATE_INTERVAL, largest_per_dir: int = LARGEST_PER_DIR):
+        self.max_age = max_age
+        self.revalidate = revalidate
+        self.largest_per_dir = max(int(largest_per_dir), 1)
+        self._nodes: Dict[str, _DirNode] = {}
+        self._totals: Dict[str, Dict[str, Any]] = {}
+        self._scanning: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(int(workers), 1), thread_name_prefix="dir-size")
+
+    def _scan_dir(self, path: str) -> Optional[_DirNode]:
+        """Get the node for one directory, listing it only if its mtime changed or the listing is old"""
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+
+        node = self._nodes.get(path)
+        if node is not None and node.mtime == mtime and time.time() - node.listed < self.revalidate:
+            return node
+
+        file_size = 0
+        file_count = 0
+        weight_size = 0
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        # Don't descend into symlinked folders, as os.walk didn't
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file():
+                            size = entry.stat().st_size
+                            file_size += size
+                            file_count += 1
+                            files.append((size, entry.name))
+                            if entry.name.lower().endswith(WEIGHT_EXTENSIONS):
+                                weight_size += size
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+
+        # Forget cached subtrees that are gone
+        if node is not None:
+            for name in set(node.subdirs) - set(subdirs):
+                self._forget(os.path.join(path, name))
+
+        largest = heapq.nlargest(self.largest_per_dir, files)
+        node = _DirNode(mtime, file_size, file_count, subdirs, weight_size, largest)
+        with self._lock:
+            self._nodes[path] = node
+        return node
+
+    def _forget(self, path: str):
+        prefix = path + os.sep
+        with self._lock:
+            for key in [key for key in list(self._nodes) if key == path or key.startswith(prefix)]:
+                del self._nodes[key]
+
+    def invalidate(self, path: str):
+        """Drop what is cached about a file or folder that was written in place.
+
+        The containing directory and, for a folder, everything under it are
+        listed again on the next pass, and the totals of trees holding the
+        path are treated as stale.
+        """
+        path = os.path.abspath(path)
+        self._forget(path)
+        self._forget_node(os.path.dirname(path))
+        with self._lock:
+            for root, total in self._totals.items():
+                if path == root or path.startswith(root + os.sep) or root.startswith(path + os.sep):
+                    self._totals[root] = dict(total, invalidated=True)
+
+    def _forget_node(self, path: str):
+        with self._lock:
+            self._nodes.pop(path, None)
+
+    def _size_tree(self, path: str) -> Tuple[int, int]:
+        """Total size and file count of a tree, revisiting only changed directories"""
+        total_size = 0
+        total_files = 0
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            node = self._scan_dir(current)
+            if node is None:
+                continue
+            total_size += node.file_size
+            total_files += node.file_count
+            stack.extend(os.path.join(current, name) for name in node.subdirs)
+        return total_size, total_files
+
+    def summarize(self, path: str, top_files: int = 0) -> Dict[str, Any]:
+        """Size, file count, weight bytes and largest files of a tree from the node cache.
+
+        Only directories whose mtime changed since they were last seen are
+        listed again, so repeating this over a large library costs about one
+        stat per directory. Largest files are (size, path relative to the tree);
+        each directory only remembers its largest_per_dir biggest files, so the
+        list is exact for top_files up to that.
+        """
+        path = os.path.abspath(path)
+        size = files = weights = 0
+        largest: List[Tuple[int, str]] = []
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            node = self._scan_dir(current)
+            if node is None:
+                continue
+            size += node.file_size
+            files += node.file_count
+            weights += node.weight_size
+            if top_files:
+                relative = os.path.relpath(current, path)
+                for file_size, name in node.largest[:top_files]:
+                    entry = (file_size, name if relative == "." else os.path.join(relative, name))
+                    if len(largest) < top_files:
+                        heapq.heappush(largest, entry)
+                    elif entry > largest[0]:
+                        heapq.heapreplace(largest, entry)
+            stack.extend(os.path.join(current, name) for name in node.subdirs)
+        return {"size": size, "files": files, "weights": weights, "largest": sorted(largest, reverse=True)}
+
+    def list_dir(self, path: str) -> Optional[Dict[str, Any]]:
+        """Cached listing of one directory: own file totals, largest files and subdirectory names"""
+        node = self._scan_dir(os.path.abspath(path))
+        if node is None:
+            return None
+        return {
+            "size": node.file_size,
+            "files": node.file_count,
+            "weights": node.weight_size,
+            "largest": list(node.largest),
+            "subdirs": sorted(node.subdirs)
+        }
+
+    def scan(self, path: str) -> Dict[str, Any]:
+        """Size a tree now, with each top-level subdirectory on a pool thread"""
+        path = os.path.abspath(path)
+        started = time.time()
+        root = self._scan_dir(path)
+        if root is None:
+            result = {"size": 0, "files": 0, "updated": started}
+        else:
+            futures = [self._pool.submit(self._size_tree, os.path.join(path, name)) for name in root.subdirs]
+            size, files = root.file_size, root.file_count
+            for future in futures:
+                sub_size, sub_files = future.result()
+                size += sub_size
+                files += sub_files
+            result = {"size": size, "files": files, "updated": started}
+
+        result["duration"] = round(time.time() - started, 3)
+        with self._lock:
+            self._totals[path] = result
+        return result
+
+    def _scan_in_background(self, path: str):
+        with self._lock:
+            thread = self._scanning.get(path)
+            if thread and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._run_scan, args=(path,), name="dir-size-scan", daemon=True)
+            self._scanning[path] = thread
+        thread.start()
+
+    def _run_scan(self, path: str):
+        try:
+            self.scan(path)
+        except Exception as e:
+            print(f"Error sizing {path}: {str(e)}")
+
+    def get_size(self, path: str, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Get the last known size of a tree without waiting.
+
+        Returns size (bytes), files, updated (time of the scan behind the
+        numbers, 0 if none yet), stale and scanning. A background rescan is
+        started when the numbers are older than max_age.
+        """
+        path = os.path.abspath(path)
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            total = self._totals.get(path)
+        stale = total is None or total.get("invalidated", False) or time.time() - total["updated"] > max_age
+        if stale:
+            self._scan_in_background(path)
+
+        with self._lock:
+            thread = self._scanning.get(path)
+        result = {key: value for key, value in total.items() if key != "invalidated"} if total else {"size": 0, "files": 0, "updated": 0, "duration": None}
+        result.update({"stale": stale, "scanning": bool(thread and thread.is_alive())})
+        return result
+
+# Shared sizer for the storage endpoint
+_directory_sizer: Optional[DirectorySizer] = None
+_directory_sizer_lock = threading.Lock()
+
+def get_directory_sizer() -> DirectorySizer:
+    """Get the shared directory sizer"""
+    global _directory_sizer
+    with _directory_sizer_lock:
+        if _directory_sizer is None:
+            _directory_sizer = DirectorySizer()
+    return _directory_sizer
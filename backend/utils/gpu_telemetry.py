@@ -0,0 +1,405 @@
+import os
+import math
+import time
+import shutil
+import subprocess
+import threading
+from typing import Dict, Any, List, Optional
+
+# Fields queried from nvidia-smi, in output order
+SMI_FIELDS = (
+    "index", "uuid", "name", "driver_version", "utilization.gpu", "utilization.memory",
+    "memory.used", "memory.total", "temperature.gpu", "power.draw", "power.limit",
+    "clocks.gr", "clocks.sm", "clocks.mem", "fan.speed", "clocks_throttle_reasons.active"
+)
+
+# Clock throttle reason bits (nvmlClocksThrottleReason*)
+THROTTLE_SW_POWER_CAP = 0x4
+THROTTLE_HW_SLOWDOWN = 0x8
+THROTTLE_SW_THERMAL = 0x20
+THROTTLE_HW_THERMAL = 0x40
+THROTTLE_HW_POWER_BRAKE = 0x80
+
+# Give up on a hung nvidia-smi rather than stalling the sampler
+SMI_TIMEOUT = 5
+
+def _empty_gpu(index: int) -> Dict[str, Any]:
+    """GPU record with every field present, as returned by all providers"""
+    return {
+        "index": index,
+        "id": str(index),
+        "uuid": None,
+        "name": "Unknown",
+        "driver": "Unknown",
+        "usage": 0,
+        "memory_usage": 0,
+        "temperature": 0,
+        "fan": None,
+        "memory": {"used": 0, "total": 0},  # MiB
+        "power": {"draw": None, "limit": None},  # W
+        "clocks": {"graphics": None, "sm": None, "memory": None},  # MHz
+        "throttle": {"reasons": None, "thermal": False, "power": False}
+    }
+
+def _throttle(reasons: Optional[int]) -> Dict[str, Any]:
+    """Decode a throttle reason bitmask into the flags alerts care about"""
+    if reasons is None:
+        return {"reasons": None, "thermal": False, "power": False}
+    return {
+        "reasons": reasons,
+        "thermal": bool(reasons & (THROTTLE_SW_THERMAL | THROTTLE_HW_THERMAL | THROTTLE_HW_SLOWDOWN)),
+        "power": bool(reasons & (THROTTLE_SW_POWER_CAP | THROTTLE_HW_POWER_BRAKE))
+    }
+
+class GpuProvider:
+    """Source of GPU telemetry.
+
+    `get_gpus` returns one record per GPU in the shape of `_empty_gpu`, so
+    callers never care which backend produced it.
+    """
+
+    name = "none"
+
+    def is_available(self) -> bool:
+        return False
+
+    def get_gpus(self) -> List[Dict[str, Any]]:
+        return []
+
+    def get_process_memory(self) -> Dict[int, float]:
+        """GPU memory (MiB) used by each process, summed over all GPUs"""
+        return {}
+
+    def close(self):
+        pass
+
+class NvmlProvider(GpuProvider):
+    """Read NVIDIA GPUs through a persistent NVML session.
+
+    NVML is initialised once and device handles, names and the driver version
+    are cached, so each sample is a handful of in-process library calls.
+    """
+
+    name = "nvml"
+
+    def __init__(self):
+        self._nvml = None
+        self._handles: List[Any] = []
+        self._static: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        with self._lock:
+            if self._nvml is None:
+                self._init()
+            return self._nvml is not None and bool(self._handles)
+
+    def _init(self):
+        try:
+            from py3nvml import py3nvml as nvml
+        except ImportError:
+            try:
+                import pynvml as nvml
+            except ImportError:
+                return
+
+        try:
+            nvml.nvmlInit()
+        except Exception:
+            return
+
+        try:
+            driver = _text(nvml.nvmlSystemGetDriverVersion())
+            handles = [nvml.nvmlDeviceGetHandleByIndex(i) for i in range(nvml.nvmlDeviceGetCount())]
+            static = []
+            for i, handle in enumerate(handles):
+                static.append({
+                    "index": i,
+                    "id": str(i),
+                    "uuid": _text(self._call(nvml.nvmlDeviceGetUUID, handle)),
+                    "name": _text(self._call(nvml.nvmlDeviceGetName, handle)) or f"GPU {i}",
+                    "driver": driver or "Unknown"
+                })
+        except Exception as e:
+            print(f"Error reading NVML devices: {str(e)}")
+            try:
+                nvml.nvmlShutdown()
+            except Exception:
+                pass
+            return
+
+        self._nvml = nvml
+        self._handles = handles
+        self._static = static
+
+    @staticmethod
+    def _call(func, *args):
+        """Call an NVML query, treating unsupported fields as missing"""
+        try:
+            return func(*args)
+        except Exception:
+            return None
+
+    def get_gpus(self) -> List[Dict[str, Any]]:
+        if not self.is_available():
+            return []
+
+        nvml = self._nvml
+        gpus = []
+        for handle, static in zip(self._handles, self._static):
+            gpu = _empty_gpu(static["index"])
+            gpu.update(static)
+
+            utilization = self._call(nvml.nvmlDeviceGetUtilizationRates, handle)
+            if utilization is not None:
+                gpu["usage"] = utilization.gpu
+                gpu["memory_usage"] = utilization.memory
+
+            memory = self._call(nvml.nvmlDeviceGetMemoryInfo, handle)
+            if memory is not None:
+                gpu["memory"] = {
+                    "used": round(memory.used / (1024 * 1024), 1),
+                    "total": round(memory.total / (1024 * 1024), 1)
+                }
+
+            temperature = self._call(nvml.nvmlDeviceGetTemperature, handle, nvml.NVML_TEMPERATURE_GPU)
+            if temperature is not None:
+                gpu["temperature"] = temperature
+
+            gpu["fan"] = self._call(nvml.nvmlDeviceGetFanSpeed, handle)
+
+            power = self._call(nvml.nvmlDeviceGetPowerUsage, handle)
+            limit = self._call(nvml.nvmlDeviceGetEnforcedPowerLimit, handle)
+            gpu["power"] = {
+                "draw": round(power / 1000.0, 1) if power is not None else None,
+                "limit": round(limit / 1000.0, 1) if limit is not None else None
+            }
+
+            gpu["clocks"] = {
+                "graphics": self._call(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_GRAPHICS),
+                "sm": self._call(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_SM),
+                "memory": self._call(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_MEM)
+            }
+            gpu["throttle"] = _throttle(self._call(nvml.nvmlDeviceGetCurrentClocksThrottleReasons, handle))
+            gpus.append(gpu)
+        return gpus
+
+    def get_process_memory(self) -> Dict[int, float]:
+        if not self.is_available():
+            return {}
+
+        nvml = self._nvml
+        usage: Dict[int, float] = {}
+        for handle in self._handles:
+            for query in (nvml.nvmlDeviceGetComputeRunningProcesses, nvml.nvmlDeviceGetGraphicsRunningProcesses):
+                for process in self._call(query, handle) or []:
+                    used = getattr(process, "usedGpuMemory", None)
+                    # Unavailable under some drivers/containers; NVML reports None or a sentinel
+                    if not isinstance(used, int) or used < 0 or used >= 2**63:
+                        used = 0
+                    usage[process.pid] = usage.get(process.pid, 0) + round(used / (1024 * 1024), 1)
+        return usage
+
+    def close(self):
+        with self._lock:
+            if self._nvml is not None:
+                try:
+                    self._nvml.nvmlShutdown()
+                except Exception:
+                    pass
+            self._nvml = None
+            self._handles = []
+            self._static = []
+
+class NvidiaSmiProvider(GpuProvider):
+    """Read NVIDIA GPUs with a single nvidia-smi call covering every GPU"""
+
+    name = "nvidia-smi"
+
+    def __init__(self):
+        self._available: Optional[bool] = None
+
+    def is_available(self) -> bool:
+        if self._available is None:
+            self._available = shutil.which("nvidia-smi") is not None
+        return self._available
+
+    def get_gpus(self) -> List[Dict[str, Any]]:
+        if not self.is_available():
+            return []
+
+        cmd = ["nvidia-smi", f"--query-gpu={','.join(SMI_FIELDS)}", "--format=csv,noheader,nounits"]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=SMI_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error running nvidia-smi: {str(e)}")
+            return []
+        if result.returncode != 0:
+            return []
+
+        gpus = []
+        for line in result.stdout.strip().splitlines():
+            values = dict(zip(SMI_FIELDS, [v.strip() for v in line.split(",")]))
+            if len(values) < len(SMI_FIELDS):
+                continue
+
+            index = int(_number(values["index"]) or 0)
+            gpu = _empty_gpu(index)
+            gpu.update({
+                "uuid": values["uuid"] or None,
+                "name": values["name"] or f"GPU {index}",
+                "driver": values["driver_version"] or "Unknown",
+                "usage": _number(values["utilization.gpu"]) or 0,
+                "memory_usage": _number(values["utilization.memory"]) or 0,
+                "temperature": _number(values["temperature.gpu"]) or 0,
+                "fan": _number(values["fan.speed"]),
+                "memory": {
+                    "used": _number(values["memory.used"]) or 0,
+                    "total": _number(values["memory.total"]) or 0
+                },
+                "power": {
+                    "draw": _number(values["power.draw"]),
+                    "limit": _number(values["power.limit"])
+                },
+                "clocks": {
+                    "graphics": _number(values["clocks.gr"]),
+                    "sm": _number(values["clocks.sm"]),
+                    "memory": _number(values["clocks.mem"])
+                },
+                "throttle": _throttle(_hex(values["clocks_throttle_reasons.active"]))
+            })
+            gpus.append(gpu)
+        return gpus
+
+    def get_process_memory(self) -> Dict[int, float]:
+        if not self.is_available():
+            return {}
+
+        cmd = ["nvidia-smi", "--query-compute-apps=pid,used_memory", "--format=csv,noheader,nounits"]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=SMI_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired):
+            return {}
+        if result.returncode != 0:
+            return {}
+
+        usage: Dict[int, float] = {}
+        for line in result.stdout.strip().splitlines():
+            parts = [v.strip() for v in line.split(",")]
+            if len(parts) >= 2 and parts[0].isdigit():
+                pid = int(parts[0])
+                usage[pid] = usage.get(pid, 0) + (_number(parts[1]) or 0)
+        return usage
+
+class FakeProvider(GpuProvider):
+    """Synthetic GPUs for development and tests on machines without one.
+
+    Values move along slow sine waves so charts and history have something
+    to show. Enable with gpuProvider "fake" or COMFYDASH_FAKE_GPUS=<count>.
+    """
+
+    name = "fake"
+
+    def __init__(self, count: int = 1, memory_total: float = 24576):
+        self.count = max(int(count), 1)
+        self.memory_total = memory_total
+
+    def is_available(self) -> bool:
+        return True
+
+    def get_gpus(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        gpus = []
+        for i in range(self.count):
+            load = (math.sin(now / 30 + i) + 1) / 2
+            gpu = _empty_gpu(i)
+            gpu.update({
+                "uuid": f"GPU-fake-{i:04d}",
+                "name": f"Fake GPU {i}",
+                "driver": "fake",
+                "usage": round(load * 100, 1),
+                "memory_usage": round(load * 60, 1),
+                "temperature": round(35 + load * 45, 1),
+                "fan": round(30 + load * 50),
+                "memory": {"used": round(self.memory_total * (0.1 + load * 0.7), 1), "total": self.memory_total},
+                "power": {"draw": round(30 + load * 320, 1), "limit": 350.0},
+                "clocks": {"graphics": round(210 + load * 1800), "sm": round(210 + load * 1800), "memory": 10501},
+                "throttle": _throttle(THROTTLE_SW_THERMAL if load > 0.95 else 0)
+            })
+            gpus.append(gpu)
+        return gpus
+
+def _text(value) -> Optional[str]:
+    """NVML returns bytes from some bindings and str from others"""
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+def _hex(value: str) -> Optional[int]:
+    """Parse an nvidia-smi bitmask such as 0x0000000000000040"""
+    try:
+        return int(value, 16)
+    except (TypeError, ValueError):
+        return None
+
+def _number(value: str) -> Optional[float]:
+    """Parse an nvidia-smi value; '[N/A]' and friends become None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def create_gpu_provider(preferred: str = "auto") -> GpuProvider:
+    """Pick a provider: NVML, then nvidia-smi, else an empty one.
+
+    `preferred` may force "nvml", "nvidia-smi", "fake" or "none".
+    """
+    fake_count = os.environ.get("COMFYDASH_FAKE_GPUS")
+    if preferred == "fake" or (preferred == "auto" and fake_count):
+        return FakeProvider(int(fake_count) if fake_count and fake_count.isdigit() else 1)
+    if preferred == "none":
+        return GpuProvider()
+
+    candidates = {"nvml": [NvmlProvider], "nvidia-smi": [NvidiaSmiProvider]}.get(
+        preferred, [NvmlProvider, NvidiaSmiProvider]
+    )
+    for provider_class in candidates:
+        provider = provider_class()
+        if provider.is_available():
+            return provider
+        provider.close()
+    return GpuProvider()
+
+# Shared provider, kept open for the life of the process
+_gpu_provider: Optional[GpuProvider] = None
+_gpu_provider_preference = "auto"
+_gpu_provider_lock = threading.Lock()
+
+def get_gpu_provider(preferred: Optional[str] = None) -> GpuProvider:
+    """Get the shared GPU provider, switching it when a different one is preferred"""
+    global _gpu_provider, _gpu_provider_preference
+    with _gpu_provider_lock:
+        if preferred and preferred != _gpu_provider_preference:
+            if _gpu_provider is not None:
+                _gpu_provider.close()
+            _gpu_provider = None
+            _gpu_provider_preference = preferred
+        if _gpu_provider is None:
+            _gpu_provider = create_gpu_provider(_gpu_provider_preference)
+    return _gpu_provider
+
+def reset_gpu_provider():
+    """Close the shared provider so the next call re-detects GPUs"""
+    global _gpu_provider
+    with _gpu_provider_lock:
+        if _gpu_provider is not None:
+            _gpu_provider.close()
+        _gpu_provider = None
+
+def get_all_gpu_stats() -> List[Dict[str, Any]]:
+    """Get utilization, memory, temperature, power and clocks of every GPU in one call"""
+    try:
+        return get_gpu_provider().get_gpus()
+    except Exception as e:
+        print(f"Error getting GPU stats: {str(e)}")
+        return []
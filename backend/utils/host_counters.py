@@ -0,0 +1,125 @@
+import os
+import time
+from typing import Dict, Any, Optional
+
+import psutil
+
+# Block devices that never matter for model loading
+IGNORED_DISK_PREFIXES = ("loop", "ram", "fd", "sr")
+
+# Loopback and virtual interfaces (containers, bridges); containers bring a
+# new veth with every start, each of which would become its own series
+IGNORED_NIC_PREFIXES = ("lo", "Loopback", "veth", "docker", "br-", "virbr", "cni", "flannel")
+
+class CounterRates:
+    """Turn psutil's cumulative counters into per-second rates.
+
+    Disk and network counters only ever grow, so each sample is compared to
+    the previous one; the first sample after start only sets the baseline.
+    Per-core CPU usage is measured since the previous sample the same way.
+    """
+
+    def __init__(self):
+        self._last_time: Optional[float] = None
+        self._last_disks: Dict[str, Any] = {}
+        self._last_nics: Dict[str, Any] = {}
+        self._whole_disks = self._list_whole_disks()
+
+    @staticmethod
+    def _list_whole_disks() -> Optional[set]:
+        """Whole disks on Linux, so partitions aren't counted twice"""
+        try:
+            return set(os.listdir("/sys/block"))
+        except OSError:
+            return None
+
+    def _keep_disk(self, name: str) -> bool:
+        if name.startswith(IGNORED_DISK_PREFIXES):
+            return False
+        return self._whole_disks is None or name in self._whole_disks
+
+    def sample(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        elapsed = now - self._last_time if self._last_time else 0
+
+        try:
+            disks = psutil.disk_io_counters(perdisk=True) or {}
+        except Exception:
+            disks = {}
+        try:
+            nics = psutil.net_io_counters(pernic=True) or {}
+        except Exception:
+            nics = {}
+
+        result = {
+            "cpu": self._sample_cpu(),
+            "disks": self._disk_rates(disks, elapsed),
+            "network": self._network_rates(nics, elapsed)
+        }
+
+        self._last_time = now
+        self._last_disks = disks
+        self._last_nics = nics
+        return result
+
+    def _sample_cpu(self) -> Dict[str, Any]:
+        cpu: Dict[str, Any] = {"per_core": psutil.cpu_percent(interval=None, percpu=True)}
+        try:
+            freq = psutil.cpu_freq()
+        except Exception:
+            freq = None
+        cpu["frequency"] = {
+            "current": round(freq.current, 1),
+            "min": round(freq.min, 1),
+            "max": round(freq.max, 1)
+        } if freq else None
+        return cpu
+
+    def _disk_rates(self, disks: Dict[str, Any], elapsed: float) -> Dict[str, Dict[str, float]]:
+        rates = {}
+        for name, counters in disks.items():
+            if not self._keep_disk(name):
+                continue
+            previous = self._last_disks.get(name)
+            if previous is None or elapsed <= 0:
+                rates[name] = {
+                    "read_bytes_per_sec": 0, "write_bytes_per_sec": 0,
+                    "read_iops": 0, "write_iops": 0, "busy_percent": None
+                }
+                continue
+
+            busy = None
+            if hasattr(counters, "busy_time"):
+                busy = round(min(_delta(counters.busy_time, previous.busy_time) / (elapsed * 1000) * 100, 100), 1)
+            rates[name] = {
+                "read_bytes_per_sec": round(_delta(counters.read_bytes, previous.read_bytes) / elapsed),
+                "write_bytes_per_sec": round(_delta(counters.write_bytes, previous.write_bytes) / elapsed),
+                "read_iops": round(_delta(counters.read_count, previous.read_count) / elapsed, 1),
+                "write_iops": round(_delta(counters.write_count, previous.write_count) / elapsed, 1),
+                "busy_percent": busy
+            }
+        return rates
+
+    def _network_rates(self, nics: Dict[str, Any], elapsed: float) -> Dict[str, Dict[str, float]]:
+        rates = {}
+        for name, counters in nics.items():
+            if name.startswith(IGNORED_NIC_PREFIXES):
+                continue
+            previous = self._last_nics.get(name)
+            if previous is None or elapsed <= 0:
+                rates[name] = {
+                    "rx_bytes_per_sec": 0, "tx_bytes_per_sec": 0,
+                    "rx_packets_per_sec": 0, "tx_packets_per_sec": 0
+                }
+                continue
+            rates[name] = {
+                "rx_bytes_per_sec": round(_delta(counters.bytes_recv, previous.bytes_recv) / elapsed),
+                "tx_bytes_per_sec": round(_delta(counters.bytes_sent, previous.bytes_sent) / elapsed),
+                "rx_packets_per_sec": round(_delta(counters.packets_recv, previous.packets_recv) / elapsed, 1),
+                "tx_packets_per_sec": round(_delta(counters.packets_sent, previous.packets_sent) / elapsed, 1)
+            }
+        return rates
+
+def _delta(current: int, previous: int) -> int:
+    """Counter difference; a counter that went backwards (reset, wrap) counts as 0"""
+    return current - previous if current >= previous else 0
@@ -0,0 +1,202 @@
+import os
+import glob
+import time
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional
+
+import psutil
+
+from utils.system_info import get_system_info, get_available_gpus, get_available_storage_locations
+from utils.gpu_telemetry import reset_gpu_provider
+from utils.sensors import get_sensor_registry
+
+MOUNTINFO_FILE = "/proc/self/mountinfo"
+
+# PCI class prefix of display controllers (VGA, 3D, other display)
+PCI_DISPLAY_CLASS = "0x03"
+
+class HostInventory:
+    """Cached facts about the host: system info, GPUs and storage locations.
+
+    Collecting these means platform calls, lspci/PowerShell/nvidia-smi and a
+    disk partition walk, yet they almost never change. The inventory is built
+    once and a watcher thread rebuilds a section only when its signature
+    changes: the mount table for storage, the PCI display devices and
+    /dev/nvidia* nodes for GPUs. Free/used space of the cached locations is
+    refreshed on a slower timer, and refresh() rebuilds on demand.
+    """
+
+    def __init__(self, check_interval: float = 5.0, usage_interval: float = 60.0):
+        self.check_interval = check_interval
+        self.usage_interval = usage_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._system_info: Dict[str, Any] = {}
+        self._gpus: List[Dict[str, Any]] = []
+        self._storage_locations: List[Dict[str, Any]] = []
+        self._signatures: Dict[str, Optional[str]] = {"mounts": None, "gpus": None}
+        self.updated: Dict[str, float] = {}
+        self._last_usage = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Build the inventory if needed and start watching for changes"""
+        if not self.updated:
+            self.refresh()
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="host-inventory", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop_event.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error checking host inventory: {str(e)}")
+
+    def check(self) -> List[str]:
+        """Rebuild the sections whose signature changed; returns their names"""
+        changed = []
+        if _mounts_signature() != self._signatures["mounts"]:
+            changed.append("storage")
+        if _gpus_signature() != self._signatures["gpus"]:
+            changed.append("gpus")
+
+        if changed:
+            self.refresh(changed)
+        elif time.time() - self._last_usage >= self.usage_interval:
+            self._refresh_usage()
+        return changed
+
+    def refresh(self, sections: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Rebuild some or all of "system", "gpus" and "storage" now"""
+        sections = sections or ["system", "gpus", "storage"]
+        with self._refresh_lock:
+            if "gpus" in sections:
+                # Re-open the GPU provider so NVML sees added or removed devices
+                if self._signatures["gpus"] is not None:
+                    reset_gpu_provider()
+                signature = _gpus_signature()
+                gpus = get_available_gpus()
+                with self._lock:
+                    self._gpus = gpus
+                    self._signatures["gpus"] = signature
+                    self.updated["gpus"] = time.time()
+                # GPU name and driver are part of the system info
+                if "system" not in sections:
+                    sections = list(sections) + ["system"]
+
+            if "system" in sections:
+                # Sensors come and go with the same hardware changes
+                if "system" in self.updated:
+                    get_sensor_registry().discover()
+                info = get_system_info()
+                with self._lock:
+                    self._system_info = info
+                    self.updated["system"] = time.time()
+
+            if "storage" in sections:
+                signature = _mounts_signature()
+                locations = get_available_storage_locations()
+                with self._lock:
+                    self._storage_locations = locations
+                    self._signatures["mounts"] = signature
+                    self.updated["storage"] = time.time()
+                self._last_usage = time.time()
+
+        return self.get_status()
+
+    def _refresh_usage(self):
+        """Update free/used space of the cached locations without re-walking partitions"""
+        with self._lock:
+            locations = [dict(location) for location in self._storage_locations]
+
+        for location in locations:
+            try:
+                usage = psutil.disk_usage(location["path"])
+            except OSError:
+                continue
+            location.update({
+                "total_gb": round(usage.total / (1024**3), 2),
+                "used_gb": round(usage.used / (1024**3), 2),
+                "free_gb": round(usage.free / (1024**3), 2),
+                "percent_used": usage.percent
+            })
+
+        with self._lock:
+            self._storage_locations = locations
+        self._last_usage = time.time()
+
+    def get_system_info(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._system_info)
+
+    def get_gpus(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._gpus)
+
+    def get_storage_locations(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._storage_locations)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "updated": dict(self.updated),
+                "watching": bool(self._thread and self._thread.is_alive()),
+                "checkInterval": self.check_interval
+            }
+
+def _mounts_signature() -> Optional[str]:
+    """Hash of the mount table; changes whenever something is mounted or unmounted"""
+    try:
+        with open(MOUNTINFO_FILE, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        pass
+
+    # No /proc (Windows, macOS): the partition list itself is the signature
+    try:
+        partitions = psutil.disk_partitions(all=False)
+        return hashlib.sha1(repr(sorted((p.device, p.mountpoint) for p in partitions)).encode()).hexdigest()
+    except Exception:
+        return None
+
+def _gpus_signature() -> Optional[str]:
+    """Identify the set of GPUs present from sysfs and /dev, without spawning anything"""
+    devices = []
+    for class_file in glob.glob("/sys/bus/pci/devices/*/class"):
+        try:
+            with open(class_file, "r") as f:
+                if f.read().strip().startswith(PCI_DISPLAY_CLASS):
+                    devices.append(os.path.basename(os.path.dirname(class_file)))
+        except OSError:
+            continue
+    devices.extend(os.path.basename(path) for path in glob.glob("/dev/nvidia[0-9]*"))
+
+    if not devices:
+        # Nothing to watch on this platform; only an explicit refresh rebuilds GPUs
+        return "static"
+    return hashlib.sha1(",".join(sorted(devices)).encode()).hexdigest()
+
+# Shared inventory, started by the app lifespan
+_host_inventory: Optional[HostInventory] = None
+_host_inventory_lock = threading.Lock()
+
+def get_host_inventory() -> HostInventory:
+    """Get the shared host inventory, building and watching it if needed"""
+    global _host_inventory
+    with _host_inventory_lock:
+        if _host_inventory is None:
+            _host_inventory = HostInventory()
+        _host_inventory.start()
+    return _host_inventory
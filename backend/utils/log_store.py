@@ -0,0 +1,357 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+# Where indexed ComfyUI output is kept
+STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "logs", "store")
+
+# A segment file is closed and indexed for good once it reaches this size
+SEGMENT_BYTES = 8 * 1024 * 1024
+
+# Lines per block, the unit the time, level and token indexes point at
+BLOCK_LINES = 256
+
+# Closed segment indexes kept loaded for searches
+INDEX_CACHE_SIZE = 8
+
+# Words that get indexed: 3-32 letters, digits or underscores
+TOKEN_RE = re.compile(r"[a-z0-9_]{3,32}")
+
+LEVELS = ("debug", "info", "warning", "error")
+LEVEL_BITS = {level: 1 << i for i, level in enumerate(LEVELS)}
+LEVEL_RE = re.compile(r"\b(DEBUG|INFO|WARNING|WARN|ERROR|CRITICAL|FATAL)\b")
+
+def detect_level(line: str) -> str:
+    """Severity of a line from its logging prefix; tracebacks count as errors"""
+    match = LEVEL_RE.search(line[:120])
+    if match:
+        word = match.group(1)
+        if word in ("ERROR", "CRITICAL", "FATAL"):
+            return "error"
+        if word in ("WARNING", "WARN"):
+            return "warning"
+        return word.lower()
+    if line.startswith(("Traceback", "Exception")) or "Error: " in line:
+        return "error"
+    return "info"
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+class _Segment:
+    """One segment file and its index.
+
+    The index lists, per block of BLOCK_LINES lines, the time of its first
+    line, its byte offset and a mask of the levels in it, plus a token ->
+    block ids map. A search reads only the blocks that can match.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path[:-len(".log")] + ".idx"
+        self.first_ts = 0.0
+        self.last_ts = 0.0
+        self.lines = 0
+        self.size = 0
+        self.blocks: List[Tuple[float, int]] = []
+        self.block_levels: List[int] = []
+        self.tokens: Optional[Dict[str, List[int]]] = {}
+
+    def add(self, ts: float, level: str, line: str, length: int):
+        if self.lines % BLOCK_LINES == 0:
+            self.blocks.append((ts, self.size))
+            self.block_levels.append(0)
+        if not self.lines:
+            self.first_ts = ts
+        block = len(self.blocks) - 1
+        self.block_levels[block] |= LEVEL_BITS[level]
+        for token in tokenize(line):
+            blocks = self.tokens.get(token)
+            if blocks is None:
+                self.tokens[token] = [block]
+            elif blocks[-1] != block:
+                blocks.append(block)
+        self.last_ts = ts
+        self.lines += 1
+        self.size += length
+
+    def save_index(self):
+        data = {
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "lines": self.lines,
+            "size": self.size,
+            "blocks": self.blocks,
+            "block_levels": self.block_levels,
+            "tokens": self.tokens
+        }
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+
+    def load_summary(self) -> bool:
+        """Read the saved index, keeping only its summary in memory"""
+        if not self._load():
+            return False
+        self.tokens = None
+        return True
+
+    def _load(self) -> bool:
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            # Lines appended after the index was saved make it stale
+            if data["size"] != os.path.getsize(self.path):
+                return False
+        except (OSError, ValueError, KeyError):
+            return False
+        self.first_ts = data["first_ts"]
+        self.last_ts = data["last_ts"]
+        self.lines = data["lines"]
+        self.size = data["size"]
+        self.blocks = [tuple(block) for block in data["blocks"]]
+        self.block_levels = data["block_levels"]
+        self.tokens = data["tokens"]
+        return True
+
+    def rebuild(self):
+        """Index a segment from its contents (the open segment after a restart)"""
+        self.__init__(self.path)
+        with open(self.path, "rb") as f:
+            for raw in f:
+                record = _decode(raw[:-1]) if raw.endswith(b"\n") else None
+                if record is None:
+                    # Torn last line from a crash; it gets overwritten
+                    break
+                self.add(record["time"], record["level"], record["line"], len(raw))
+
+def _encode(ts: float, stream: str, level: str, line: str) -> bytes:
+    return f"{ts:.3f}\t{stream}\t{level}\t{line}\n".encode("utf-8", errors="replace")
+
+def _decode(raw: bytes) -> Optional[Dict[str, Any]]:
+    """Parse one record (without its newline)"""
+    parts = raw.decode("utf-8", errors="replace").split("\t", 3)
+    if len(parts) != 4:
+        return None
+    try:
+        ts = float(parts[0])
+    except ValueError:
+        return None
+    return {"time": ts, "stream": parts[1], "level": parts[2], "line": parts[3]}
+
+class LogStore:
+    """Indexed, size-capped archive of captured ComfyUI output.
+
+    Lines are appended to segment files as "time, stream, level, text"
+    records. Each segment carries a block index (first timestamp, offset
+    and level mask per BLOCK_LINES lines) and a token index from words to
+    blocks, saved next to it when the segment closes. A search intersects
+    the token lists of the query words, drops blocks outside the time range
+    or without the wanted levels, and reads only what is left. The oldest
+    segments are deleted once the store exceeds max_bytes.
+    """
+
+    def __init__(self, root: str = STORE_DIR, max_bytes: int = 256 * 1024 * 1024,
+                 segment_bytes: int = SEGMENT_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        self._active: Optional[_Segment] = None
+        self._file = None
+        self._index_cache: "OrderedDict[str, Dict[str, List[int]]]" = OrderedDict()
+        self._counter = 0
+        os.makedirs(root, exist_ok=True)
+        self._open()
+
+    def _open(self):
+        paths = sorted(
+            os.path.join(self.root, name) for name in os.listdir(self.root)
+            if name.startswith("seg-") and name.endswith(".log")
+        )
+        for path in paths:
+            segment = _Segment(path)
+            if not segment.load_summary():
+                # No usable index: the segment was open when the backend stopped.
+                # Reindex it and drop a torn last line
+                segment.rebuild()
+                with open(path, "r+b") as f:
+                    f.truncate(segment.size)
+                segment.save_index()
+                segment.tokens = None
+            self._segments.append(segment)
+
+        last = self._segments[-1] if self._segments else None
+        if last is not None and last.size < self.segment_bytes and last._load():
+            # Keep appending to the last segment
+            self._active = last
+            self._file = open(last.path, "ab")
+        else:
+            self._start_segment()
+
+    def _start_segment(self):
+        self._counter += 1
+        name = f"seg-{int(time.time() * 1000):015d}-{self._counter:04d}.log"
+        segment = _Segment(os.path.join(self.root, name))
+        self._file = open(segment.path, "ab")
+        self._active = segment
+        self._segments.append(segment)
+
+    def append(self, ts: float, stream: str, line: str):
+        level = detect_level(line)
+        data = _encode(ts, stream, level, line)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(data)
+            self._active.add(ts, level, line, len(data))
+            if self._active.size >= self.segment_bytes:
+                self._close_active()
+                self._start_segment()
+                self._enforce_retention()
+
+    def _close_active(self):
+        self._file.close()
+        self._file = None
+        self._active.save_index()
+        self._index_cache[self._active.path] = self._active.tokens
+        self._active.tokens = None
+        while len(self._index_cache) > INDEX_CACHE_SIZE:
+            self._index_cache.popitem(last=False)
+
+    def _enforce_retention(self):
+        total = sum(segment.size for segment in self._segments)
+        while total > self.max_bytes and len(self._segments) > 1:
+            oldest = self._segments.pop(0)
+            total -= oldest.size
+            self._index_cache.pop(oldest.path, None)
+            for path in (oldest.path, oldest.index_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._file.close()
+                self._file = None
+                self._active.save_index()
+
+    def _tokens(self, segment: _Segment) -> Optional[Dict[str, List[int]]]:
+        if segment.tokens is not None:
+            return segment.tokens
+        tokens = self._index_cache.get(segment.path)
+        if tokens is None:
+            loaded = _Segment(segment.path)
+            if not loaded._load():
+                return None
+            tokens = loaded.tokens
+            self._index_cache[segment.path] = tokens
+            while len(self._index_cache) > INDEX_CACHE_SIZE:
+                self._index_cache.popitem(last=False)
+        self._index_cache.move_to_end(segment.path)
+        return tokens
+
+    def _candidate_blocks(self, segment: _Segment, words: List[str], start: Optional[float],
+                          end: Optional[float], level_mask: int) -> List[Tuple[int, int]]:
+        """(offset, end offset) of the blocks in a segment that can hold a match"""
+        blocks = range(len(segment.blocks))
+        if words:
+            tokens = self._tokens(segment) or {}
+            matching = None
+            for word in words:
+                hits = set(tokens.get(word, ()))
+                matching = hits if matching is None else matching & hits
+                if not matching:
+                    return []
+            blocks = sorted(matching)
+
+        ranges = []
+        for block in blocks:
+            block_start = segment.blocks[block][0]
+            has_next = block + 1 < len(segment.blocks)
+            if end is not None and block_start > end:
+                break
+            if start is not None and has_next and segment.blocks[block + 1][0] < start:
+                continue
+            if level_mask and not segment.block_levels[block] & level_mask:
+                continue
+            ranges.append((segment.blocks[block][1], segment.blocks[block + 1][1] if has_next else segment.size))
+        return ranges
+
+    def search(self, query: str = "", start: Optional[float] = None, end: Optional[float] = None,
+               level: Optional[str] = None, limit: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Matching lines, oldest first.
+
+        Every word of query must appear in the line (as a whole word, case
+        insensitive); level keeps lines of that severity or worse; start and
+        end are Unix timestamps.
+        """
+        words = tokenize(query)
+        # Query text the index can't narrow down (short words, punctuation) is still matched
+        needle = query.lower().strip()
+        level_mask = 0
+        if level:
+            minimum = LEVELS.index(level)
+            level_mask = sum(LEVEL_BITS[name] for name in LEVELS[minimum:])
+
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            segments = [
+                segment for segment in self._segments
+                if segment.lines and (start is None or segment.last_ts >= start) and (end is None or segment.first_ts <= end)
+            ]
+            plans = [(segment.path, self._candidate_blocks(segment, words, start, end, level_mask)) for segment in segments]
+
+        found = 0
+        for path, ranges in plans:
+            if not ranges:
+                continue
+            try:
+                f = open(path, "rb")
+            except OSError:
+                # Removed by retention since the plan was made
+                continue
+            with f:
+                for offset, stop in ranges:
+                    f.seek(offset)
+                    # Only \n ends a record; progress bars leave \r inside lines
+                    for raw in f.read(stop - offset).split(b"\n")[:-1]:
+                        record = _decode(raw)
+                        if record is None:
+                            continue
+                        if start is not None and record["time"] < start:
+                            continue
+                        if end is not None and record["time"] > end:
+                            return
+                        if level_mask and not LEVEL_BITS.get(record["level"], 0) & level_mask:
+                            continue
+                        text = record["line"].lower()
+                        if words and not set(words) <= set(tokenize(text)):
+                            continue
+                        if needle and needle not in text and not words:
+                            continue
+                        yield record
+                        found += 1
+                        if found >= limit:
+                            return
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "bytes": sum(segment.size for segment in self._segments),
+                "lines": sum(segment.lines for segment in self._segments),
+                "first": self._segments[0].first_ts if self._segments else None,
+                "last": self._active.last_ts if self._active else None,
+                "max_bytes": self.max_bytes
+            }
@@ -0,0 +1,140 @@
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+# Bytes read per step when scanning backwards from the end of a file
+BLOCK_SIZE = 64 * 1024
+
+# Most bytes returned by one incremental read; a bigger backlog is skipped to its tail
+MAX_READ_BYTES = 4 * 1024 * 1024
+
+def read_last_lines(f, count: int, end: Optional[int] = None, start: int = 0) -> List[str]:
+    """The last count lines before end in a binary file, reading backwards in blocks.
+
+    Only the blocks holding those lines are read, however large the file is.
+    Reading never goes before start.
+    """
+    if count <= 0:
+        return []
+    if end is None:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+
+    position = end
+    data = b""
+    # One newline more than wanted marks where the first wanted line begins
+    while position > start and data.count(b"\n") <= count:
+        step = min(BLOCK_SIZE, position - start)
+        position -= step
+        f.seek(position)
+        data = f.read(step) + data
+
+    lines = data.split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+    return [_decode(line) for line in lines[-count:]]
+
+def _decode(line: bytes) -> str:
+    return line.rstrip(b"\r").decode("utf-8", errors="replace")
+
+def _identity(stat: os.stat_result) -> str:
+    return f"{stat.st_dev}-{stat.st_ino}"
+
+def cursor_at(path: str, offset: int = 0) -> Optional[str]:
+    """A cursor for tail_file that reads path from offset, or None if it can't be stat'ed"""
+    try:
+        return f"{_identity(os.stat(path))}:{offset}"
+    except OSError:
+        return None
+
+def parse_cursor(cursor: Optional[str]) -> Tuple[Optional[str], int]:
+    """Split a cursor returned by tail_file into (file identity, offset)"""
+    if not cursor or ":" not in cursor:
+        return None, 0
+    identity, _, offset = cursor.rpartition(":")
+    try:
+        return identity, int(offset)
+    except ValueError:
+        return None, 0
+
+def tail_file(path: str, max_lines: int = 100, cursor: Optional[str] = None,
+              siblings: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Read a log file from the end, or only what was added since cursor.
+
+    Without a cursor (or with one that no longer applies) the last max_lines
+    lines are returned. With a cursor only lines written after it are read.
+    If the file was truncated, reading starts over from its tail. If it was
+    rotated, the rest of the old file is read first, when it is among
+    siblings, then the new file. The returned cursor records the file
+    identity (device and inode) and the offset reached. Only whole lines are
+    returned; a partial last line is picked up by the next read.
+    """
+    result: Dict[str, Any] = {"lines": [], "cursor": cursor, "reset": False, "rotated": False}
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        result["error"] = str(e)
+        return result
+
+    identity, offset = parse_cursor(cursor)
+    lines: List[str] = []
+
+    if identity is not None and identity != _identity(stat):
+        # Rotated: finish the old file if it is still around under another name
+        result["rotated"] = True
+        for sibling in siblings or []:
+            try:
+                if _identity(os.stat(sibling)) == identity:
+                    lines.extend(_read_from(sibling, offset, max_lines)[0])
+                    break
+            except OSError:
+                continue
+        identity, offset = _identity(stat), 0
+
+    try:
+        with open(path, "rb") as f:
+            if identity is None or offset > stat.st_size:
+                # First read, or the file was truncated: start from its tail
+                result["reset"] = identity is not None
+                f.seek(0, os.SEEK_END)
+                end = _last_newline(f, f.tell())
+                lines = read_last_lines(f, max_lines, end)
+            else:
+                new_lines, end = _read_range(f, offset, stat.st_size, max_lines)
+                lines.extend(new_lines)
+    except OSError as e:
+        result["error"] = str(e)
+        return result
+
+    result["lines"] = lines[-max_lines:] if max_lines > 0 else lines
+    result["cursor"] = f"{_identity(stat)}:{end}"
+    return result
+
+def _read_from(path: str, offset: int, max_lines: int) -> Tuple[List[str], int]:
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        return _read_range(f, offset, f.tell(), max_lines)
+
+def _read_range(f, offset: int, size: int, max_lines: int) -> Tuple[List[str], int]:
+    """Complete lines between offset and size; returns them and the offset after the last one"""
+    end = _last_newline(f, size, offset)
+    if end <= offset:
+        return [], offset
+    if end - offset > MAX_READ_BYTES:
+        # Too far behind: only the tail of the new data is worth sending
+        return read_last_lines(f, max_lines, end, offset), end
+    f.seek(offset)
+    data = f.read(end - offset)
+    return [_decode(line) for line in data.split(b"\n")[:-1]], end
+
+def _last_newline(f, size: int, floor: int = 0) -> int:
+    """Offset just after the last newline before size, or floor if there is none"""
+    position = size
+    while position > floor:
+        step = min(BLOCK_SIZE, position - floor)
+        f.seek(position - step)
+        block = f.read(step)
+        index = block.rfind(b"\n")
+        if index >= 0:
+            return position - step + index + 1
+        position -= step
+    return floor
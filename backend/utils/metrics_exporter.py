@@ -0,0 +1,204 @@
+import time
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.metrics_sampler import get_metrics_sampler
+from utils.comfyui_manager import get_comfyui_supervisor
+from utils.model_manager import active_downloads, download_counters
+from utils.custom_nodes_manager import active_installations
+from utils.model_transfer import active_transfers
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+GIB = 1024**3
+MIB = 1024**2
+
+class LatencyHistogram:
+    """Cumulative request latency histogram per (method, route, status)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, str, str], List[float]] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, str(status))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self, out: "_Writer", name: str, help_text: str):
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+
+        out.header(name, "histogram", help_text)
+        for (method, route, status), series in sorted(items):
+            labels = {"method": method, "route": route, "status": status}
+            for bound, count in zip(self.buckets, series):
+                out.sample(f"{name}_bucket", _with_labels(labels, le=_format_value(bound)), count)
+            out.sample(f"{name}_bucket", _with_labels(labels, le="+Inf"), series[-1])
+            out.sample(f"{name}_sum", labels, series[-2])
+            out.sample(f"{name}_count", labels, series[-1])
+
+# Shared histogram fed by the API middleware
+request_latency = LatencyHistogram()
+
+class _Writer:
+    """Accumulate lines of the text exposition format"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def header(self, name: str, metric_type: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {metric_type}")
+
+    def sample(self, name: str, labels: Optional[Dict[str, Any]], value: Any):
+        if value is None or not isinstance(value, (int, float)):
+            return
+        if labels:
+            rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+            self.lines.append(f"{name}{{{rendered}}} {_format_value(value)}")
+        else:
+            self.lines.append(f"{name} {_format_value(value)}")
+
+    def gauge(self, name: str, help_text: str, value: Any, labels: Optional[Dict[str, Any]] = None):
+        self.header(name, "gauge", help_text)
+        self.sample(name, labels, value)
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+def _with_labels(labels: Dict[str, Any], **extra) -> Dict[str, Any]:
+    return {**labels, **extra}
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _count_by_status(jobs: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for job in list(jobs.values()):
+        status = job.get("status", "unknown")
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+def _render_host(out: _Writer, snapshot: Dict[str, Any]):
+    cpu = snapshot.get("cpu", {})
+    ram = snapshot.get("ram", {})
+    out.gauge("comfydash_cpu_usage_percent", "Host CPU utilization.", cpu.get("usage"))
+    out.gauge("comfydash_cpu_cores", "Logical CPU cores.", cpu.get("cores"))
+    out.gauge("comfydash_cpu_temperature_celsius", "CPU temperature.", cpu.get("temperature"))
+    out.gauge("comfydash_memory_used_bytes", "Host RAM in use.",
+              ram.get("used", 0) * GIB if ram.get("used") is not None else None)
+    out.gauge("comfydash_memory_total_bytes", "Host RAM installed.",
+              ram.get("total", 0) * GIB if ram.get("total") is not None else None)
+    out.gauge("comfydash_memory_usage_percent", "Host RAM utilization.", ram.get("percent"))
+
+def _render_gpus(out: _Writer, gpus: List[Dict[str, Any]]):
+    metrics = (
+        ("comfydash_gpu_utilization_percent", "GPU utilization.", lambda g: g.get("usage")),
+        ("comfydash_gpu_memory_used_bytes", "GPU memory in use.",
+         lambda g: g.get("memory", {}).get("used", 0) * MIB),
+        ("comfydash_gpu_memory_total_bytes", "GPU memory installed.",
+         lambda g: g.get("memory", {}).get("total", 0) * MIB),
+        ("comfydash_gpu_temperature_celsius", "GPU temperature.", lambda g: g.get("temperature")),
+        ("comfydash_gpu_fan_percent", "GPU fan speed.", lambda g: g.get("fan")),
+        ("comfydash_gpu_power_watts", "GPU power draw.", lambda g: (g.get("power") or {}).get("draw")),
+        ("comfydash_gpu_power_limit_watts", "GPU power limit.", lambda g: (g.get("power") or {}).get("limit")),
+    )
+    for name, help_text, read in metrics:
+        out.header(name, "gauge", help_text)
+        for gpu in gpus:
+            out.sample(name, _gpu_labels(gpu), read(gpu))
+
+    out.header("comfydash_gpu_clock_mhz", "gauge", "GPU clock speeds.")
+    for gpu in gpus:
+        for clock, value in (gpu.get("clocks") or {}).items():
+            out.sample("comfydash_gpu_clock_mhz", _with_labels(_gpu_labels(gpu), clock=clock), value)
+
+def _gpu_labels(gpu: Dict[str, Any]) -> Dict[str, Any]:
+    return {"gpu": gpu.get("id", "0"), "name": gpu.get("name", "Unknown")}
+
+def _render_comfyui(out: _Writer, snapshot: Dict[str, Any]):
+    process = snapshot.get("comfyui") or {}
+    totals = process.get("totals") or {}
+    out.gauge("comfydash_comfyui_up", "Whether the ComfyUI process is running.", 1 if process.get("running") else 0)
+    out.gauge("comfydash_comfyui_processes", "Processes in the ComfyUI process tree.", process.get("process_count", 0))
+    out.gauge("comfydash_comfyui_cpu_percent", "CPU used by the ComfyUI process tree.", totals.get("cpu_percent"))
+    out.gauge("comfydash_comfyui_memory_rss_bytes", "Resident memory of the ComfyUI process tree.",
+              totals["rss"] * MIB if totals.get("rss") is not None else None)
+    out.gauge("comfydash_comfyui_memory_uss_bytes", "Unique memory of the ComfyUI process tree.",
+              totals["uss"] * MIB if totals.get("uss") is not None else None)
+    out.gauge("comfydash_comfyui_gpu_memory_bytes", "GPU memory used by the ComfyUI process tree.",
+              totals["gpu_memory"] * MIB if totals.get("gpu_memory") is not None else None)
+    out.gauge("comfydash_comfyui_threads", "Threads in the ComfyUI process tree.", totals.get("threads"))
+    out.gauge("comfydash_comfyui_open_files", "Files open in the ComfyUI process tree.", totals.get("open_files"))
+
+    # Queue figures come from the supervisor's last probe; nothing is probed here
+    status = get_comfyui_supervisor().get_status()
+    if status.get("probed_at"):
+        queue = status.get("queue", {})
+        out.gauge("comfydash_comfyui_queue_pending", "Prompts waiting in the ComfyUI queue.", queue.get("pending"))
+        out.gauge("comfydash_comfyui_queue_running", "Prompts being executed by ComfyUI.", queue.get("processing"))
+        out.gauge("comfydash_comfyui_status_age_seconds", "Seconds since the ComfyUI status was last checked.",
+                  round(time.time() - status["probed_at"], 3))
+
+def _render_alerts(out: _Writer, snapshot: Dict[str, Any]):
+    out.header("comfydash_alert_active", "gauge", "Alerts pending or firing (1 while firing, 0 while pending).")
+    for alert in (snapshot.get("alerts") or {}).get("active", []):
+        out.sample("comfydash_alert_active", {
+            "rule": alert["rule"], "metric": alert["metric"], "severity": alert.get("severity", "")
+        }, 1 if alert["state"] == "firing" else 0)
+
+def _render_jobs(out: _Writer):
+    out.header("comfydash_downloads", "gauge", "Model downloads by status.")
+    for status, count in sorted(_count_by_status(active_downloads).items()):
+        out.sample("comfydash_downloads", {"status": status}, count)
+    out.gauge("comfydash_download_speed_bytes", "Combined speed of running downloads.",
+              sum(job.get("speed_bytes", 0) for job in list(active_downloads.values())
+                  if job.get("status") == "downloading"))
+    out.header("comfydash_download_bytes_total", "counter", "Bytes received by model and ComfyUI downloads.")
+    out.sample("comfydash_download_bytes_total", None, download_counters["bytes"])
+
+    out.header("comfydash_transfers", "gauge", "Model move/copy jobs by status.")
+    for status, count in sorted(_count_by_status(active_transfers).items()):
+        out.sample("comfydash_transfers", {"status": status}, count)
+
+    out.header("comfydash_custom_node_installs", "gauge", "Custom node installations by status.")
+    for status, count in sorted(_count_by_status(active_installations).items()):
+        out.sample("comfydash_custom_node_installs", {"status": status}, count)
+
+def render_metrics() -> str:
+    """Render every metric from cached state; never samples or probes anything"""
+    out = _Writer()
+    sampler = get_metrics_sampler()
+    snapshot = sampler.get_snapshot() or {}
+
+    out.gauge("comfydash_sample_timestamp_seconds", "Time of the latest system sample.", snapshot.get("timestamp", 0))
+    out.gauge("comfydash_sample_duration_seconds", "Time the latest system sample took.", sampler.last_sample_duration)
+    _render_host(out, snapshot)
+    _render_gpus(out, snapshot.get("gpus", []))
+    _render_comfyui(out, snapshot)
+    _render_alerts(out, snapshot)
+    _render_jobs(out)
+    request_latency.render(out, "comfydash_http_request_duration_seconds", "API request latency.")
+    return out.text()
@@ -0,0 +1,281 @@
+import math
+import time
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# (step seconds, capacity) of each resolution: 1 h of 1 s, 24 h of 10 s, 7 days of 1 min
+RESOLUTIONS: Tuple[Tuple[int, int], ...] = ((1, 3600), (10, 8640), (60, 10080))
+
+# Column order of the per-series arrays
+MIN, AVG, MAX = 0, 1, 2
+
+def flatten_snapshot(snapshot: Dict[str, Any]) -> Dict[str, float]:
+    """Turn a sampler snapshot into flat metric name -> value pairs"""
+    metrics: Dict[str, float] = {}
+
+    cpu = snapshot.get("cpu", {})
+    metrics["cpu.usage"] = cpu.get("usage")
+    metrics["cpu.temperature"] = cpu.get("temperature")
+
+    frequency = cpu.get("frequency") or {}
+    metrics["cpu.frequency"] = frequency.get("current")
+    for core, usage in enumerate(cpu.get("per_core") or []):
+        metrics[f"cpu.core.{core}"] = usage
+
+    ram = snapshot.get("ram", {})
+    metrics["ram.percent"] = ram.get("percent")
+    metrics["ram.used"] = ram.get("used")
+
+    # Every GPU when the provider reports them all, else just the selected one
+    gpus = snapshot.get("gpus") or []
+    if not gpus and snapshot.get("gpu"):
+        gpus = [dict(snapshot["gpu"], id=snapshot.get("gpu_id") or "0")]
+    for gpu in gpus:
+        prefix = f"gpu.{gpu.get('id', '0')}"
+        metrics[f"{prefix}.usage"] = gpu.get("usage")
+        metrics[f"{prefix}.temperature"] = gpu.get("temperature")
+        metrics[f"{prefix}.memory_used"] = gpu.get("memory", {}).get("used")
+        memory = gpu.get("memory") or {}
+        if memory.get("total"):
+            metrics[f"{prefix}.memory_percent"] = round(memory.get("used", 0) / memory["total"] * 100, 2)
+        if gpu.get("throttle"):
+            metrics[f"{prefix}.throttle_thermal"] = 1 if gpu["throttle"].get("thermal") else 0
+        metrics[f"{prefix}.power"] = (gpu.get("power") or {}).get("draw")
+        metrics[f"{prefix}.clock_graphics"] = (gpu.get("clocks") or {}).get("graphics")
+
+    for sensor in snapshot.get("sensors") or []:
+        metrics[f"sensor.{sensor.get('id')}"] = sensor.get("value")
+
+    for device, rates in (snapshot.get("disks") or {}).items():
+        metrics[f"disk.{device}.read_bytes_per_sec"] = rates.get("read_bytes_per_sec")
+        metrics[f"disk.{device}.write_bytes_per_sec"] = rates.get("write_bytes_per_sec")
+        metrics[f"disk.{device}.read_iops"] = rates.get("read_iops")
+        metrics[f"disk.{device}.write_iops"] = rates.get("write_iops")
+        metrics[f"disk.{device}.busy_percent"] = rates.get("busy_percent")
+
+    for interface, rates in (snapshot.get("network") or {}).items():
+        metrics[f"net.{interface}.rx_bytes_per_sec"] = rates.get("rx_bytes_per_sec")
+        metrics[f"net.{interface}.tx_bytes_per_sec"] = rates.get("tx_bytes_per_sec")
+
+    # ComfyUI process tree totals, to spot leaks from custom nodes
+    comfyui = snapshot.get("comfyui") or {}
+    if comfyui.get("running"):
+        totals = comfyui.get("totals", {})
+        for key in ("cpu_percent", "rss", "uss", "gpu_memory", "threads", "open_files"):
+            metrics[f"comfyui.{key}"] = totals.get(key)
+
+    return {
+        name: float(value) for name, value in metrics.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+class RingBuffer:
+    """Columnar ring buffer of (min, avg, max) samples for a growing set of series.
+
+    All series share one timestamp column. A series that appears later is
+    back-filled with NaN so every column stays aligned with the timestamps.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.full(capacity, np.nan, dtype=np.float64)
+        self.series: Dict[str, np.ndarray] = {}
+        self.count = 0
+        self.head = 0  # next slot to write
+
+    def append(self, timestamp: float, values: Dict[str, Tuple[float, float, float]]):
+        slot = self.head
+        self.timestamps[slot] = timestamp
+
+        for name, row in values.items():
+            column = self.series.get(name)
+            if column is None:
+                column = np.full((self.capacity, 3), np.nan, dtype=np.float32)
+                self.series[name] = column
+            column[slot] = row
+
+        # Series missing from this sample get a gap rather than a stale value
+        for name, column in self.series.items():
+            if name not in values:
+                column[slot] = np.nan
+
+        self.head = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def empty_series(self) -> List[str]:
+        """Names of series without a single value left in the buffer"""
+        return [name for name, column in self.series.items() if np.isnan(column).all()]
+
+    def drop(self, names: List[str]):
+        for name in names:
+            self.series.pop(name, None)
+
+    def _ordered(self, array: np.ndarray) -> np.ndarray:
+        """Return rows oldest first"""
+        if self.count < self.capacity:
+            return array[:self.count]
+        return np.concatenate((array[self.head:], array[:self.head]))
+
+    def window(self, since: float, names: Optional[List[str]] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Get timestamps and series rows newer than a point in time"""
+        timestamps = self._ordered(self.timestamps)
+        mask = timestamps >= since
+        selected = {
+            name: self._ordered(column)[mask]
+            for name, column in self.series.items()
+            if names is None or name in names
+        }
+        return timestamps[mask], selected
+
+class _Rollup:
+    """Running min/sum/max per series for the bucket being filled"""
+
+    def __init__(self, step: int):
+        self.step = step
+        self.bucket: Optional[int] = None
+        self.stats: Dict[str, List[float]] = {}
+
+    def add(self, timestamp: float, metrics: Dict[str, float]) -> Optional[Tuple[float, Dict[str, Tuple[float, float, float]]]]:
+        """Add a sample; returns the finished bucket when the sample starts a new one"""
+        bucket = int(timestamp // self.step)
+        finished = None
+        if self.bucket is not None and bucket != self.bucket:
+            finished = self.flush()
+        self.bucket = bucket
+
+        for name, value in metrics.items():
+            stat = self.stats.get(name)
+            if stat is None:
+                self.stats[name] = [value, value, value, 1]
+            else:
+                stat[0] = min(stat[0], value)
+                stat[1] += value
+                stat[2] = max(stat[2], value)
+                stat[3] += 1
+        return finished
+
+    def flush(self) -> Tuple[float, Dict[str, Tuple[float, float, float]]]:
+        values = {
+            name: (low, total / count, high)
+            for name, (low, total, high, count) in self.stats.items()
+        }
+        timestamp = float(self.bucket * self.step)
+        self.stats = {}
+        return timestamp, values
+
+class MetricsHistory:
+    """In-memory metric history at several resolutions.
+
+    Raw samples go to the finest buffer; coarser buffers receive min/avg/max
+    rollups as each bucket closes. Queries pick the coarsest buffer that covers
+    the requested range without exceeding the step, and downsample from there.
+    A series that stopped reporting (an unplugged disk, a removed interface)
+    is dropped once it has aged out of every resolution.
+    """
+
+    def __init__(self, resolutions: Tuple[Tuple[int, int], ...] = RESOLUTIONS):
+        self._lock = threading.Lock()
+        self.buffers = [(step, RingBuffer(capacity)) for step, capacity in resolutions]
+        self.rollups = [_Rollup(step) for step, _ in resolutions]
+
+    def record(self, snapshot: Dict[str, Any]):
+        """Add a sampler snapshot (usable directly as a sampler listener)"""
+        timestamp = snapshot.get("timestamp") or 0
+        if not timestamp:
+            return
+        self.record_metrics(timestamp, flatten_snapshot(snapshot))
+
+    def record_metrics(self, timestamp: float, metrics: Dict[str, float]):
+        """Add one set of flat metric values"""
+        with self._lock:
+            for (_, buffer), rollup in zip(self.buffers, self.rollups):
+                finished = rollup.add(timestamp, metrics)
+                if finished:
+                    buffer.append(*finished)
+                    if buffer is self.buffers[-1][1]:
+                        self._prune()
+
+    def _prune(self):
+        """Drop series that are all gaps at every resolution"""
+        empty = set(self.buffers[0][1].empty_series())
+        for _, buffer in self.buffers[1:]:
+            empty.intersection_update(buffer.empty_series())
+        for _, buffer in self.buffers:
+            buffer.drop(list(empty))
+
+    def get_metric_names(self) -> List[str]:
+        with self._lock:
+            return sorted(self.buffers[0][1].series)
+
+    def query(self, range_seconds: float = 3600, step: Optional[float] = None,
+              names: Optional[List[str]] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """Get min/avg/max columns for the last range_seconds at the given step"""
+        now = now or time.time()
+        since = now - range_seconds
+        step = step or max(range_seconds / 600, 1)
+
+        with self._lock:
+            # Coarsest resolution that still honours the step, among those covering the range
+            covering = [
+                (buffer_step, candidate) for buffer_step, candidate in self.buffers
+                if buffer_step * candidate.capacity >= range_seconds
+            ] or [self.buffers[-1]]
+            fitting = [item for item in covering if item[0] <= step]
+            chosen_step, buffer = fitting[-1] if fitting else covering[0]
+            timestamps, series = buffer.window(since, names)
+
+        step = max(step, chosen_step)
+        if step > chosen_step and len(timestamps):
+            timestamps, series = _downsample(timestamps, series, step)
+
+        return {
+            "range": range_seconds,
+            "step": step,
+            "resolution": chosen_step,
+            "timestamps": [round(float(t), 3) for t in timestamps],
+            "series": {
+                name: {
+                    "min": _to_list(values[:, MIN]),
+                    "avg": _to_list(values[:, AVG]),
+                    "max": _to_list(values[:, MAX])
+                }
+                for name, values in series.items()
+            }
+        }
+
+def _downsample(timestamps: np.ndarray, series: Dict[str, np.ndarray], step: float) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Merge rows into step-sized buckets, combining min/avg/max correctly"""
+    buckets = np.floor(timestamps / step)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+    merged = {}
+    with np.errstate(invalid="ignore"):
+        for name, values in series.items():
+            low = np.fmin.reduceat(values[:, MIN], starts)
+            high = np.fmax.reduceat(values[:, MAX], starts)
+            avg_values = values[:, AVG]
+            valid = ~np.isnan(avg_values)
+            sums = np.add.reduceat(np.where(valid, avg_values, 0), starts)
+            counts = np.add.reduceat(valid.astype(np.int32), starts)
+            avg = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+            merged[name] = np.stack((low, avg, high), axis=1)
+
+    return buckets[starts] * step, merged
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    """Round values for JSON, turning gaps into nulls"""
+    return [None if math.isnan(v) else round(v, 2) for v in values.tolist()]
+
+# Shared history fed by the metrics sampler
+_metrics_history: Optional[MetricsHistory] = None
+_metrics_history_lock = threading.Lock()
+
+def get_metrics_history() -> MetricsHistory:
+    """Get the shared metrics history"""
+    global _metrics_history
+    with _metrics_history_lock:
+        if _metrics_history is None:
+            _metrics_history = MetricsHistory()
+    return _metrics_history
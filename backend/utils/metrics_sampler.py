@@ -0,0 +1,153 @@
+import time
+import threading
+from typing import Dict, Any, Callable, List, Optional
+
+from utils.system_info import get_system_stats
+from utils.process_stats import ProcessTracker
+from utils.host_counters import CounterRates
+from utils.alerts import get_alert_engine
+
+class MetricsSampler:
+    """Collect system statistics on a background thread.
+
+    One thread samples CPU, RAM, GPU, temperatures, disk and network rates
+    and the ComfyUI process tree at a fixed rate, evaluates alert rules on
+    the result and keeps it as a shared snapshot, so request handlers only
+    read memory instead of sleeping on psutil or spawning nvidia-smi.
+    Listeners are called with every new snapshot from the sampler thread.
+    """
+
+    def __init__(self, interval: float = 1.0, gpu_id: Optional[str] = None):
+        self.interval = max(float(interval), 0.1)
+        self.gpu_id = gpu_id
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sample_count = 0
+        self.last_sample_duration = 0.0
+        # Resource accounting for the ComfyUI process tree
+        self.process_tracker = ProcessTracker()
+        # Per-core CPU, disk and network rates from counter deltas
+        self.counter_rates = CounterRates()
+        # Threshold alerts, evaluated on every sample
+        self.alert_engine = get_alert_engine()
+
+    def configure(self, interval: Optional[float] = None, gpu_id: Optional[str] = None):
+        """Change the sampling rate or the GPU to sample; applies from the next sample"""
+        if interval:
+            self.interval = max(float(interval), 0.1)
+        if gpu_id is not None:
+            self.gpu_id = gpu_id
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """Call back with every new snapshot (on the sampler thread)"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def start(self):
+        """Start sampling in the background"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling system stats: {str(e)}")
+            # Keep a steady rate regardless of how long sampling took
+            elapsed = time.monotonic() - started
+            self._stop_event.wait(max(self.interval - elapsed, 0.05))
+
+    def sample(self) -> Dict[str, Any]:
+        """Take one sample now and publish it"""
+        started = time.monotonic()
+        # cpu_percent(interval=None) measures since the previous sample instead of sleeping
+        snapshot = get_system_stats(self.gpu_id, cpu_interval=None)
+        snapshot["gpu_id"] = self.gpu_id
+        try:
+            rates = self.counter_rates.sample()
+            snapshot["cpu"].update(rates["cpu"])
+            snapshot["disks"] = rates["disks"]
+            snapshot["network"] = rates["network"]
+        except Exception as e:
+            print(f"Error sampling I/O counters: {str(e)}")
+        try:
+            snapshot["comfyui"] = self.process_tracker.sample()
+        except Exception as e:
+            print(f"Error sampling ComfyUI processes: {str(e)}")
+        try:
+            snapshot["alerts"] = self.alert_engine.evaluate(snapshot)
+        except Exception as e:
+            print(f"Error evaluating alerts: {str(e)}")
+        self.last_sample_duration = time.monotonic() - started
+
+        with self._lock:
+            self._snapshot = snapshot
+            self.sample_count += 1
+
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Error in metrics listener: {str(e)}")
+
+        return snapshot
+
+    def get_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Get the latest snapshot, or None before the first sample"""
+        with self._lock:
+            return self._snapshot
+
+    def get_stats(self, gpu_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get the latest system statistics without blocking.
+
+        A different GPU than the one being sampled is picked up from the next
+        sample on.
+        """
+        if gpu_id is not None and gpu_id != self.gpu_id:
+            self.gpu_id = gpu_id
+
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return {
+                "cpu": {"usage": 0, "cores": 0, "temperature": 0},
+                "ram": {"used": 0, "total": 0, "percent": 0},
+                "gpu": {"usage": 0, "temperature": 0, "memory": {"used": 0, "total": 0}},
+                "gpus": [],
+                "sensors": [],
+                "disks": {},
+                "network": {},
+                "comfyui": {"running": False, "root_pid": None, "process_count": 0, "totals": {}, "processes": []},
+                "alerts": {"firing": 0, "pending": 0, "active": []},
+                "timestamp": 0
+            }
+        return snapshot
+
+# Shared sampler, started by the app lifespan
+_metrics_sampler: Optional[MetricsSampler] = None
+_metrics_sampler_lock = threading.Lock()
+
+def get_metrics_sampler() -> MetricsSampler:
+    """Get the shared metrics sampler, starting it if needed"""
+    global _metrics_sampler
+    with _metrics_sampler_lock:
+        if _metrics_sampler is None:
+            _metrics_sampler = MetricsSampler()
+        _metrics_sampler.start()
+    return _metrics_sampler
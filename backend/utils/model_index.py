@@ -0,0 +1,100 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Any, List, Optional
+
+class ModelIndex:
+    """Persistent record of where model files live and where they came from.
+
+    The installed-models scan only sees files and their sizes; the index keeps
+    what the filesystem cannot tell us (source, source id, model type) and
+    follows files when ComfyDash moves them between storage locations.
+    Entries are keyed by absolute path.
+    """
+
+    def __init__(self, index_file: str):
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, "r") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading model index: {str(e)}")
+        return {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            temp_file = self.index_file + ".tmp"
+            with open(temp_file, "w") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(temp_file, self.index_file)
+        except Exception as e:
+            print(f"Error saving model index: {str(e)}")
+
+    def register(self, path: str, **metadata) -> Dict[str, Any]:
+        """Add or update a model file in the index"""
+        path = os.path.abspath(path)
+        with self._lock:
+            entry = self.entries.get(path, {"added": time.time()})
+            entry.update({k: v for k, v in metadata.items() if v is not None})
+            try:
+                stat = os.stat(path)
+                entry["size"] = stat.st_size
+                entry["mtime"] = stat.st_mtime
+            except OSError:
+                pass
+            self.entries[path] = entry
+            self._save()
+            return dict(entry)
+
+    def unregister(self, path: str) -> bool:
+        """Remove a model file (or every file under a folder) from the index"""
+        path = os.path.abspath(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        with self._lock:
+            removed = [p for p in self.entries if p == path or p.startswith(prefix)]
+            for p in removed:
+                del self.entries[p]
+            if removed:
+                self._save()
+        return bool(removed)
+
+    def move(self, old_path: str, new_path: str):
+        """Follow a file or folder to its new location"""
+        old_path = os.path.abspath(old_path)
+        new_path = os.path.abspath(new_path)
+        prefix = old_path.rstrip(os.sep) + os.sep
+        with self._lock:
+            for p in [p for p in self.entries if p == old_path or p.startswith(prefix)]:
+                self.entries[new_path + p[len(old_path):]] = self.entries.pop(p)
+            self._save()
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Get the index entry for a model file"""
+        with self._lock:
+            entry = self.entries.get(os.path.abspath(path))
+            return dict(entry) if entry else None
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        """Get every indexed model with its path"""
+        with self._lock:
+            return [{"path": path, **entry} for path, entry in self.entries.items()]
+
+# Shared index stored under backend/data
+_model_index: Optional[ModelIndex] = None
+_model_index_lock = threading.Lock()
+
+def get_model_index() -> ModelIndex:
+    """Get the shared model index"""
+    global _model_index
+    with _model_index_lock:
+        if _model_index is None:
+            index_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "model_index.json")
+            _model_index = ModelIndex(index_file)
+    return _model_index
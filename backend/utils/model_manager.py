@@ -9,8 +9,13 @@ import threading
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 import urllib.parse
+from contextlib import nullcontext
 from tqdm import tqdm
 from utils.settings_manager import SettingsManager
+from utils.thumbnail_cache import create_local_thumbnail, get_local_thumbnail_path
+from utils.model_index import get_model_index
+from utils.directory_sizer import get_directory_sizer
+from utils.archive_stream import get_archive_format, strip_archive_suffix, create_stream_extractor
 
 # For HuggingFace integration
 try:
@@ -23,6 +28,24 @@ except ImportError:
 # Dictionary to track active downloads
 active_downloads = {}
 
+# Bytes received by all downloads since the backend started (for /metrics)
+download_counters = {"bytes": 0}
+_download_counters_lock = threading.Lock()
+
+def count_download_bytes(count: int):
+    """Add bytes received by a download to the /metrics counter"""
+    if count > 0:
+        with _download_counters_lock:
+            download_counters["bytes"] += count
+
+def resolve_models_path(settings: Dict[str, Any]) -> Optional[str]:
+    """Get the models directory from settings, falling back to ComfyUI's models folder"""
+    models_path = settings.get("modelsPath", "")
+    if not models_path or not os.path.exists(models_path):
+        comfyui_path = settings.get("comfyUIPath", "")
+        models_path = os.path.join(comfyui_path, "models") if comfyui_path else ""
+    return models_path if models_path and os.path.isdir(models_path) else None
+
 class ModelDownloader:
     def __init__(self, models_dir: str):
         self.models_dir = models_dir
@@ -57,8 +80,46 @@ class ModelDownloader:
         dir_name = type_mapping.get(model_type.lower(), "other")
         return os.path.join(self.models_dir, dir_name)
     
-    def download_from_url(self, url: str, model_name: str, model_type: str, download_id: str) -> None:
-        """Download a model from a direct URL"""
+    def _get_response_filename(self, response: requests.Response) -> Optional[str]:
+        """Get the file name from a Content-Disposition header, if any"""
+        disposition = response.headers.get("content-disposition", "")
+        for part in disposition.split(";"):
+            key, _, value = part.strip().partition("=")
+            if key.lower() == "filename*" and "''" in value:
+                return os.path.basename(urllib.parse.unquote(value.split("''", 1)[1].strip('"')))
+            if key.lower() == "filename" and value:
+                return os.path.basename(value.strip('"'))
+        return None
+    
+    def _archive_entry_target(self, entry_name: str, model_type: str, archive_name: str) -> str:
+        """Pick where an archive entry is extracted to.
+        
+        Archives laid out like a models folder (e.g. ``loras/x.safetensors``)
+        keep that layout; anything else goes into a folder named after the
+        archive inside the requested model type's directory.
+        """
+        type_dirs = {
+            "checkpoints", "vae", "loras", "controlnet",
+            "embeddings", "upscale_models", "clip"
+        }
+        parts = [part for part in entry_name.replace("\\", "/").split("/") if part]
+        
+        for i, part in enumerate(parts[:-1]):
+            if part.lower() in type_dirs:
+                return os.path.join(self.models_dir, part.lower(), *parts[i + 1:])
+        
+        # Avoid nesting the archive's own top-level folder inside its name
+        if len(parts) > 1 and parts[0] == archive_name:
+            parts = parts[1:]
+        return os.path.join(self.get_model_path(model_type), archive_name, *parts)
+    
+    def download_from_url(self, url: str, model_name: str, model_type: str, download_id: str,
+                          source: str = "url", source_id: str = None) -> None:
+        """Download a model from a direct URL.
+        
+        Zip and tar archives are extracted while they download, so model packs
+        land in their type directories without a second pass over the archive.
+        """
         target_dir = self.get_model_path(model_type)
         os.makedirs(target_dir, exist_ok=True)
         
@@ -68,6 +129,8 @@ class ModelDownloader:
             filename = f"{model_name}.safetensors"
         
         target_path = os.path.join(target_dir, filename)
+        extractor = None
+        extracted_files = []
         
         try:
             # Update download status
@@ -88,22 +151,41 @@ class ModelDownloader:
             response = requests.get(url, stream=True)
             response.raise_for_status()
             
+            # Prefer the server's file name (e.g. CivitAI download links end in an id)
+            response_filename = self._get_response_filename(response)
+            if response_filename:
+                filename = response_filename
+                target_path = os.path.join(target_dir, filename)
+            
+            # Extract archives on the fly instead of storing them
+            archive_format = get_archive_format(filename) if self._extract_archives_enabled() else None
+            if archive_format:
+                archive_name = strip_archive_suffix(filename)
+                target_path = os.path.join(target_dir, archive_name)
+                extractor = create_stream_extractor(
+                    archive_format,
+                    lambda entry: self._archive_entry_target(entry, model_type, archive_name),
+                    spool_dir=target_dir
+                )
+            
             # Get total file size if available
             total_size = int(response.headers.get('content-length', 0))
             total_size_str = self._format_size(total_size) if total_size else "unknown"
             
             # Update download status with total size
             active_downloads[download_id]["total"] = total_size_str
+            active_downloads[download_id]["target_path"] = target_path
             
             # Download with progress tracking
             start_time = time.time()
             downloaded = 0
             
-            with open(target_path, 'wb') as f:
+            with (open(target_path, 'wb') if not extractor else nullcontext(extractor)) as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     if chunk:
                         f.write(chunk)
                         downloaded += len(chunk)
+                        count_download_bytes(len(chunk))
                         
                         # Calculate progress and speed
                         progress = (downloaded / total_size * 100) if total_size else 0
@@ -125,12 +207,24 @@ class ModelDownloader:
                             "eta": eta,
                             "downloaded": self._format_size(downloaded),
                             "total": total_size_str,
+                            "downloaded_bytes": downloaded,
+                            "speed_bytes": round(speed),
                             "model_name": model_name,
                             "model_type": model_type,
                             "target_path": target_path,
+                            "extracting": bool(extractor),
                             "timestamp": time.time()
                         }
             
+            # Record where the model came from
+            index = get_model_index()
+            if extractor:
+                extracted_files = extractor.close()
+                for path in extracted_files:
+                    index.register(path, type=model_type, source=source, sourceId=source_id or url, archive=filename)
+            else:
+                index.register(target_path, type=model_type, source=source, sourceId=source_id or url)
+            
             # Download completed
             active_downloads[download_id] = {
                 "status": "completed",
@@ -141,11 +235,22 @@ class ModelDownloader:
                 "total": total_size_str,
                 "model_name": model_name,
                 "model_type": model_type,
-                "target_path": target_path,
+                "target_path": extracted_files[0] if len(extracted_files) == 1 else target_path,
                 "timestamp": time.time()
             }
+            if extractor:
+                active_downloads[download_id]["extracted_files"] = extracted_files
+                # Entries whose file was already there are never overwritten
+                if extractor.skipped:
+                    active_downloads[download_id]["skipped_files"] = extractor.skipped
+                    active_downloads[download_id]["message"] = (
+                        f"Skipped {len(extractor.skipped)} file(s) that already exist"
+                    )
             
         except Exception as e:
+            if extractor:
+                extractor.abort()
+            
             # Download failed
             active_downloads[download_id] = {
                 "status": "failed",
@@ -155,6 +260,16 @@ class ModelDownloader:
                 "target_path": target_path,
                 "timestamp": time.time()
             }
+        finally:
+            # Files written in place keep their directory's mtime, so the cached sizes must be dropped
+            sizer = get_directory_sizer()
+            for path in [target_path] + extracted_files:
+                sizer.invalidate(path)
+    
+    def _extract_archives_enabled(self) -> bool:
+        """Check whether archive downloads should be extracted"""
+        settings_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "settings.json")
+        return SettingsManager(settings_file).get_settings().get("extractArchives", True)
     
     def download_from_civitai(self, model_id: str, model_name: str, model_type: str, download_id: str, version_id: str = None) -> None:
         """Download a model from Civitai with optional version_id"""
@@ -211,7 +326,19 @@ class ModelDownloader:
                 
                 if download_url:
                     # Now download from the URL
-                    self.download_from_url(download_url, model_name, model_type, download_id)
+                    self.download_from_url(
+                        download_url, model_name, model_type, download_id,
+                        source="civitai", source_id=model_id
+                    )
+                    
+                    # Store a thumbnail of the preview image next to the model for the local gallery
+                    download = active_downloads.get(download_id, {})
+                    image_url = version.get("images", [{}])[0].get("url") if version.get("images") else None
+                    if download.get("status") == "completed" and image_url and os.path.isfile(download["target_path"]):
+                        try:
+                            create_local_thumbnail(download["target_path"], source_url=image_url)
+                        except Exception as e:
+                            print(f"Error creating thumbnail for {download['target_path']}: {str(e)}")
                     return
             
             # If we got here, something went wrong
@@ -276,14 +403,22 @@ class ModelDownloader:
                         "timestamp": time.time()
                     }
                 
-                # Download the model
-                hf_hub_download(
-                    repo_id=repo_id,
-                    filename="*.safetensors",  # This is a simplification
-                    local_dir=target_dir,
-                    local_dir_use_symlinks=False,
-                    resume_download=True
-                )
+                # Download the model; the hub library does the transfer, so the
+                # bytes received are what the file grew by (it may resume)
+                existing_size = os.path.getsize(target_path) if os.path.isfile(target_path) else 0
+                try:
+                    hf_hub_download(
+                        repo_id=repo_id,
+                        filename="*.safetensors",  # This is a simplification
+                        local_dir=target_dir,
+                        local_dir_use_symlinks=False,
+                        resume_download=True
+                    )
+                finally:
+                    if os.path.isfile(target_path):
+                        count_download_bytes(os.path.getsize(target_path) - existing_size)
+                
+                get_model_index().register(target_path, type=model_type, source="huggingface", sourceId=repo_id)
                 
                 # Download completed
                 active_downloads[download_id] = {
@@ -432,6 +567,9 @@ class ModelDownloader:
             "other": "other"
         }
         
+        # Source information recorded when the models were downloaded
+        index = {entry["path"]: entry for entry in get_model_index().get_all()}
+        
         # Scan all model directories
         for dir_name, model_type in type_mapping.items():
             dir_path = os.path.join(self.models_dir, dir_name)
@@ -443,6 +581,13 @@ class ModelDownloader:
                             file_size = os.path.getsize(file_path)
                             file_mtime = os.path.getmtime(file_path)
                             
+                            # Thumbnail stored next to the model, if any
+                            preview = ""
+                            if os.path.exists(get_local_thumbnail_path(file_path)):
+                                preview = f"/api/models/preview?path={urllib.parse.quote(file_path)}"
+                            
+                            indexed = index.get(os.path.abspath(file_path), {})
+                            
                             models.append({
                                 "id": f"{model_type}_{len(models)}",
                                 "name": os.path.splitext(file)[0],
@@ -451,8 +596,9 @@ class ModelDownloader:
                                 "size": self._format_size(file_size),
                                 "size_bytes": file_size,
                                 "dateAdded": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(file_mtime)),
-                                "source": "local",
-                                "sourceId": ""
+                                "source": indexed.get("source", "local"),
+                                "sourceId": indexed.get("sourceId", ""),
+                                "preview": preview
                             })
         
         return models
@@ -462,6 +608,7 @@ class ModelDownloader:
         if os.path.exists(model_path) and os.path.isfile(model_path):
             try:
                 os.remove(model_path)
+                get_model_index().unregister(model_path)
                 return {
                     "status": "success",
                     "message": f"Model deleted: {os.path.basename(model_path)}"
@@ -536,6 +683,7 @@ class ModelDownloader:
                     "nsfw": item.get("nsfw", False),
                     "description": item.get("description", ""),
                     "image": image_url,
+                    "thumbnail": f"/api/models/thumbnail?url={urllib.parse.quote(image_url, safe='')}" if image_url else "",
                     "downloadCount": item.get("downloadCount", 0),
                     "rating": item.get("rating", 0),
                     "versionId": version.get("id") if version else None,
@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import mmap
+import ctypes
+import ctypes.util
+import threading
+from typing import Dict, Any, List, Optional
+
+import psutil
+
+from utils.model_manager import resolve_models_path
+from utils.model_tiering import get_model_tier_manager
+
+# Files are warmed and checked in chunks of this size
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Never try to preload more than this fraction of the currently available RAM
+MAX_AVAILABLE_RAM_FRACTION = 0.5
+
+PAGE_SIZE = mmap.PAGESIZE
+
+# Status of the current (or last) preload run
+preload_status: Dict[str, Any] = {"status": "idle", "files": [], "timestamp": 0}
+_preload_lock = threading.Lock()
+_preload_thread: Optional[threading.Thread] = None
+_preload_cancel = threading.Event()
+
+# mincore() is only reachable through libc on Linux; elsewhere (or without a
+# usable libc) residency is reported as unknown and every chunk is read
+_libc = None
+if sys.platform.startswith("linux"):
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        _libc.mmap.restype = ctypes.c_void_p
+        _libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long]
+        _libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        _libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_char_p]
+    except (OSError, AttributeError):
+        _libc = None
+
+class _FileResidency:
+    """Page cache residency of one file, read through mincore()"""
+
+    def __init__(self, fd: int, size: int):
+        self.size = size
+        self.address = None
+        if _libc and size > 0:
+            address = _libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0)
+            if address not in (None, ctypes.c_void_p(-1).value):
+                self.address = address
+
+    def resident_bytes(self, offset: int = 0, length: Optional[int] = None) -> Optional[int]:
+        """Count resident bytes in a page-aligned range, or None if unsupported"""
+        if self.address is None:
+            return None
+
+        length = self.size - offset if length is None else min(length, self.size - offset)
+        if length <= 0:
+            return 0
+
+        pages = (length + PAGE_SIZE - 1) // PAGE_SIZE
+        vec = ctypes.create_string_buffer(pages)
+        if _libc.mincore(self.address + offset, length, vec) != 0:
+            return None
+
+        resident_pages = sum(1 for b in vec.raw if b & 1)
+        return min(resident_pages * PAGE_SIZE, length)
+
+    def close(self):
+        if self.address is not None:
+            _libc.munmap(self.address, self.size)
+            self.address = None
+
+def get_file_residency(path: str) -> Dict[str, Any]:
+    """Report how much of a file is already in the OS page cache"""
+    result = {"path": path, "size": 0, "resident_bytes": None, "resident_percent": None}
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError as e:
+        result["error"] = str(e)
+        return result
+
+    try:
+        size = os.fstat(fd).st_size
+        result["size"] = size
+        residency = _FileResidency(fd, size)
+        try:
+            resident = residency.resident_bytes()
+        finally:
+            residency.close()
+
+        if resident is not None:
+            result["resident_bytes"] = resident
+            result["resident_percent"] = round(resident / size * 100, 1) if size else 100.0
+    finally:
+        os.close(fd)
+
+    return result
+
+def get_residency(paths: List[str]) -> List[Dict[str, Any]]:
+    """Page cache residency of each existing file; blocking (mmap and mincore per file)"""
+    return [get_file_residency(path) for path in paths if os.path.isfile(path)]
+
+def _warm_file(path: str, entry: Dict[str, Any]):
+    """Pull a file into the page cache, skipping chunks that are already resident"""
+    with open(path, "rb", buffering=0) as f:
+        fd = f.fileno()
+        size = os.fstat(fd).st_size
+        entry["size"] = size
+
+        # Let the kernel start readahead for the whole file right away
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
+
+        residency = _FileResidency(fd, size)
+        try:
+            before = residency.resident_bytes()
+            entry["resident_before"] = before
+
+            buffer = memoryview(bytearray(CHUNK_SIZE))
+            offset = 0
+            while offset < size:
+                if _preload_cancel.is_set():
+                    entry["status"] = "cancelled"
+                    return
+
+                length = min(CHUNK_SIZE, size - offset)
+                # Only touch chunks that are not fully cached yet
+                if residency.resident_bytes(offset, length) != length:
+                    f.seek(offset)
+                    f.readinto(buffer[:length])
+
+                offset += length
+                entry["done_bytes"] = offset
+
+            entry["resident_after"] = residency.resident_bytes()
+        finally:
+            residency.close()
+
+        entry["status"] = "completed"
+
+def _run_preload():
+    """Background task warming each file in turn"""
+    start_time = time.time()
+
+    for entry in preload_status["files"]:
+        if _preload_cancel.is_set():
+            break
+        entry["status"] = "loading"
+        try:
+            _warm_file(entry["path"], entry)
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+
+        preload_status["bytes_done"] = sum(f.get("done_bytes", 0) for f in preload_status["files"])
+        preload_status["timestamp"] = time.time()
+
+    preload_status["status"] = "cancelled" if _preload_cancel.is_set() else "completed"
+    preload_status["elapsed"] = round(time.time() - start_time, 2)
+    preload_status["timestamp"] = time.time()
+
+def get_preload_paths(settings: Dict[str, Any]) -> List[str]:
+    """Get the configured model files plus the most recently used ones"""
+    models_path = resolve_models_path(settings)
+    paths = [
+        path if os.path.isabs(path) or not models_path else os.path.join(models_path, path)
+        for path in settings.get("preloadModels", [])
+    ]
+
+    learned_count = int(settings.get("preloadLearnedCount", 3))
+    if learned_count > 0 and models_path:
+        paths.extend(get_model_tier_manager(models_path, settings).get_most_used(learned_count))
+
+    return paths
+
+def select_preload_files(paths: List[str]) -> List[str]:
+    """Keep existing files, without duplicates, that fit in the RAM we can spare"""
+    budget = psutil.virtual_memory().available * MAX_AVAILABLE_RAM_FRACTION
+    selected = []
+    seen = set()
+    total = 0
+
+    for path in paths:
+        real_path = os.path.realpath(path)
+        if real_path in seen or not os.path.isfile(real_path):
+            continue
+        size = os.path.getsize(real_path)
+        if total + size > budget:
+            continue
+        seen.add(real_path)
+        selected.append(path)
+        total += size
+
+    return selected
+
+def start_preload(paths: List[str]) -> Dict[str, Any]:
+    """Start warming model files into the page cache in the background"""
+    global _preload_thread
+
+    with _preload_lock:
+        if _preload_thread and _preload_thread.is_alive():
+            return {"status": "already_running", "message": "A preload is already running"}
+
+        selected = select_preload_files(paths)
+        if not selected:
+            return {"status": "idle", "message": "No model files to preload"}
+
+        _preload_cancel.clear()
+        preload_status.clear()
+        preload_status.update({
+            "status": "running",
+            "files": [
+                {"path": path, "size": os.path.getsize(path), "done_bytes": 0, "status": "queued"}
+                for path in selected
+            ],
+            "bytes_done": 0,
+            "started": time.time(),
+            "timestamp": time.time()
+        })
+        preload_status["bytes_total"] = sum(f["size"] for f in preload_status["files"])
+
+        _preload_thread = threading.Thread(target=_run_preload, name="model-preload", daemon=True)
+        _preload_thread.start()
+
+    return {"status": "started", "files": len(selected), "bytes_total": preload_status["bytes_total"]}
+
+def cancel_preload() -> Dict[str, Any]:
+    """Stop the running preload after the current chunk"""
+    if _preload_thread and _preload_thread.is_alive():
+        _preload_cancel.set()
+        return {"status": "cancelling"}
+    return {"status": "not_running"}
+
+def get_preload_status() -> Dict[str, Any]:
+    """Get the progress of the current or last preload"""
+    status = dict(preload_status)
+    status["bytes_done"] = sum(f.get("done_bytes", 0) for f in status.get("files", []))
+    total = status.get("bytes_total", 0)
+    status["progress"] = round(status.get("bytes_done", 0) / total * 100, 1) if total else 0
+    return status
@@ -0,0 +1,446 @@
+import os
+import json
+import time
+import queue
+import shutil
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+# Placement modes for hot models
+TIER_MODE_SYMLINK = "symlink"
+TIER_MODE_EXTRA_PATHS = "extra_model_paths"
+
+# Name of the directory created on the fast volume
+HOT_TIER_DIRNAME = "comfydash_hot_models"
+
+# Suffix given to the library copy while a symlink to the hot copy takes its place
+COLD_SUFFIX = ".cold"
+
+# Markers around the section we own in ComfyUI's extra_model_paths.yaml
+EXTRA_PATHS_BEGIN = "# BEGIN ComfyDash hot tier (managed automatically, do not edit)"
+EXTRA_PATHS_END = "# END ComfyDash hot tier"
+EXTRA_PATHS_KEY = "comfydash_hot_tier"
+
+class ModelTierManager:
+    """Keep the most recently used models on a fast local volume.
+
+    Usage is recorded per model (path relative to the models directory). A
+    rebalance picks the most recently used models that fit in the size budget,
+    promotes the missing ones and demotes the rest. Copies run on a single
+    background worker so API calls never wait on disk I/O.
+
+    In ``symlink`` mode the library file is renamed to ``<name>.cold`` and
+    replaced by a symlink to the hot copy. In ``extra_model_paths`` mode the
+    library is left untouched and the hot directory is registered as the
+    default search path in ComfyUI's ``extra_model_paths.yaml``.
+    """
+
+    def __init__(self, models_dir: str, state_file: str):
+        self.models_dir = models_dir
+        self.state_file = state_file
+        self.comfyui_path = ""
+        self.hot_root = ""
+        self.budget_bytes = 0
+        self.mode = TIER_MODE_SYMLINK
+        self.min_hits = 1
+        self.enabled = False
+
+        self._lock = threading.RLock()
+        self._queue: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+        self._pending = set()
+        self._current_op: Optional[Dict[str, Any]] = None
+        self._worker: Optional[threading.Thread] = None
+        self._rebalance_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.last_error = ""
+
+        # usage: rel_path -> {"hits", "last_used"}; promoted: rel_path -> {"size", "promoted_at"}
+        state = self._load_state()
+        self.usage: Dict[str, Dict[str, float]] = state.get("usage", {})
+        self.promoted: Dict[str, Dict[str, Any]] = state.get("promoted", {})
+
+        self._recover_interrupted()
+
+    def configure(self, settings: Dict[str, Any]):
+        """Apply the hot tier settings"""
+        with self._lock:
+            self.enabled = bool(settings.get("hotTierEnabled", False))
+            hot_path = settings.get("hotTierPath", "")
+            self.hot_root = os.path.join(hot_path, HOT_TIER_DIRNAME) if hot_path else ""
+            self.budget_bytes = int(float(settings.get("hotTierBudgetGB", 100)) * 1024**3)
+            self.mode = settings.get("hotTierMode", TIER_MODE_SYMLINK)
+            self.min_hits = int(settings.get("hotTierMinHits", 1))
+            self.comfyui_path = settings.get("comfyUIPath", "")
+
+    def start(self, rebalance_interval: float = 300):
+        """Start the background worker and the periodic rebalance"""
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stop_event.clear()
+            self._worker = threading.Thread(target=self._work_loop, name="model-tier-worker", daemon=True)
+            self._worker.start()
+            self._rebalance_thread = threading.Thread(
+                target=self._rebalance_loop, args=(rebalance_interval,),
+                name="model-tier-rebalance", daemon=True
+            )
+            self._rebalance_thread.start()
+
+    def stop(self):
+        """Stop the background threads after the current operation"""
+        self._stop_event.set()
+        self._queue.put(("stop", ""))
+
+    # ----- usage tracking -----
+
+    def _relative(self, path: str) -> Optional[str]:
+        """Convert a model path to a key relative to the models directory"""
+        models_dir = os.path.abspath(self.models_dir)
+        path = os.path.abspath(path if os.path.isabs(path) else os.path.join(models_dir, path))
+        if path.endswith(COLD_SUFFIX):
+            path = path[:-len(COLD_SUFFIX)]
+        if os.path.commonpath([models_dir, path]) != models_dir:
+            return None
+        return os.path.relpath(path, models_dir).replace(os.sep, "/")
+
+    def record_use(self, path: str, timestamp: Optional[float] = None) -> bool:
+        """Record that a model was loaded"""
+        rel_path = self._relative(path)
+        if not rel_path:
+            return False
+
+        with self._lock:
+            entry = self.usage.setdefault(rel_path, {"hits": 0, "last_used": 0})
+            entry["hits"] += 1
+            entry["last_used"] = max(entry["last_used"], timestamp or time.time())
+            self._save_state()
+        return True
+
+    def get_last_use(self) -> Optional[float]:
+        """Time of the most recent recorded use, or None before any"""
+        with self._lock:
+            return max((entry["last_used"] for entry in self.usage.values()), default=None)
+
+    def get_most_used(self, limit: int = 5) -> List[str]:
+        """Get library paths of the most recently used models"""
+        with self._lock:
+            ranked = sorted(
+                self.usage.items(),
+                key=lambda item: (item[1]["last_used"], item[1]["hits"]),
+                reverse=True
+            )
+        return [self._library_path(rel_path) for rel_path, _ in ranked[:limit]]
+
+    # ----- planning -----
+
+    def _library_path(self, rel_path: str) -> str:
+        return os.path.join(self.models_dir, *rel_path.split("/"))
+
+    def _hot_path(self, rel_path: str) -> str:
+        return os.path.join(self.hot_root, *rel_path.split("/"))
+
+    def _model_size(self, rel_path: str) -> int:
+        """Size of the model's bytes, wherever they currently live"""
+        library_path = self._library_path(rel_path)
+        for path in (library_path + COLD_SUFFIX, library_path):
+            try:
+                return os.stat(path).st_size
+            except OSError:
+                continue
+        return -1
+
+    def plan(self) -> Dict[str, List[str]]:
+        """Work out which models should be promoted and demoted"""
+        with self._lock:
+            candidates = sorted(
+                (
+                    (rel_path, entry) for rel_path, entry in self.usage.items()
+                    if entry["hits"] >= self.min_hits
+                ),
+                key=lambda item: (item[1]["last_used"], item[1]["hits"]),
+                reverse=True
+            )
+
+            budget = self.budget_bytes
+            if self.hot_root:
+                # Never plan beyond what the fast volume can actually hold
+                try:
+                    usage = shutil.disk_usage(os.path.dirname(self.hot_root) or self.hot_root)
+                    promoted_size = sum(p.get("size", 0) for p in self.promoted.values())
+                    budget = min(budget, usage.free + promoted_size)
+                except OSError:
+                    pass
+
+            keep = set()
+            used = 0
+            for rel_path, _ in candidates:
+                size = self._model_size(rel_path)
+                if size < 0 or used + size > budget:
+                    continue
+                keep.add(rel_path)
+                used += size
+
+            return {
+                "promote": [p for p, _ in candidates if p in keep and p not in self.promoted],
+                "demote": [p for p in self.promoted if p not in keep]
+            }
+
+    def rebalance(self) -> Dict[str, Any]:
+        """Queue the promotions and demotions needed to match the current usage"""
+        if not self.enabled or not self.hot_root:
+            return {"status": "disabled", "message": "Hot tier is not enabled or no fast volume is set"}
+
+        plan = self.plan()
+        # Demote first so the promotions have room
+        for rel_path in plan["demote"]:
+            self._enqueue("demote", rel_path)
+        for rel_path in plan["promote"]:
+            self._enqueue("promote", rel_path)
+
+        return {"status": "queued", **plan}
+
+    def _enqueue(self, action: str, rel_path: str) -> bool:
+        with self._lock:
+            if (action, rel_path) in self._pending:
+                return False
+            self._pending.add((action, rel_path))
+        self._queue.put((action, rel_path))
+        return True
+
+    def promote(self, path: str) -> Dict[str, Any]:
+        """Queue a model for promotion regardless of its usage"""
+        rel_path = self._relative(path)
+        if not rel_path or self._model_size(rel_path) < 0:
+            return {"status": "error", "message": "Model not found in the models directory"}
+        if not self.hot_root:
+            return {"status": "error", "message": "No fast volume configured"}
+        self._enqueue("promote", rel_path)
+        return {"status": "queued", "path": rel_path}
+
+    def demote(self, path: str) -> Dict[str, Any]:
+        """Queue a model for demotion back to the library volume"""
+        rel_path = self._relative(path)
+        if not rel_path or rel_path not in self.promoted:
+            return {"status": "error", "message": "Model is not in the hot tier"}
+        self._enqueue("demote", rel_path)
+        return {"status": "queued", "path": rel_path}
+
+    # ----- background work -----
+
+    def _rebalance_loop(self, interval: float):
+        while not self._stop_event.wait(interval):
+            try:
+                self.rebalance()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error rebalancing hot tier: {str(e)}")
+
+    def _work_loop(self):
+        while True:
+            action, rel_path = self._queue.get()
+            if action == "stop":
+                break
+
+            with self._lock:
+                self._current_op = {"action": action, "path": rel_path, "started": time.time()}
+            try:
+                if action == "promote":
+                    self._promote(rel_path)
+                elif action == "demote":
+                    self._demote(rel_path)
+            except Exception as e:
+                self.last_error = f"{action} {rel_path}: {str(e)}"
+                print(f"Error during hot tier {action} of {rel_path}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._pending.discard((action, rel_path))
+                    self._current_op = None
+
+    def _promote(self, rel_path: str):
+        if rel_path in self.promoted:
+            return
+
+        library_path = self._library_path(rel_path)
+        hot_path = self._hot_path(rel_path)
+        os.makedirs(os.path.dirname(hot_path), exist_ok=True)
+
+        # Copy under a temporary name so a crash never leaves a truncated hot copy
+        temp_path = hot_path + ".partial"
+        shutil.copyfile(library_path, temp_path)
+        os.replace(temp_path, hot_path)
+
+        if self.mode == TIER_MODE_SYMLINK:
+            os.replace(library_path, library_path + COLD_SUFFIX)
+            try:
+                os.symlink(hot_path, library_path)
+            except OSError:
+                os.replace(library_path + COLD_SUFFIX, library_path)
+                os.remove(hot_path)
+                raise
+
+        with self._lock:
+            self.promoted[rel_path] = {
+                "size": os.path.getsize(hot_path),
+                "promoted_at": time.time(),
+                "mode": self.mode
+            }
+            self._save_state()
+
+        if self.mode == TIER_MODE_EXTRA_PATHS:
+            self.write_extra_model_paths()
+
+    def _demote(self, rel_path: str):
+        info = self.promoted.get(rel_path)
+        if not info:
+            return
+
+        library_path = self._library_path(rel_path)
+        hot_path = self._hot_path(rel_path)
+
+        if info.get("mode", TIER_MODE_SYMLINK) == TIER_MODE_SYMLINK:
+            if os.path.exists(library_path + COLD_SUFFIX):
+                if os.path.islink(library_path):
+                    os.remove(library_path)
+                os.replace(library_path + COLD_SUFFIX, library_path)
+
+        if os.path.exists(hot_path):
+            os.remove(hot_path)
+
+        with self._lock:
+            self.promoted.pop(rel_path, None)
+            self._save_state()
+
+        if info.get("mode") == TIER_MODE_EXTRA_PATHS:
+            self.write_extra_model_paths()
+
+    def forget(self, path: str):
+        """Drop a deleted model from the tier, removing its hot and cold copies"""
+        rel_path = self._relative(path)
+        if not rel_path:
+            return
+
+        with self._lock:
+            self.usage.pop(rel_path, None)
+            info = self.promoted.pop(rel_path, None)
+            self._save_state()
+
+        if info:
+            for leftover in (self._hot_path(rel_path), self._library_path(rel_path) + COLD_SUFFIX):
+                try:
+                    os.remove(leftover)
+                except OSError:
+                    pass
+
+    def _recover_interrupted(self):
+        """Undo half-finished symlink swaps left behind by a crash"""
+        for rel_path in list(self.usage) + list(self.promoted):
+            library_path = self._library_path(rel_path)
+            if os.path.exists(library_path + COLD_SUFFIX) and not os.path.lexists(library_path):
+                os.replace(library_path + COLD_SUFFIX, library_path)
+                self.promoted.pop(rel_path, None)
+
+    # ----- ComfyUI extra_model_paths.yaml -----
+
+    def write_extra_model_paths(self) -> bool:
+        """Register the hot directory in ComfyUI's extra_model_paths.yaml.
+
+        Only the block between our markers is rewritten; anything else the user
+        keeps in the file is preserved.
+        """
+        if not self.comfyui_path or not os.path.isdir(self.comfyui_path):
+            return False
+
+        yaml_path = os.path.join(self.comfyui_path, "extra_model_paths.yaml")
+        existing = ""
+        if os.path.exists(yaml_path):
+            with open(yaml_path, "r") as f:
+                existing = f.read()
+
+        # Strip our previous block
+        if EXTRA_PATHS_BEGIN in existing:
+            before, _, rest = existing.partition(EXTRA_PATHS_BEGIN)
+            _, _, after = rest.partition(EXTRA_PATHS_END)
+            existing = (before.rstrip("\n") + "\n" + after.lstrip("\n")).strip("\n")
+
+        with self._lock:
+            folders = sorted({
+                rel_path.split("/")[0] for rel_path, info in self.promoted.items()
+                if info.get("mode") == TIER_MODE_EXTRA_PATHS and "/" in rel_path
+            })
+
+        block = ""
+        if folders:
+            lines = [
+                EXTRA_PATHS_BEGIN,
+                f"{EXTRA_PATHS_KEY}:",
+                f"    base_path: {json.dumps(self.hot_root)}",
+                "    is_default: true"
+            ]
+            lines.extend(f"    {folder}: {folder}/" for folder in folders)
+            lines.append(EXTRA_PATHS_END)
+            block = "\n".join(lines)
+
+        content = "\n\n".join(part for part in (existing, block) if part)
+        with open(yaml_path, "w") as f:
+            f.write(content + "\n" if content else "")
+        return True
+
+    # ----- persistence and status -----
+
+    def _load_state(self) -> Dict[str, Any]:
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading hot tier state: {str(e)}")
+        return {}
+
+    def _save_state(self):
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            temp_file = self.state_file + ".tmp"
+            with open(temp_file, "w") as f:
+                json.dump({"usage": self.usage, "promoted": self.promoted}, f, indent=2)
+            os.replace(temp_file, self.state_file)
+        except Exception as e:
+            print(f"Error saving hot tier state: {str(e)}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the hot tier configuration, contents and pending work"""
+        with self._lock:
+            used = sum(info.get("size", 0) for info in self.promoted.values())
+            return {
+                "enabled": self.enabled,
+                "mode": self.mode,
+                "hot_path": self.hot_root,
+                "budget_bytes": self.budget_bytes,
+                "used_bytes": used,
+                "promoted": [
+                    {"path": rel_path, **info, **self.usage.get(rel_path, {})}
+                    for rel_path, info in sorted(self.promoted.items())
+                ],
+                "pending": [{"action": a, "path": p} for a, p in sorted(self._pending)],
+                "current": self._current_op,
+                "tracked_models": len(self.usage),
+                "last_error": self.last_error
+            }
+
+# One tier manager per models directory
+_tier_managers: Dict[str, ModelTierManager] = {}
+_tier_managers_lock = threading.Lock()
+
+def get_model_tier_manager(models_dir: str, settings: Dict[str, Any]) -> ModelTierManager:
+    """Get the tier manager for a models directory, configured from settings"""
+    models_dir = os.path.abspath(models_dir)
+    with _tier_managers_lock:
+        manager = _tier_managers.get(models_dir)
+        if manager is None:
+            state_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "model_tier.json")
+            manager = ModelTierManager(models_dir, state_file)
+            _tier_managers[models_dir] = manager
+
+    manager.configure(settings)
+    if manager.enabled:
+        manager.start(float(settings.get("hotTierRebalanceInterval", 300)))
+    return manager
@@ -0,0 +1,373 @@
+import os
+import sys
+import json
+import time
+import uuid
+import errno
+import shutil
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.model_index import get_model_index
+from utils.model_manager import resolve_models_path
+from utils.directory_sizer import get_directory_sizer
+
+# Bytes moved per copy call; small enough for responsive progress and throttling
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# Suffix of files being copied; kept on cancel so the copy can resume
+PARTIAL_SUFFIX = ".partial"
+
+# Files registered in the model index when a folder is copied
+MODEL_EXTENSIONS = ('.safetensors', '.ckpt', '.pt', '.bin', '.pth')
+
+# ioctl(FICLONE) shares the source extents on CoW filesystems (btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+# Dictionary to track move/copy jobs
+active_transfers: Dict[str, Dict[str, Any]] = {}
+_transfer_threads: Dict[str, threading.Thread] = {}
+_cancel_events: Dict[str, threading.Event] = {}
+_transfers_lock = threading.Lock()
+
+TRANSFERS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "transfers.json")
+
+def _save_transfers():
+    """Persist job state so unfinished jobs can be resumed after a restart"""
+    try:
+        with _transfers_lock:
+            data = json.dumps(active_transfers, indent=2)
+        os.makedirs(os.path.dirname(TRANSFERS_FILE), exist_ok=True)
+        temp_file = TRANSFERS_FILE + ".tmp"
+        with open(temp_file, "w") as f:
+            f.write(data)
+        os.replace(temp_file, TRANSFERS_FILE)
+    except Exception as e:
+        print(f"Error saving transfers: {str(e)}")
+
+def _load_transfers():
+    """Load jobs from a previous run; running ones become interrupted"""
+    if not os.path.exists(TRANSFERS_FILE):
+        return
+    try:
+        with open(TRANSFERS_FILE, "r") as f:
+            jobs = json.load(f)
+        for transfer_id, job in jobs.items():
+            if job.get("status") in ("queued", "running"):
+                job["status"] = "interrupted"
+            active_transfers[transfer_id] = job
+    except Exception as e:
+        print(f"Error loading transfers: {str(e)}")
+
+_load_transfers()
+
+class _Throttle:
+    """Sleep as needed to keep throughput under a byte-per-second cap"""
+
+    def __init__(self, limit_bytes_per_second: Optional[float]):
+        self.limit = limit_bytes_per_second or 0
+        self.start = time.monotonic()
+        self.sent = 0
+
+    def chunk_size(self) -> int:
+        # Keep chunks to roughly a quarter second of budget so the cap stays smooth
+        if self.limit:
+            return max(64 * 1024, min(CHUNK_SIZE, int(self.limit / 4)))
+        return CHUNK_SIZE
+
+    def account(self, nbytes: int):
+        self.sent += nbytes
+        if self.limit:
+            ahead = self.sent / self.limit - (time.monotonic() - self.start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+def _try_reflink(src_fd: int, dst_fd: int) -> bool:
+    """Clone the whole file without copying data, where the filesystem allows it"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except (OSError, ImportError):
+        return False
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    """Copy bytes inside the kernel when possible, falling back to read/write"""
+    if hasattr(os, "copy_file_range"):
+        try:
+            return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL):
+                raise
+
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        try:
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            return os.sendfile(dst_fd, src_fd, offset, count)
+        except OSError as e:
+            if e.errno not in (errno.ENOSYS, errno.EINVAL):
+                raise
+
+    data = os.pread(src_fd, count, offset) if hasattr(os, "pread") else _read_at(src_fd, count, offset)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    return os.write(dst_fd, data)
+
+def _read_at(fd: int, count: int, offset: int) -> bytes:
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, count)
+
+def _copy_file(src: str, dst: str, job: Dict[str, Any], throttle: _Throttle, cancel: threading.Event,
+               resume: bool = False) -> bool:
+    """Copy one file through a .partial file. Returns False if cancelled.
+
+    With resume, whatever an earlier attempt of this job wrote to the
+    .partial file is kept; otherwise the copy starts from zero.
+    """
+    size = os.path.getsize(src)
+    partial = dst + PARTIAL_SUFFIX
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+
+    offset = os.path.getsize(partial) if resume and os.path.exists(partial) else 0
+    if offset > size:
+        offset = 0
+
+    base_done = job["bytes_done"]
+    src_fd = os.open(src, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        dst_fd = os.open(partial, os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            if offset == 0 and not throttle.limit and _try_reflink(src_fd, dst_fd):
+                job["method"] = "reflink"
+                offset = size
+            else:
+                os.ftruncate(dst_fd, offset)
+                while offset < size:
+                    if cancel.is_set():
+                        return False
+                    copied = _copy_range(src_fd, dst_fd, offset, min(throttle.chunk_size(), size - offset))
+                    if copied <= 0:
+                        raise IOError(f"Unexpected end of file while copying {src}")
+                    offset += copied
+                    job["bytes_done"] = base_done + offset
+                    job["timestamp"] = time.time()
+                    throttle.account(copied)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+    shutil.copystat(src, partial)
+    os.replace(partial, dst)
+    job["bytes_done"] = base_done + size
+    return True
+
+def _list_files(source: str) -> List[Tuple[str, int]]:
+    """List the files of a transfer with their paths relative to the source"""
+    if os.path.isfile(source):
+        return [(os.path.basename(source), os.path.getsize(source))]
+
+    files = []
+    for root, _, names in os.walk(source):
+        for name in names:
+            if name.endswith(PARTIAL_SUFFIX):
+                continue
+            path = os.path.join(root, name)
+            files.append((os.path.relpath(path, os.path.dirname(source)), os.path.getsize(path)))
+    return files
+
+def get_storage_roots(settings: Dict[str, Any]) -> List[str]:
+    """Directories transfers may read from and write to: the models folder,
+    the hot tier, the selected storage path and modelStorageRoots"""
+    roots = [resolve_models_path(settings), settings.get("hotTierPath", ""), settings.get("selectedStoragePath", "")]
+    roots.extend(settings.get("modelStorageRoots") or [])
+    return [os.path.realpath(root) for root in roots if root]
+
+def _under(path: str, roots: List[str], allow_root: bool) -> bool:
+    path = os.path.realpath(path)
+    for root in roots:
+        try:
+            if os.path.commonpath([root, path]) == root and (allow_root or path != root):
+                return True
+        except ValueError:
+            # Different drives on Windows
+            continue
+    return False
+
+def _run_transfer(transfer_id: str):
+    """Background task for a move/copy job"""
+    job = active_transfers[transfer_id]
+    cancel = _cancel_events[transfer_id]
+    source = job["source"]
+    destination = job["destination"]
+    target = os.path.join(destination, os.path.basename(source.rstrip(os.sep)))
+
+    try:
+        # Files this job finished in an earlier attempt; the only ones skipped
+        done = set(job.setdefault("files_done", []))
+        # The file an earlier attempt was in the middle of; its .partial is ours to resume
+        resume_file = job.get("current_file")
+        job.update({"status": "running", "bytes_done": 0, "error": None, "timestamp": time.time()})
+        os.makedirs(destination, exist_ok=True)
+
+        # Same device: a move is just a rename
+        if job["mode"] == "move" and os.stat(source).st_dev == os.stat(destination).st_dev:
+            if os.path.exists(target):
+                raise FileExistsError(f"Destination already exists: {target}")
+            os.rename(source, target)
+            job["method"] = "rename"
+            job["bytes_done"] = job["bytes_total"]
+        else:
+            throttle = _Throttle(job.get("bandwidth_limit"))
+            job.setdefault("method", "copy_file_range" if hasattr(os, "copy_file_range") else "copy")
+            base = os.path.dirname(source.rstrip(os.sep))
+            files = _list_files(source)
+
+            # Never replace files this job didn't write unless asked to; a move
+            # would otherwise delete the source after clobbering them
+            conflicts = [
+                rel_path for rel_path, _ in files
+                if rel_path not in done and os.path.lexists(os.path.join(destination, rel_path))
+            ]
+            if conflicts and not job.get("overwrite"):
+                shown = ", ".join(conflicts[:5]) + (f" and {len(conflicts) - 5} more" if len(conflicts) > 5 else "")
+                raise FileExistsError(f"Destination already has {shown}; retry with overwrite to replace")
+
+            for rel_path, size in files:
+                src = os.path.join(base, rel_path)
+                dst = os.path.join(destination, rel_path)
+
+                if rel_path in done:
+                    job["bytes_done"] += size
+                    continue
+
+                job["current_file"] = rel_path
+                if not _copy_file(src, dst, job, throttle, cancel, resume=rel_path == resume_file):
+                    job["status"] = "cancelled"
+                    return
+                job["files_done"].append(rel_path)
+                done.add(rel_path)
+                _save_transfers()
+
+            if job["mode"] == "move":
+                if os.path.isdir(source):
+                    shutil.rmtree(source)
+                else:
+                    os.remove(source)
+
+        # Keep the model index in step with the new location
+        index = get_model_index()
+        if job["mode"] == "move":
+            index.move(source, target)
+        else:
+            for rel_path, _ in _list_files(target):
+                src_entry = index.get(os.path.join(os.path.dirname(source.rstrip(os.sep)), rel_path))
+                if not src_entry and not rel_path.endswith(MODEL_EXTENSIONS):
+                    continue
+                index.register(
+                    os.path.join(destination, rel_path),
+                    **{k: v for k, v in (src_entry or {}).items() if k not in ("size", "mtime", "added")}
+                )
+
+        job.update({"status": "completed", "target": target, "current_file": None})
+    except Exception as e:
+        job.update({"status": "failed", "error": str(e)})
+    finally:
+        job["timestamp"] = time.time()
+        _save_transfers()
+        sizer = get_directory_sizer()
+        sizer.invalidate(target)
+        if job["mode"] == "move":
+            sizer.invalidate(source)
+
+def _launch(transfer_id: str):
+    _cancel_events[transfer_id] = threading.Event()
+    thread = threading.Thread(target=_run_transfer, args=(transfer_id,), name=f"transfer-{transfer_id[:8]}", daemon=True)
+    _transfer_threads[transfer_id] = thread
+    thread.start()
+
+def start_transfer(source: str, destination: str, mode: str = "copy",
+                   bandwidth_limit_mbps: Optional[float] = None, roots: Optional[List[str]] = None,
+                   overwrite: bool = False) -> Dict[str, Any]:
+    """Start copying or moving a model file or folder into a destination directory.
+
+    Both paths must lie under one of roots (see get_storage_roots); the
+    source can't be a root itself. Existing files at the destination make
+    the job fail unless overwrite is set.
+    """
+    if mode not in ("copy", "move"):
+        return {"status": "error", "message": "Mode must be 'copy' or 'move'"}
+
+    source = os.path.abspath(source)
+    destination = os.path.abspath(destination)
+    if not os.path.exists(source):
+        return {"status": "error", "message": "Source not found"}
+    roots = roots or []
+    if not _under(source, roots, allow_root=False):
+        return {"status": "error", "message": "Source is not inside a configured storage location"}
+    if not _under(destination, roots, allow_root=True):
+        return {"status": "error", "message": "Destination is not inside a configured storage location"}
+    if destination == source or destination.startswith(source.rstrip(os.sep) + os.sep):
+        return {"status": "error", "message": "Destination cannot be inside the source"}
+
+    transfer_id = str(uuid.uuid4())
+    active_transfers[transfer_id] = {
+        "source": source,
+        "destination": destination,
+        "mode": mode,
+        "status": "queued",
+        "bandwidth_limit": bandwidth_limit_mbps * 1024 * 1024 if bandwidth_limit_mbps else None,
+        "overwrite": bool(overwrite),
+        "files_done": [],
+        "bytes_total": sum(size for _, size in _list_files(source)),
+        "bytes_done": 0,
+        "started": time.time(),
+        "timestamp": time.time()
+    }
+    _launch(transfer_id)
+
+    return {"transferId": transfer_id, "status": "started"}
+
+def resume_transfer(transfer_id: str) -> Dict[str, Any]:
+    """Resume a cancelled, failed or interrupted job from where it stopped"""
+    job = active_transfers.get(transfer_id)
+    if not job:
+        return {"transferId": transfer_id, "status": "not_found", "message": "Transfer not found"}
+    thread = _transfer_threads.get(transfer_id)
+    if thread and thread.is_alive():
+        return {"transferId": transfer_id, "status": "running", "message": "Transfer is already running"}
+    if job["status"] == "completed":
+        return {"transferId": transfer_id, "status": "completed", "message": "Transfer already completed"}
+
+    job["status"] = "queued"
+    _launch(transfer_id)
+    return {"transferId": transfer_id, "status": "resumed"}
+
+def cancel_transfer(transfer_id: str) -> Dict[str, Any]:
+    """Stop a job, keeping partial files so it can be resumed"""
+    if transfer_id not in active_transfers:
+        return {"transferId": transfer_id, "status": "not_found", "message": "Transfer not found"}
+    event = _cancel_events.get(transfer_id)
+    if event:
+        event.set()
+    return {"transferId": transfer_id, "status": "cancelling"}
+
+def get_transfer_status(transfer_id: str) -> Dict[str, Any]:
+    """Get the progress of a move/copy job"""
+    job = active_transfers.get(transfer_id)
+    if not job:
+        return {"transferId": transfer_id, "status": "not_found", "message": "Transfer not found"}
+
+    total = job.get("bytes_total", 0)
+    elapsed = max(time.time() - job.get("started", time.time()), 1e-6)
+    return {
+        "transferId": transfer_id,
+        **job,
+        "progress": round(job.get("bytes_done", 0) / total * 100, 1) if total else 100,
+        "speed_bytes": round(job.get("bytes_done", 0) / elapsed) if job["status"] == "running" else 0
+    }
+
+def get_all_transfers() -> List[Dict[str, Any]]:
+    """Get all move/copy jobs"""
+    return [get_transfer_status(transfer_id) for transfer_id in list(active_transfers)]
@@ -0,0 +1,186 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+import requests
+
+from utils.settings_manager import SettingsManager
+from utils.directory_sizer import WEIGHT_EXTENSIONS
+from utils.model_manager import resolve_models_path
+from utils.model_tiering import ModelTierManager, get_model_tier_manager
+from utils.comfyui_pool import get_comfyui_pool
+
+# Seconds between reads of ComfyUI's prompt history
+SYNC_INTERVAL = 60.0
+
+# Most recent prompts read from /history on each pass
+HISTORY_ITEMS = 200
+
+# Seconds an /history request may take
+HISTORY_TIMEOUT = 5.0
+
+# Prompt IDs remembered so a prompt is counted once
+SEEN_PROMPTS = 5000
+
+# Model folders a loader input usually points into, tried before any other folder
+INPUT_FOLDERS = {
+    "ckpt_name": ("checkpoints",),
+    "lora_name": ("loras",),
+    "vae_name": ("vae",),
+    "unet_name": ("unet", "diffusion_models"),
+    "clip_name": ("clip", "text_encoders", "clip_vision"),
+    "clip_name1": ("clip", "text_encoders"),
+    "clip_name2": ("clip", "text_encoders"),
+    "control_net_name": ("controlnet",),
+    "model_name": ("upscale_models",),
+    "style_model_name": ("style_models",),
+}
+
+def get_model_references(prompt: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(input name, value) of every node input in a prompt graph that names a model file"""
+    references = []
+    for node in prompt.values():
+        inputs = node.get("inputs") if isinstance(node, dict) else None
+        for name, value in (inputs or {}).items():
+            if isinstance(value, str) and value.lower().endswith(WEIGHT_EXTENSIONS):
+                references.append((name, value))
+    return references
+
+def resolve_reference(models_dir: str, input_name: str, value: str) -> Optional[str]:
+    """Find the file a loader input refers to (relative to one of the model folders)"""
+    parts = [part for part in value.replace("\\", "/").split("/") if part and part != ".."]
+    if not parts:
+        return None
+    folders = list(INPUT_FOLDERS.get(input_name, ()))
+    try:
+        with os.scandir(models_dir) as entries:
+            folders.extend(entry.name for entry in entries if entry.is_dir() and entry.name not in folders)
+    except OSError:
+        return None
+    for folder in folders:
+        path = os.path.join(models_dir, folder, *parts)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def _prompt_started(item: Dict[str, Any]) -> Optional[float]:
+    """When ComfyUI started running a history item, from its status messages"""
+    for message in (item.get("status") or {}).get("messages") or []:
+        if len(message) == 2 and message[0] == "execution_start":
+            timestamp = (message[1] or {}).get("timestamp")
+            if timestamp:
+                return timestamp / 1000
+    return None
+
+class ModelUsageTracker:
+    """Feed the hot tier ranking with the models ComfyUI actually loads.
+
+    Every running instance's /history is read periodically; each prompt
+    that was not counted before records a use of every model file its
+    loader nodes name, at the time the prompt started. On the first read
+    after a backend start, prompts no newer than the last recorded use are
+    skipped, as they were counted by the previous run.
+    """
+
+    def __init__(self):
+        self._seen: set = set()
+        self._seen_order: deque = deque()
+        self._primed: set = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_sync = 0.0
+        self.recorded_count = 0
+
+    def record_history(self, history: Dict[str, Any], tier_manager: ModelTierManager,
+                       source: str = "") -> int:
+        """Record the model uses of new prompts in a /history response; returns how many"""
+        with self._lock:
+            cutoff = None
+            if source not in self._primed:
+                self._primed.add(source)
+                cutoff = tier_manager.get_last_use()
+
+            recorded = 0
+            for prompt_id, item in history.items():
+                if prompt_id in self._seen or not isinstance(item, dict):
+                    continue
+                self._remember(prompt_id)
+                started = _prompt_started(item)
+                if cutoff is not None and (started is None or started <= cutoff):
+                    continue
+
+                prompt = item.get("prompt") or []
+                graph = prompt[2] if len(prompt) > 2 and isinstance(prompt[2], dict) else {}
+                paths = {
+                    resolve_reference(tier_manager.models_dir, name, value)
+                    for name, value in get_model_references(graph)
+                }
+                for path in paths:
+                    if path and tier_manager.record_use(path, started or time.time()):
+                        recorded += 1
+            self.recorded_count += recorded
+            return recorded
+
+    def _remember(self, prompt_id: str):
+        self._seen.add(prompt_id)
+        self._seen_order.append(prompt_id)
+        while len(self._seen_order) > SEEN_PROMPTS:
+            self._seen.discard(self._seen_order.popleft())
+
+    def sync(self, api_url: str, tier_manager: ModelTierManager) -> int:
+        """Read one instance's recent history and record its model uses"""
+        response = requests.get(f"{api_url}/history", params={"max_items": HISTORY_ITEMS}, timeout=HISTORY_TIMEOUT)
+        response.raise_for_status()
+        return self.record_history(response.json(), tier_manager, api_url)
+
+    def sync_all(self) -> int:
+        """Record the model uses of every running ComfyUI instance"""
+        settings_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "settings.json")
+        settings = SettingsManager(settings_file).get_settings()
+        models_path = resolve_models_path(settings)
+        if not models_path:
+            return 0
+        tier_manager = get_model_tier_manager(models_path, settings)
+
+        recorded = 0
+        for instance in list(get_comfyui_pool().instances.values()):
+            if instance.status != "running":
+                continue
+            try:
+                recorded += self.sync(instance.api_url, tier_manager)
+            except (requests.RequestException, ValueError) as e:
+                print(f"Error reading ComfyUI history from {instance.api_url}: {str(e)}")
+        self.last_sync = time.time()
+        return recorded
+
+    def start(self, interval: float = SYNC_INTERVAL):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="model-usage", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self, interval: float):
+        while not self._stop_event.wait(interval):
+            try:
+                self.sync_all()
+            except Exception as e:
+                print(f"Error recording model usage: {str(e)}")
+
+# Shared tracker, started by the app lifespan
+_model_usage_tracker: Optional[ModelUsageTracker] = None
+_model_usage_tracker_lock = threading.Lock()
+
+def get_model_usage_tracker() -> ModelUsageTracker:
+    """Get the shared model usage tracker"""
+    global _model_usage_tracker
+    with _model_usage_tracker_lock:
+        if _model_usage_tracker is None:
+            _model_usage_tracker = ModelUsageTracker()
+    return _model_usage_tracker
@@ -0,0 +1,145 @@
+import threading
+from typing import Dict, Any, List, Optional
+
+import psutil
+
+from utils.comfyui_manager import get_comfyui_supervisor
+from utils.gpu_telemetry import get_gpu_provider
+
+class ProcessTracker:
+    """Per-process resource accounting for the ComfyUI process tree.
+
+    The root process comes from the ComfyUI supervisor and is then followed
+    by PID; its children are re-listed each sample. psutil.Process objects are
+    kept between samples so cpu_percent() measures since the previous sample,
+    and each process is read inside oneshot() so the /proc files are parsed
+    once per sample rather than once per field.
+    """
+
+    def __init__(self, supervisor=None):
+        # The instance to follow; the shared supervisor when None
+        self.supervisor = supervisor
+        self._lock = threading.Lock()
+        self._root: Optional[psutil.Process] = None
+        self._processes: Dict[int, psutil.Process] = {}
+
+    def set_root_pid(self, pid: int):
+        """Follow a ComfyUI process started by ComfyDash without waiting for discovery"""
+        try:
+            process = psutil.Process(pid)
+        except psutil.Error:
+            return
+        with self._lock:
+            self._root = process
+            self._processes = {pid: process}
+
+    def _find_root(self) -> Optional[psutil.Process]:
+        if self._root is not None:
+            try:
+                if self._root.is_running() and self._root.status() != psutil.STATUS_ZOMBIE:
+                    return self._root
+            except psutil.Error:
+                pass
+            self._root = None
+            self._processes = {}
+
+        # The supervisor tracks (or discovers) the process; no process table scan here
+        pid = (self.supervisor or get_comfyui_supervisor()).pid
+        if pid is None:
+            return None
+        try:
+            self._root = psutil.Process(pid)
+        except psutil.Error:
+            return None
+        return self._root
+
+    def sample(self) -> Dict[str, Any]:
+        """Read CPU, memory, I/O, file and thread counts for the whole tree"""
+        with self._lock:
+            root = self._find_root()
+            if root is None:
+                return {"running": False, "root_pid": None, "process_count": 0, "totals": _empty_totals(), "processes": []}
+
+            try:
+                tree = [root] + root.children(recursive=True)
+            except psutil.Error:
+                tree = [root]
+
+            # Reuse cached Process objects so CPU percentages have a baseline
+            processes = {}
+            for process in tree:
+                processes[process.pid] = self._processes.get(process.pid, process)
+            self._processes = processes
+
+        gpu_memory = get_gpu_provider().get_process_memory()
+        rows = []
+        for pid, process in processes.items():
+            row = _read_process(process)
+            if row is None:
+                continue
+            row["gpu_memory"] = gpu_memory.get(pid, 0)
+            rows.append(row)
+
+        totals = _empty_totals()
+        for row in rows:
+            for key in totals:
+                totals[key] += row.get(key) or 0
+        totals = {key: round(value, 2) for key, value in totals.items()}
+
+        return {
+            "running": True,
+            "root_pid": root.pid,
+            "process_count": len(rows),
+            "totals": totals,
+            "processes": sorted(rows, key=lambda row: -row["rss"])
+        }
+
+def _empty_totals() -> Dict[str, float]:
+    return {
+        "cpu_percent": 0,
+        "rss": 0,
+        "uss": 0,
+        "io_read": 0,
+        "io_write": 0,
+        "open_files": 0,
+        "threads": 0,
+        "gpu_memory": 0
+    }
+
+def _read_process(process: psutil.Process) -> Optional[Dict[str, Any]]:
+    """Read one process in a single oneshot() batch; None if it went away"""
+    try:
+        with process.oneshot():
+            row = {
+                "pid": process.pid,
+                "ppid": process.ppid(),
+                "name": process.name(),
+                "cpu_percent": process.cpu_percent(None),
+                "threads": process.num_threads(),
+                "rss": round(process.memory_info().rss / (1024**2), 1),  # MB
+                "uss": None,
+                "io_read": None,
+                "io_write": None,
+                "open_files": None
+            }
+            # Fields below need more privileges or are not on every platform
+            try:
+                row["uss"] = round(process.memory_full_info().uss / (1024**2), 1)  # MB
+            except (psutil.AccessDenied, AttributeError):
+                pass
+            try:
+                io = process.io_counters()
+                row["io_read"] = round(io.read_bytes / (1024**2), 1)  # MB
+                row["io_write"] = round(io.write_bytes / (1024**2), 1)  # MB
+            except (psutil.AccessDenied, AttributeError):
+                pass
+            try:
+                row["open_files"] = len(process.open_files())
+            except psutil.AccessDenied:
+                pass
+        return row
+    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+        return None
+    except psutil.AccessDenied:
+        return {"pid": process.pid, "ppid": None, "name": "?", "cpu_percent": 0, "threads": 0, "rss": 0,
+                "uss": None, "io_read": None, "io_write": None, "open_files": None}
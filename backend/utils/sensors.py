@@ -0,0 +1,266 @@
+import os
+import re
+import glob
+import threading
+from typing import Dict, Any, List, Optional
+
+import psutil
+
+HWMON_ROOT = "/sys/class/hwmon"
+THERMAL_ROOT = "/sys/class/thermal"
+
+# hwmon driver names by the kind of device they measure
+CPU_DRIVERS = ("coretemp", "k10temp", "zenpower", "cpu_thermal", "cpu-thermal", "soc_thermal")
+GPU_DRIVERS = ("amdgpu", "radeon", "nouveau", "i915", "xe")
+NVME_DRIVERS = ("nvme",)
+
+# Readings outside this range are treated as bogus
+VALID_RANGE = (-40.0, 150.0)
+
+class Sensor:
+    """One temperature input, kept open so a reading is a single pread"""
+
+    __slots__ = ("id", "label", "kind", "device", "path", "fd")
+
+    def __init__(self, sensor_id: str, label: str, kind: str, device: str, path: str):
+        self.id = sensor_id
+        self.label = label
+        self.kind = kind
+        self.device = device
+        self.path = path
+        self.fd: Optional[int] = None
+
+    def open(self) -> bool:
+        try:
+            self.fd = os.open(self.path, os.O_RDONLY)
+            return True
+        except OSError:
+            self.fd = None
+            return False
+
+    def read(self) -> Optional[float]:
+        if self.fd is None:
+            return None
+        try:
+            # sysfs attributes are regenerated on every read from offset 0
+            value = int(os.pread(self.fd, 32, 0).strip()) / 1000.0
+        except (OSError, ValueError):
+            return None
+        return value if VALID_RANGE[0] < value < VALID_RANGE[1] else None
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+def classify(driver: str, label: str) -> str:
+    """Kind of a sensor: cpu_package, cpu_core, gpu, nvme or other"""
+    driver = driver.lower()
+    label = label.lower()
+    if driver in CPU_DRIVERS:
+        # coretemp: "Package id 0" / "Core 3"; k10temp: "Tctl"/"Tdie" / "Tccd1"
+        if label.startswith(("package", "tctl", "tdie")) or driver.endswith("thermal"):
+            return "cpu_package"
+        if label.startswith(("core", "tccd")):
+            return "cpu_core"
+        return "cpu_package" if not label or label.startswith("temp") else "other"
+    if driver in GPU_DRIVERS:
+        return "gpu"
+    if driver in NVME_DRIVERS:
+        return "nvme"
+    return "other"
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+class SensorRegistry:
+    """Temperature sensors discovered once and read through open handles.
+
+    Discovery walks hwmon (falling back to thermal zones, then to
+    psutil.sensors_temperatures on platforms without sysfs), classifies each
+    input as CPU package, CPU core, GPU, NVMe or other, and keeps the file
+    open. Later reads cost one pread per sensor and no directory scans.
+    """
+
+    def __init__(self, hwmon_root: str = HWMON_ROOT, thermal_root: str = THERMAL_ROOT):
+        self.hwmon_root = hwmon_root
+        self.thermal_root = thermal_root
+        self.sensors: List[Sensor] = []
+        self.source = "none"
+        self._zones: Optional[List[Sensor]] = None
+        self._lock = threading.Lock()
+        self._discovered = False
+
+    def discover(self) -> List[Dict[str, Any]]:
+        """(Re)discover sensors and open their handles"""
+        with self._lock:
+            for sensor in self.sensors + (self._zones or []):
+                sensor.close()
+            self._zones = None
+
+            sensors = self._discover_hwmon()
+            source = "hwmon"
+            if not sensors:
+                sensors = self._discover_thermal_zones()
+                source = "thermal_zone"
+
+            self.sensors = [sensor for sensor in sensors if sensor.open()]
+            self.source = source if self.sensors else ("psutil" if _psutil_has_sensors() else "none")
+            self._discovered = True
+        return self.describe()
+
+    def _discover_hwmon(self) -> List[Sensor]:
+        sensors = []
+        for hwmon in sorted(glob.glob(os.path.join(self.hwmon_root, "hwmon*"))):
+            driver = _read_text(os.path.join(hwmon, "name")) or os.path.basename(hwmon)
+            device = _device_name(hwmon) or driver
+            for input_path in sorted(glob.glob(os.path.join(hwmon, "temp*_input")), key=_natural_key):
+                base = input_path[:-len("_input")]
+                label = _read_text(base + "_label") or os.path.basename(base)
+                sensor_id = f"{_slug(device)}.{_slug(label)}"
+                sensors.append(Sensor(sensor_id, label, classify(driver, label), device, input_path))
+        return sensors
+
+    def _discover_thermal_zones(self) -> List[Sensor]:
+        sensors = []
+        for zone in sorted(glob.glob(os.path.join(self.thermal_root, "thermal_zone*")), key=_natural_key):
+            zone_type = _read_text(os.path.join(zone, "type")) or os.path.basename(zone)
+            kind = "cpu_package" if zone_type in ("x86_pkg_temp",) or "cpu" in zone_type.lower() else "other"
+            sensor_id = f"{_slug(os.path.basename(zone))}.{_slug(zone_type)}"
+            sensors.append(Sensor(sensor_id, zone_type, kind, os.path.basename(zone), os.path.join(zone, "temp")))
+        return sensors
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Discovered sensors without readings"""
+        return [
+            {"id": sensor.id, "label": sensor.label, "kind": sensor.kind, "device": sensor.device}
+            for sensor in self.sensors
+        ]
+
+    def read(self) -> List[Dict[str, Any]]:
+        """Read every sensor"""
+        if not self._discovered:
+            self.discover()
+
+        if self.source == "psutil":
+            return _read_psutil()
+
+        with self._lock:
+            readings = []
+            for sensor in self.sensors:
+                value = sensor.read()
+                if value is not None:
+                    readings.append({
+                        "id": sensor.id,
+                        "label": sensor.label,
+                        "kind": sensor.kind,
+                        "device": sensor.device,
+                        "value": round(value, 1)
+                    })
+            return readings
+
+    def thermal_zone_temperature(self) -> Optional[float]:
+        """First valid thermal zone reading, for hosts where no sensor is a CPU one.
+
+        When hwmon was used the zones are opened on the first call and kept.
+        """
+        with self._lock:
+            if self.source == "thermal_zone":
+                zones = self.sensors
+            else:
+                if self._zones is None:
+                    self._zones = [zone for zone in self._discover_thermal_zones() if zone.open()]
+                zones = self._zones
+            for zone in zones:
+                value = zone.read()
+                if value is not None:
+                    return round(value, 1)
+        return None
+
+    def close(self):
+        with self._lock:
+            for sensor in self.sensors + (self._zones or []):
+                sensor.close()
+            self.sensors = []
+            self._zones = None
+            self._discovered = False
+
+def cpu_temperature(readings: List[Dict[str, Any]]) -> Optional[float]:
+    """CPU temperature from sensor readings: hottest package, else hottest core"""
+    for kind in ("cpu_package", "cpu_core"):
+        values = [reading["value"] for reading in readings if reading["kind"] == kind]
+        if values:
+            return max(values)
+    return None
+
+def _psutil_has_sensors() -> bool:
+    try:
+        return bool(getattr(psutil, "sensors_temperatures", None) and psutil.sensors_temperatures())
+    except Exception:
+        return False
+
+def _read_psutil() -> List[Dict[str, Any]]:
+    """Sensors through psutil where sysfs isn't available (re-read each time)"""
+    try:
+        groups = psutil.sensors_temperatures()
+    except Exception:
+        return []
+    readings = []
+    for driver, entries in groups.items():
+        for i, entry in enumerate(entries):
+            label = entry.label or f"temp{i + 1}"
+            if entry.current is None or not VALID_RANGE[0] < entry.current < VALID_RANGE[1]:
+                continue
+            readings.append({
+                "id": f"{_slug(driver)}.{_slug(label)}",
+                "label": label,
+                "kind": classify(driver, label),
+                "device": driver,
+                "value": round(entry.current, 1)
+            })
+    return readings
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _device_name(hwmon: str) -> Optional[str]:
+    """Name of the device behind a hwmon node, e.g. nvme0 or card0, to tell identical drivers apart"""
+    driver = _read_text(os.path.join(hwmon, "name"))
+    device_link = os.path.join(hwmon, "device")
+    if driver in NVME_DRIVERS:
+        nvme = glob.glob(os.path.join(device_link, "nvme", "nvme*")) or glob.glob(os.path.join(device_link, "nvme*"))
+        if nvme:
+            return os.path.basename(nvme[0])
+    if driver in GPU_DRIVERS:
+        cards = glob.glob(os.path.join(device_link, "drm", "card[0-9]*"))
+        if cards:
+            return f"{driver}_{os.path.basename(cards[0])}"
+    if driver and len(glob.glob(os.path.join(os.path.dirname(hwmon), "hwmon*"))) > 1:
+        # Same driver on several nodes (multi-socket coretemp): keep them apart
+        siblings = [h for h in glob.glob(os.path.join(os.path.dirname(hwmon), "hwmon*"))
+                    if _read_text(os.path.join(h, "name")) == driver]
+        if len(siblings) > 1:
+            return f"{driver}_{os.path.basename(hwmon)}"
+    return driver
+
+def _natural_key(path: str):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path)]
+
+# Shared registry, discovered on first use
+_sensor_registry: Optional[SensorRegistry] = None
+_sensor_registry_lock = threading.Lock()
+
+def get_sensor_registry() -> SensorRegistry:
+    """Get the shared sensor registry"""
+    global _sensor_registry
+    with _sensor_registry_lock:
+        if _sensor_registry is None:
+            _sensor_registry = SensorRegistry()
+    return _sensor_registry
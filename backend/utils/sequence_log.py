@@ -0,0 +1,99 @@
+import json
+import asyncio
+import itertools
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+# Seconds a stream waits for new entries before sending a keep-alive comment
+KEEPALIVE_INTERVAL = 15.0
+
+class SequenceLog:
+    """Bounded, thread-safe log of entries numbered by a growing sequence.
+
+    Readers remember the last sequence number they saw and ask for what came
+    after it, so polling clients and live streams share one buffer without
+    per-reader state on the server. Entries older than maxlen are dropped.
+    Open streams wait on an asyncio.Event that append sets through their
+    event loop, so an idle stream holds no thread.
+    """
+
+    def __init__(self, maxlen: int):
+        self._entries: deque = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self.last_seq = 0
+
+    def append(self, entry: Dict[str, Any]) -> int:
+        """Add an entry; it gets the next sequence number as "seq" """
+        with self._lock:
+            self.last_seq += 1
+            entry["seq"] = self.last_seq
+            self._entries.append(entry)
+            waiters = list(self._waiters)
+            seq = self.last_seq
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The stream's loop closed without unregistering
+                pass
+        return seq
+
+    def first_seq(self) -> int:
+        with self._lock:
+            return self._entries[0]["seq"] if self._entries else self.last_seq + 1
+
+    def since(self, seq: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """Entries after seq (oldest first, at most limit) and whether some were already dropped"""
+        with self._lock:
+            if seq >= self.last_seq:
+                return [], False
+            first = self._entries[0]["seq"] if self._entries else self.last_seq + 1
+            # Entries are contiguous, so the start index follows from the first sequence number
+            start = max(seq + 1 - first, 0)
+            # With a limit the caller continues from the last entry it got
+            stop = start + limit if limit is not None else None
+            entries = list(itertools.islice(self._entries, start, stop))
+        truncated = seq > 0 and seq + 1 < first
+        return entries, truncated
+
+    def tail(self, count: int) -> List[Dict[str, Any]]:
+        """The last count entries"""
+        with self._lock:
+            return list(self._entries)[-count:] if count > 0 else []
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def stream(self, seq: int, event: str, batch: int = 500):
+        """Server-sent events carrying every entry after seq as it arrives"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            yield "retry: 3000\n\n"
+            if seq > self.last_seq:
+                # Numbering restarted with the backend; start over from what is kept
+                yield f"event: reset\ndata: {json.dumps({'last': self.last_seq})}\n\n"
+                seq = 0
+            while True:
+                # Cleared before reading, so an append in between still wakes us
+                waiter[1].clear()
+                entries, truncated = self.since(seq)
+                if truncated:
+                    yield f"event: truncated\ndata: {json.dumps({'from': seq + 1, 'to': self.first_seq() - 1})}\n\n"
+                for start in range(0, len(entries), batch):
+                    chunk = entries[start:start + batch]
+                    yield f"id: {chunk[-1]['seq']}\nevent: {event}\ndata: {json.dumps(chunk, separators=(',', ':'))}\n\n"
+                if entries:
+                    seq = entries[-1]["seq"]
+                    continue
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
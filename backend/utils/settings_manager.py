@@ -30,9 +30,43 @@ class SettingsManager:
             "refreshInterval": 1000,  # Default to 1 second refresh interval
             "maxConcurrentDownloads": 3,
             "defaultModelType": "checkpoint",
+            "extractArchives": True,  # Extract .zip/.tar model packs while downloading
             "selectedGpuId": "0",  # Default GPU ID
             "selectedStoragePath": "",  # Default storage path
+            "modelStorageRoots": [],  # Further directories models may be moved or copied between
             "gpuMonitoringEnabled": True,  # Enable GPU monitoring
+            "gpuProvider": "auto",  # "auto", "nvml", "nvidia-smi", "fake" or "none"
+            "metricsSampleInterval": 1.0,  # Seconds between background system stat samples
+            # Threshold alerts evaluated on every sample; "clear" is the hysteresis level
+            "alertRules": [
+                {"id": "models-disk-free", "metric": "storage.models.free_gb", "op": "<", "threshold": 20, "clear": 25, "severity": "critical"},
+                {"id": "vram-high", "metric": "gpu.*.memory_percent", "op": ">", "threshold": 95, "clear": 90, "for": 60, "severity": "warning"},
+                {"id": "gpu-thermal-throttle", "metric": "gpu.*.throttle_thermal", "op": ">=", "threshold": 1, "for": 10, "severity": "warning"}
+            ],
+            "alertWebhookUrl": "",  # Optional URL alert events are POSTed to as JSON
+            "comfyuiStatusTTL": 2.0,  # Seconds a ComfyUI API probe result is reused
+            "comfyuiProbeInterval": 5.0,  # Seconds between background ComfyUI API probes
+            # Extra ComfyUI instances: {name, port, gpu ("auto", index or "cpu"), cpuAffinity, extraArgs}
+            "comfyuiInstances": [],
+            # Copy of the captured ComfyUI output in data/logs, rotated by size
+            "comfyuiLogPersist": False,
+            "comfyuiLogMaxMB": 10,
+            "comfyuiLogBackups": 3,
+            # Indexed archive of ComfyUI output behind /api/comfyui/logs/search
+            "comfyuiLogIndexEnabled": True,
+            "comfyuiLogIndexMaxMB": 256,
+            "thumbnailCacheSizeMB": 256,  # Disk budget for cached preview thumbnails
+            # Hot tier: keep recently used models on a fast local volume
+            "hotTierEnabled": False,
+            "hotTierPath": "",  # Directory on the fast volume
+            "hotTierBudgetGB": 100,
+            "hotTierMode": "symlink",  # "symlink" or "extra_model_paths"
+            "hotTierMinHits": 1,
+            "hotTierRebalanceInterval": 300,  # Seconds between background rebalances
+            # Page cache warmup of model files when ComfyUI starts
+            "preloadOnStart": False,
+            "preloadModels": [],  # Model files always warmed
+            "preloadLearnedCount": 3,  # Also warm this many most recently used models
             # API keys for external services
             "civitaiApiKey": "",  # CivitAI API key
             "huggingfaceApiKey": "",  # Hugging Face API key
@@ -0,0 +1,182 @@
+import json
+import time
+import asyncio
+import threading
+from typing import Dict, Any, Optional, Set
+
+from utils.metrics_sampler import MetricsSampler, get_metrics_sampler
+
+# Updates a subscriber may have waiting before it counts as too slow
+QUEUE_SIZE = 4
+
+# Seconds between keep-alive comments so proxies keep idle streams open
+KEEPALIVE_INTERVAL = 15.0
+
+# Key of a keyed list holding the item keys in list order
+ORDER_KEY = "#"
+
+# Fields identifying list items (processes, sensors, GPUs), in order of preference
+ITEM_KEY_FIELDS = ("pid", "id", "index")
+
+def _item_key(item: Any, position: int) -> str:
+    if isinstance(item, dict):
+        for field in ITEM_KEY_FIELDS:
+            if item.get(field) is not None:
+                return str(item[field])
+    return str(position)
+
+def to_keyed(value: Any) -> Any:
+    """Turn lists into objects keyed by item identity, so patches reach into them.
+
+    A list becomes {"#": [keys in order], key: item, ...}, keyed by the
+    item's pid, id or index field, else its position. A merge patch then
+    carries only the changed fields of the changed items, and the order
+    list only when items come, go or move. Lists with duplicate keys fall
+    back to positions.
+    """
+    if isinstance(value, dict):
+        return {key: to_keyed(child) for key, child in value.items()}
+    if isinstance(value, list):
+        keys = [_item_key(item, position) for position, item in enumerate(value)]
+        if len(set(keys)) != len(keys):
+            keys = [str(position) for position in range(len(value))]
+        keyed: Dict[str, Any] = {ORDER_KEY: keys}
+        keyed.update((key, to_keyed(item)) for key, item in zip(keys, value))
+        return keyed
+    return value
+
+def merge_patch(old: Any, new: Any) -> Any:
+    """JSON merge patch (RFC 7386) turning old into new; None if nothing changed.
+
+    Only changed keys are sent and removed keys become null. Lists are
+    replaced as a whole, so states are passed through to_keyed first.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return None if old == new else new
+
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+            continue
+        child = merge_patch(old[key], value)
+        if child is not None or (value is None and old[key] is not None):
+            patch[key] = child
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch or None
+
+class StatsSubscriber:
+    """One open stream with its own update rate and bounded queue"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.last_state: Optional[Dict[str, Any]] = None
+        self.next_due = 0.0
+        self.dropped = False
+
+class StatsBroadcaster:
+    """Fan sampler snapshots out to every open stats stream.
+
+    The sampler thread hands each snapshot to the event loop once, where it
+    is keyed (see to_keyed) once; every subscriber then gets a merge patch
+    against what it last received, at its own rate. Subscribers whose queue is full are dropped rather than
+    buffered, so a stalled tab cannot grow memory and the sampling cost stays
+    the same however many tabs are open.
+    """
+
+    def __init__(self, sampler: MetricsSampler):
+        self.sampler = sampler
+        self._subscribers: Set[StatsSubscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.dropped_count = 0
+
+    def subscribe(self, interval: float) -> StatsSubscriber:
+        """Open a subscription; must be called from the event loop"""
+        subscriber = StatsSubscriber(max(interval, self.sampler.interval))
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            if not self._subscribers:
+                self.sampler.add_listener(self._on_snapshot)
+            self._subscribers.add(subscriber)
+
+        # Start every stream with the full current state
+        snapshot = self.sampler.get_snapshot()
+        if snapshot:
+            self._offer(subscriber, to_keyed(snapshot), time.monotonic())
+        return subscriber
+
+    def unsubscribe(self, subscriber: StatsSubscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                self.sampler.remove_listener(self._on_snapshot)
+
+    def get_subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def _on_snapshot(self, snapshot: Dict[str, Any]):
+        # Called on the sampler thread
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._publish, snapshot)
+
+    def _publish(self, snapshot: Dict[str, Any]):
+        now = time.monotonic()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        snapshot = to_keyed(snapshot)
+        for subscriber in subscribers:
+            if now >= subscriber.next_due:
+                self._offer(subscriber, snapshot, now)
+
+    def _offer(self, subscriber: StatsSubscriber, snapshot: Dict[str, Any], now: float):
+        patch = merge_patch(subscriber.last_state, snapshot) if subscriber.last_state else snapshot
+        subscriber.next_due = now + subscriber.interval
+        if patch is None:
+            return
+        try:
+            subscriber.queue.put_nowait(patch)
+            subscriber.last_state = snapshot
+        except asyncio.QueueFull:
+            subscriber.dropped = True
+            self.dropped_count += 1
+            self.unsubscribe(subscriber)
+
+    async def stream(self, interval: float):
+        """Server-sent events: a keyed "snapshot" event, then "delta" merge patches"""
+        subscriber = self.subscribe(interval)
+        first = True
+        try:
+            yield "retry: 3000\n\n"
+            while not subscriber.dropped:
+                try:
+                    patch = await asyncio.wait_for(subscriber.queue.get(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if subscriber.dropped:
+                    break
+                event = "snapshot" if first else "delta"
+                first = False
+                yield f"event: {event}\ndata: {json.dumps(patch, separators=(',', ':'))}\n\n"
+            if subscriber.dropped:
+                yield "event: dropped\ndata: {}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+# Shared broadcaster on top of the shared sampler
+_stats_broadcaster: Optional[StatsBroadcaster] = None
+_stats_broadcaster_lock = threading.Lock()
+
+def get_stats_broadcaster() -> StatsBroadcaster:
+    """Get the shared stats broadcaster"""
+    global _stats_broadcaster
+    with _stats_broadcaster_lock:
+        if _stats_broadcaster is None:
+            _stats_broadcaster = StatsBroadcaster(get_metrics_sampler())
+    return _stats_broadcaster
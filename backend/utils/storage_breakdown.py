@@ -0,0 +1,154 @@
+import os
+import time
+from typing import Dict, Any, List, Optional
+
+from utils.directory_sizer import DirectorySizer, WEIGHT_EXTENSIONS, get_directory_sizer
+
+# Largest files listed under each folder before the rest is grouped
+DEFAULT_TOP_FILES = 10
+
+def _leaf(name: str, size: int, **extra) -> Dict[str, Any]:
+    node = {"name": name, "size": size}
+    node.update(extra)
+    return node
+
+def _file_leaves(largest: List[tuple], total: int, top: int, base: str = "") -> List[Dict[str, Any]]:
+    """The top files as leaves plus one leaf for everything else, so children add up to the parent"""
+    leaves = []
+    for size, relative in largest[:top]:
+        leaves.append(_leaf(os.path.basename(relative), size, path=os.path.join(base, relative), type="file"))
+    rest = total - sum(leaf["size"] for leaf in leaves)
+    if rest > 0:
+        leaves.append(_leaf("(other files)", rest, type="other"))
+    return leaves
+
+def _folder(sizer: DirectorySizer, path: str, top: int) -> Dict[str, Any]:
+    summary = sizer.summarize(path, top)
+    return {
+        "name": os.path.basename(path),
+        "path": path,
+        "type": "folder",
+        "size": summary["size"],
+        "files": summary["files"],
+        "children": _file_leaves(summary["largest"], summary["size"], top, path)
+    }
+
+def _loose_files(listing: Dict[str, Any], path: str, top: int) -> Optional[Dict[str, Any]]:
+    """Files sitting directly in a directory, grouped as one node"""
+    if not listing["files"]:
+        return None
+    return {
+        "name": "(files)",
+        "path": path,
+        "type": "files",
+        "size": listing["size"],
+        "files": listing["files"],
+        "children": _file_leaves(listing["largest"], listing["size"], top, path)
+    }
+
+def _group(name: str, path: str, node_type: str, children: List[Dict[str, Any]]) -> Dict[str, Any]:
+    children.sort(key=lambda child: child["size"], reverse=True)
+    return {
+        "name": name,
+        "path": path,
+        "type": node_type,
+        "size": sum(child["size"] for child in children),
+        "files": sum(child.get("files", 0) for child in children),
+        "children": children
+    }
+
+def models_breakdown(models_dir: str, top: int = DEFAULT_TOP_FILES,
+                     sizer: Optional[DirectorySizer] = None) -> Dict[str, Any]:
+    """Model type -> folder -> largest files hierarchy of a models directory"""
+    sizer = sizer or get_directory_sizer()
+    root = sizer.list_dir(models_dir)
+    if root is None:
+        return _group("models", models_dir, "root", [])
+
+    types = []
+    for type_name in root["subdirs"]:
+        type_dir = os.path.join(models_dir, type_name)
+        listing = sizer.list_dir(type_dir)
+        if listing is None:
+            continue
+        children = [_folder(sizer, os.path.join(type_dir, folder), top) for folder in listing["subdirs"]]
+        loose = _loose_files(listing, type_dir, top)
+        if loose:
+            children.append(loose)
+        types.append(_group(type_name, type_dir, "model_type", children))
+
+    loose = _loose_files(root, models_dir, top)
+    if loose:
+        types.append(loose)
+    return _group("models", models_dir, "root", types)
+
+def _node_pack(sizer: DirectorySizer, path: str, top: int) -> Dict[str, Any]:
+    """One custom node pack split into .git, weights and code"""
+    summary = sizer.summarize(path, top * 4)
+    git_dir = os.path.join(path, ".git")
+    git = sizer.summarize(git_dir) if os.path.isdir(git_dir) else {"size": 0, "files": 0, "weights": 0}
+
+    weights_total = summary["weights"] - git["weights"]
+    weight_files = [
+        (size, relative) for size, relative in summary["largest"]
+        if relative.lower().endswith(WEIGHT_EXTENSIONS) and not relative.startswith(".git" + os.sep)
+    ]
+    children = [
+        _leaf(".git", git["size"], path=git_dir, type="git", files=git["files"]),
+        {
+            "name": "weights",
+            "path": path,
+            "type": "weights",
+            "size": weights_total,
+            "children": _file_leaves(weight_files, weights_total, top, path)
+        },
+        _leaf("code", summary["size"] - git["size"] - weights_total, path=path, type="code")
+    ]
+    return {
+        "name": os.path.basename(path),
+        "path": path,
+        "type": "node_pack",
+        "size": summary["size"],
+        "files": summary["files"],
+        "children": [child for child in children if child["size"] > 0]
+    }
+
+def custom_nodes_breakdown(custom_nodes_dir: str, top: int = DEFAULT_TOP_FILES,
+                           sizer: Optional[DirectorySizer] = None) -> Dict[str, Any]:
+    """Node pack -> .git/weights/code hierarchy of a custom_nodes directory"""
+    sizer = sizer or get_directory_sizer()
+    root = sizer.list_dir(custom_nodes_dir)
+    if root is None:
+        return _group("custom_nodes", custom_nodes_dir, "root", [])
+
+    packs = [
+        _node_pack(sizer, os.path.join(custom_nodes_dir, name), top)
+        for name in root["subdirs"] if name != "__pycache__"
+    ]
+    loose = _loose_files(root, custom_nodes_dir, top)
+    if loose:
+        packs.append(loose)
+    return _group("custom_nodes", custom_nodes_dir, "root", packs)
+
+def get_storage_breakdown(models_dir: Optional[str], custom_nodes_dir: Optional[str],
+                          sections: Optional[List[str]] = None, top: int = DEFAULT_TOP_FILES) -> Dict[str, Any]:
+    """Treemap-ready breakdown of the models and/or custom_nodes directories.
+
+    Every node has name, size (bytes) and type; children always add up to
+    their parent, with the files not listed grouped under "(other files)".
+    top is capped at the number of files the sizer remembers per directory;
+    the response gives the top used, and top_requested when it was capped.
+    """
+    sections = sections or ["models", "custom_nodes"]
+    started = time.time()
+    sizer = get_directory_sizer()
+    result: Dict[str, Any] = {"top": min(top, sizer.largest_per_dir)}
+    if top > sizer.largest_per_dir:
+        result["top_requested"] = top
+    if "models" in sections and models_dir and os.path.isdir(models_dir):
+        result["models"] = models_breakdown(models_dir, result["top"], sizer)
+    if "custom_nodes" in sections and custom_nodes_dir and os.path.isdir(custom_nodes_dir):
+        result["custom_nodes"] = custom_nodes_breakdown(custom_nodes_dir, result["top"], sizer)
+    result["updated"] = started
+    result["duration"] = round(time.time() - started, 3)
+    return result
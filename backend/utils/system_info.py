@@ -3,8 +3,13 @@ import platform
 import psutil
 import subprocess
 import json
+import time
 from typing import Dict, Any, List, Optional
 
+from utils.gpu_telemetry import get_all_gpu_stats
+from utils.directory_sizer import get_directory_sizer
+from utils.sensors import get_sensor_registry, cpu_temperature
+
 # Get system information
 def get_system_info() -> Dict[str, str]:
     """Get basic system information"""
@@ -91,23 +96,13 @@ def get_available_gpus() -> List[Dict[str, str]]:
                         "driver": gpu_data.get("DriverVersion", "Unknown")
                     })
         elif system == "Linux":
-            # Try nvidia-smi for NVIDIA GPUs
-            try:
-                cmd = "nvidia-smi --query-gpu=index,name,driver_version --format=csv,noheader"
-                result = subprocess.run(cmd.split(), capture_output=True, text=True)
-                
-                if result.returncode == 0 and result.stdout.strip():
-                    lines = result.stdout.strip().split('\n')
-                    for line in lines:
-                        parts = line.split(', ')
-                        if len(parts) >= 3:
-                            gpus.append({
-                                "id": parts[0],
-                                "name": parts[1],
-                                "driver": parts[2]
-                            })
-            except:
-                pass
+            # NVIDIA GPUs from the shared telemetry provider
+            for gpu in get_all_gpu_stats():
+                gpus.append({
+                    "id": gpu["id"],
+                    "name": gpu["name"],
+                    "driver": gpu["driver"]
+                })
                 
             # If no NVIDIA GPUs found, try lspci for other GPUs
             if not gpus:
@@ -197,19 +192,12 @@ def get_gpu_info_windows() -> Dict[str, str]:
     return {"name": "Unknown", "driver": "Unknown"}
 
 def get_gpu_info_linux() -> Dict[str, str]:
-    """Get GPU information on Linux using lspci and nvidia-smi"""
+    """Get GPU information on Linux using NVML/nvidia-smi and lspci"""
     try:
-        # Try nvidia-smi first for NVIDIA GPUs
-        try:
-            cmd = "nvidia-smi --query-gpu=name,driver_version --format=csv,noheader"
-            result = subprocess.run(cmd.split(), capture_output=True, text=True)
-            
-            if result.returncode == 0 and result.stdout.strip():
-                parts = result.stdout.strip().split(", ")
-                if len(parts) >= 2:
-                    return {"name": parts[0], "driver": parts[1]}
-        except:
-            pass
+        # Try the GPU telemetry provider first for NVIDIA GPUs
+        gpus = get_all_gpu_stats()
+        if gpus:
+            return {"name": gpus[0]["name"], "driver": gpus[0]["driver"]}
         
         # Fallback to lspci for other GPUs
         cmd = "lspci | grep -i 'vga\|3d\|2d'"
@@ -245,37 +233,33 @@ def get_gpu_info_macos() -> Dict[str, str]:
     return {"name": "Unknown", "driver": "Unknown"}
 
 # Get system statistics
-def get_system_stats(gpu_id: Optional[str] = None) -> Dict[str, Any]:
-    """Get current system statistics (CPU, RAM, GPU usage)"""
+def get_system_stats(gpu_id: Optional[str] = None, cpu_interval: Optional[float] = 0.1) -> Dict[str, Any]:
+    """Get current system statistics (CPU, RAM, GPU usage)
+    
+    With cpu_interval=None the CPU usage is measured since the previous call
+    instead of sleeping, which is what the background sampler uses.
+    """
     try:
         # Get CPU usage
-        cpu_percent = psutil.cpu_percent(interval=0.1)
+        cpu_percent = psutil.cpu_percent(interval=cpu_interval)
         
         # Get RAM usage
         ram = psutil.virtual_memory()
         ram_used = ram.used / (1024**3)  # GB
         ram_total = ram.total / (1024**3)  # GB
         
-        # Get GPU usage if available
-        gpu_stats = get_gpu_stats(gpu_id)
+        # Read the temperature sensors discovered at startup
+        sensors = get_sensor_registry().read()
         
-        # Ensure GPU stats has all required fields with default values if missing
-        if "usage" not in gpu_stats:
-            gpu_stats["usage"] = 0
-        if "temperature" not in gpu_stats:
-            gpu_stats["temperature"] = 0
-        if "memory" not in gpu_stats:
-            gpu_stats["memory"] = {"used": 0, "total": 0}
-        elif "used" not in gpu_stats["memory"]:
-            gpu_stats["memory"]["used"] = 0
-        elif "total" not in gpu_stats["memory"]:
-            gpu_stats["memory"]["total"] = 0
+        # Get every GPU in one provider call, then pick the selected one
+        gpus = get_all_gpu_stats()
+        gpu_stats = select_gpu(gpus, gpu_id)
         
         return {
             "cpu": {
                 "usage": cpu_percent,
                 "cores": psutil.cpu_count(logical=True),
-                "temperature": get_cpu_temperature()
+                "temperature": get_cpu_temperature(sensors)
             },
             "ram": {
                 "used": round(ram_used, 2),
@@ -283,6 +267,8 @@ def get_system_stats(gpu_id: Optional[str] = None) -> Dict[str, Any]:
                 "percent": ram.percent
             },
             "gpu": gpu_stats,
+            "gpus": gpus,
+            "sensors": sensors,
             "timestamp": psutil.time.time()
         }
     except Exception as e:
@@ -291,107 +277,79 @@ def get_system_stats(gpu_id: Optional[str] = None) -> Dict[str, Any]:
             "cpu": {"usage": 0, "cores": 0, "temperature": 0},
             "ram": {"used": 0, "total": 0, "percent": 0},
             "gpu": {"usage": 0, "temperature": 0, "memory": {"used": 0, "total": 0}},
+            "gpus": [],
+            "sensors": [],
             "timestamp": 0
         }
 
 # Get GPU statistics
 def get_gpu_stats(gpu_id: Optional[str] = None) -> Dict[str, Any]:
     """Get GPU usage statistics for the specified GPU ID"""
-    system = platform.system()
-    
-    # Default values
-    gpu_stats = {
-        "usage": 0,
-        "temperature": 0,
-        "memory": {
-            "used": 0,
-            "total": 0
-        },
-        "name": "Unknown",
-        "driver": "Unknown"
-    }
+    return select_gpu(get_all_gpu_stats(), gpu_id)
+
+def select_gpu(gpus: List[Dict[str, Any]], gpu_id: Optional[str] = None) -> Dict[str, Any]:
+    """Pick the selected GPU out of the provider's list.
+
+    The ID may be an index, an NVIDIA UUID, or on Windows a WMI DeviceID
+    (VideoController1, ...) which is matched to the NVIDIA GPU by name.
+    """
+    if not gpus:
+        return {
+            "usage": 0,
+            "temperature": 0,
+            "memory": {
+                "used": 0,
+                "total": 0
+            },
+            "name": "Unknown",
+            "driver": "Unknown"
+        }
     
-    try:
-        if system == "Windows" or system == "Linux":
-            # Try to get NVIDIA GPU stats using nvidia-smi
-            try:
-                # If a specific GPU ID is provided, try to get stats for that GPU
-                if gpu_id:
-                    # First, get the GPU info to set name and driver
-                    available_gpus = get_available_gpus()
-                    for gpu in available_gpus:
-                        if gpu["id"] == gpu_id:
-                            gpu_stats["name"] = gpu["name"]
-                            gpu_stats["driver"] = gpu["driver"]
-                            break
-                    
-                    # For Windows, we need to map the device ID to nvidia-smi index
-                    if system == "Windows" and gpu_id.startswith("VideoController"):
-                        # Get all NVIDIA GPUs and their indices
-                        cmd = "nvidia-smi --query-gpu=index,name --format=csv,noheader"
-                        result = subprocess.run(cmd.split(), capture_output=True, text=True)
-                        
-                        if result.returncode == 0 and result.stdout.strip():
-                            lines = result.stdout.strip().split('\n')
-                            # Find the index of the selected GPU by matching the name
-                            for line in lines:
-                                parts = line.split(', ')
-                                if len(parts) >= 2 and parts[1] in gpu_stats["name"]:
-                                    # Use this index for the next query
-                                    cmd = f"nvidia-smi --id={parts[0]} --query-gpu=utilization.gpu,temperature.gpu,memory.used,memory.total --format=csv,noheader,nounits"
-                                    break
-                    else:
-                        # For Linux or if we can't map the ID, just use the ID directly if it's numeric
-                        if gpu_id.isdigit():
-                            cmd = f"nvidia-smi --id={gpu_id} --query-gpu=utilization.gpu,temperature.gpu,memory.used,memory.total --format=csv,noheader,nounits"
-                else:
-                    # No specific GPU ID, get stats for the first GPU
-                    cmd = "nvidia-smi --query-gpu=utilization.gpu,temperature.gpu,memory.used,memory.total --format=csv,noheader,nounits"
-                
-                result = subprocess.run(cmd.split(), capture_output=True, text=True)
-                
-                if result.returncode == 0 and result.stdout.strip():
-                    values = result.stdout.strip().split(', ')
-                    if len(values) >= 4:
-                        gpu_stats["usage"] = float(values[0])
-                        gpu_stats["temperature"] = float(values[1])
-                        gpu_stats["memory"]["used"] = float(values[2])
-                        gpu_stats["memory"]["total"] = float(values[3])
-                        return gpu_stats
-            except:
-                pass
-            
-            # If nvidia-smi fails, try platform-specific methods
-            if system == "Windows":
-                # Windows-specific fallback (limited info)
-                pass
-            elif system == "Linux":
-                # Linux-specific fallback (limited info)
-                pass
-        elif system == "Darwin":  # macOS
-            # macOS doesn't have easy access to GPU stats
-            pass
-    except Exception as e:
-        print(f"Error getting GPU stats: {str(e)}")
+    if gpu_id:
+        for gpu in gpus:
+            if gpu_id in (gpu["id"], gpu.get("uuid")):
+                return gpu
+        
+        if platform.system() == "Windows" and gpu_id.startswith("VideoController"):
+            # Imported here since the inventory is built from this module
+            from utils.host_inventory import get_host_inventory
+            for available in get_host_inventory().get_gpus():
+                if available["id"] == gpu_id:
+                    for gpu in gpus:
+                        if gpu["name"] in available["name"]:
+                            return gpu
+                    break
     
-    return gpu_stats
+    # No specific GPU ID or no match, use the first GPU
+    return gpus[0]
+
+# Last WMI reading on Windows, which has no sensors to keep open
+_wmi_temperature = {"value": 0.0, "timestamp": 0.0}
 
 # Get CPU temperature
-def get_cpu_temperature() -> float:
-    """Get CPU temperature if available"""
+def get_cpu_temperature(sensors: Optional[List[Dict[str, Any]]] = None) -> float:
+    """Get CPU temperature if available
+    
+    Uses the CPU package (or hottest core) sensor from the sensor registry.
+    Hosts without a CPU sensor get the first valid thermal zone, and
+    Windows falls back to WMI, queried at most every 30 seconds.
+    """
     system = platform.system()
     
     try:
-        if system == "Linux":
-            # Try reading from thermal zone
-            for i in range(10):  # Check first 10 thermal zones
-                path = f"/sys/class/thermal/thermal_zone{i}/temp"
-                if os.path.exists(path):
-                    with open(path, 'r') as f:
-                        temp = int(f.read().strip()) / 1000.0  # Convert from millidegrees to degrees
-                        if temp > 0 and temp < 150:  # Sanity check
-                            return temp
-        elif system == "Windows":
+        registry = get_sensor_registry()
+        readings = sensors if sensors is not None else registry.read()
+        temp = cpu_temperature(readings)
+        if temp is not None:
+            return temp
+        temp = registry.thermal_zone_temperature()
+        if temp is not None:
+            return temp
+        
+        if system == "Windows":
+            if time.time() - _wmi_temperature["timestamp"] < 30:
+                return _wmi_temperature["value"]
+            _wmi_temperature["timestamp"] = time.time()
             # Windows requires WMI, which is complex for direct Python access
             # This is a simplified approach that may not work on all systems
             try:
@@ -402,10 +360,11 @@ def get_cpu_temperature() -> float:
                     data = json.loads(result.stdout)
                     if isinstance(data, list) and data:
                         temp = data[0].get("CurrentTemperature", 0)
-                        return (temp / 10.0) - 273.15  # Convert from decikelvin to celsius
                     elif isinstance(data, dict):
                         temp = data.get("CurrentTemperature", 0)
-                        return (temp / 10.0) - 273.15  # Convert from decikelvin to celsius
+                    if temp:
+                        _wmi_temperature["value"] = (temp / 10.0) - 273.15  # Convert from decikelvin to celsius
+                        return _wmi_temperature["value"]
             except:
                 pass
     except Exception as e:
@@ -489,27 +448,21 @@ def get_storage_info(comfyui_path: Optional[str] = None, storage_path: Optional[
             }
         }
         
-        # If ComfyUI path is provided, get directory sizes
+        # If ComfyUI path is provided, get directory sizes (last known totals, refreshed in the background)
         if comfyui_path and os.path.exists(comfyui_path):
-            # Get models directory info
-            models_dir = os.path.join(comfyui_path, "models")
-            if os.path.exists(models_dir):
-                models_size, models_files = get_directory_size(models_dir)
-                result["models_directory"] = {
-                    "path": models_dir,
-                    "size": round(models_size / (1024**2), 2),  # MB
-                    "files": models_files
-                }
-            
-            # Get custom nodes directory info
-            custom_nodes_dir = os.path.join(comfyui_path, "custom_nodes")
-            if os.path.exists(custom_nodes_dir):
-                nodes_size, nodes_files = get_directory_size(custom_nodes_dir)
-                result["custom_nodes_directory"] = {
-                    "path": custom_nodes_dir,
-                    "size": round(nodes_size / (1024**2), 2),  # MB
-                    "files": nodes_files
-                }
+            sizer = get_directory_sizer()
+            for key, name in (("models_directory", "models"), ("custom_nodes_directory", "custom_nodes")):
+                directory = os.path.join(comfyui_path, name)
+                if os.path.exists(directory):
+                    size = sizer.get_size(directory)
+                    result[key] = {
+                        "path": directory,
+                        "size": round(size["size"] / (1024**2), 2),  # MB
+                        "files": size["files"],
+                        "updated": size["updated"],
+                        "stale": size["stale"],
+                        "scanning": size["scanning"]
+                    }
         
         return result
     except Exception as e:
@@ -526,14 +479,5 @@ def get_storage_info(comfyui_path: Optional[str] = None, storage_path: Optional[
 # Helper function to get directory size
 def get_directory_size(path: str) -> tuple[float, int]:
     """Get the size of a directory and count of files"""
-    total_size = 0
-    file_count = 0
-    
-    for dirpath, dirnames, filenames in os.walk(path):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            if os.path.exists(fp) and os.path.isfile(fp):
-                total_size += os.path.getsize(fp)
-                file_count += 1
-    
-    return total_size, file_count
+    result = get_directory_sizer().scan(path)
+    return result["size"], result["files"]
@@ -0,0 +1,272 @@
+import os
+import io
+import socket
+import hashlib
+import ipaddress
+import threading
+import urllib.parse
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import requests
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Thumbnail edge lengths the API accepts; anything else is snapped to the nearest one
+THUMBNAIL_SIZES = (128, 256, 512)
+DEFAULT_THUMBNAIL_SIZE = 256
+
+# Refuse to fetch source images bigger than this
+MAX_SOURCE_BYTES = 32 * 1024 * 1024
+
+# Hosts (and their subdomains) source images may be fetched from
+ALLOWED_IMAGE_HOSTS = ("civitai.com",)
+
+# Redirects followed while fetching a source image, each one checked again
+MAX_REDIRECTS = 5
+
+# Suffix used for thumbnails stored next to installed models
+LOCAL_THUMBNAIL_SUFFIX = ".thumb.webp"
+
+# Sibling image names checked when building a local thumbnail without a source URL
+LOCAL_PREVIEW_CANDIDATES = (".preview.png", ".preview.jpg", ".png", ".jpg", ".jpeg", ".webp")
+
+def snap_thumbnail_size(size: Optional[int]) -> int:
+    """Snap a requested size to one of the supported thumbnail sizes"""
+    if not size:
+        return DEFAULT_THUMBNAIL_SIZE
+    return min(THUMBNAIL_SIZES, key=lambda s: abs(s - size))
+
+def render_thumbnail(data: bytes, size: int) -> bytes:
+    """Resize image bytes into a WebP thumbnail that fits in a size x size box"""
+    if not PIL_AVAILABLE:
+        raise RuntimeError("Pillow is not installed. Install with 'pip install pillow'")
+
+    with Image.open(io.BytesIO(data)) as image:
+        # Animated previews (GIF/WebP) only keep their first frame
+        image.seek(0)
+        image.draft("RGB", (size, size))
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        image.thumbnail((size, size), Image.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, format="WEBP", quality=80, method=4)
+        return output.getvalue()
+
+class DisallowedURLError(ValueError):
+    """The URL points somewhere the backend must not fetch from"""
+
+def check_image_url(url: str):
+    """Make sure url is http(s) on an allowed image host that resolves to public addresses.
+
+    The backend fetches these URLs on behalf of the browser, so without the
+    check it would reach loopback, LAN or cloud metadata addresses for anyone
+    who can call the API.
+    """
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme.lower() not in ("http", "https"):
+        raise DisallowedURLError(f"Unsupported URL scheme: {parsed.scheme or 'none'}")
+    host = (parsed.hostname or "").lower().rstrip(".")
+    if not any(host == allowed or host.endswith("." + allowed) for allowed in ALLOWED_IMAGE_HOSTS):
+        raise DisallowedURLError(f"Images are only fetched from {', '.join(ALLOWED_IMAGE_HOSTS)}")
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or None, proto=socket.IPPROTO_TCP)}
+    except socket.gaierror as e:
+        raise DisallowedURLError(f"Could not resolve {host}: {str(e)}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or \
+                ip.is_multicast or ip.is_unspecified or not ip.is_global:
+            raise DisallowedURLError(f"{host} resolves to a non-public address")
+
+def fetch_image(url: str) -> bytes:
+    """Download an image from an allowed host, refusing anything too large.
+
+    Redirects are followed by hand so every hop is checked like the first.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        check_image_url(url)
+        response = requests.get(url, stream=True, timeout=15, allow_redirects=False)
+        if not response.is_redirect:
+            break
+        url = urllib.parse.urljoin(url, response.headers.get("location", ""))
+        response.close()
+    else:
+        raise ValueError("Too many redirects")
+    response.raise_for_status()
+
+    content_length = int(response.headers.get("content-length", 0))
+    if content_length > MAX_SOURCE_BYTES:
+        raise ValueError("Source image is too large")
+
+    data = bytearray()
+    for chunk in response.iter_content(chunk_size=65536):
+        data.extend(chunk)
+        if len(data) > MAX_SOURCE_BYTES:
+            raise ValueError("Source image is too large")
+
+    return bytes(data)
+
+def get_local_thumbnail_path(model_path: str) -> str:
+    """Get the path of the thumbnail stored next to a model file"""
+    return os.path.splitext(model_path)[0] + LOCAL_THUMBNAIL_SUFFIX
+
+def create_local_thumbnail(model_path: str, source_url: Optional[str] = None,
+                           size: int = 512) -> Optional[str]:
+    """Create a WebP thumbnail next to an installed model.
+
+    The image comes from source_url when given, otherwise from a preview image
+    that already sits next to the model (e.g. ``model.preview.png``).
+    """
+    thumbnail_path = get_local_thumbnail_path(model_path)
+
+    if source_url:
+        data = fetch_image(source_url)
+    else:
+        stem = os.path.splitext(model_path)[0]
+        source_path = next(
+            (stem + suffix for suffix in LOCAL_PREVIEW_CANDIDATES if os.path.isfile(stem + suffix)),
+            None
+        )
+        if not source_path:
+            return None
+        with open(source_path, "rb") as f:
+            data = f.read()
+
+    thumbnail = render_thumbnail(data, snap_thumbnail_size(size))
+    temp_path = thumbnail_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(thumbnail)
+    os.replace(temp_path, thumbnail_path)
+
+    return thumbnail_path
+
+class ThumbnailCache:
+    """Size-bounded LRU disk cache of WebP thumbnails for remote preview images.
+
+    Each (url, size) pair is fetched at most once; concurrent requests for the
+    same thumbnail wait on the first fetch. Recency is kept in memory and
+    mirrored to file mtimes so the LRU order survives restarts.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        # key -> file size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_size = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_entries()
+
+    def _load_entries(self):
+        """Rebuild the LRU order from the files already in the cache directory"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".webp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_size += size
+
+    def _key(self, url: str, size: int) -> str:
+        return hashlib.sha256(f"{size}:{url}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.webp")
+
+    def _touch(self, key: str):
+        """Mark an entry as most recently used"""
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its budget"""
+        while self._total_size > self.max_size_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_size -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get_thumbnail(self, url: str, size: int = DEFAULT_THUMBNAIL_SIZE) -> Tuple[str, str]:
+        """Get the cached thumbnail for an image URL, fetching it on a miss.
+
+        Returns the thumbnail path and its ETag.
+        """
+        size = snap_thumbnail_size(size)
+        key = self._key(url, size)
+        etag = f'"{key[:32]}"'
+
+        with self._lock:
+            if key in self._entries:
+                self._touch(key)
+                return self._path(key), etag
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+
+        with fetch_lock:
+            # Another request may have filled the entry while we waited
+            with self._lock:
+                if key in self._entries:
+                    self._touch(key)
+                    return self._path(key), etag
+
+            try:
+                thumbnail = render_thumbnail(fetch_image(url), size)
+
+                path = self._path(key)
+                temp_path = path + ".tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(thumbnail)
+                os.replace(temp_path, path)
+
+                with self._lock:
+                    self._entries[key] = len(thumbnail)
+                    self._total_size += len(thumbnail)
+                    self._evict()
+            finally:
+                with self._lock:
+                    self._fetch_locks.pop(key, None)
+
+        return path, etag
+
+    def get_cache_info(self) -> Dict[str, int]:
+        """Get the current cache usage"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._total_size,
+                "max_size_bytes": self.max_size_bytes
+            }
+
+# Shared cache instance, created on first use
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_cache_lock = threading.Lock()
+
+def get_thumbnail_cache(max_size_mb: Optional[int] = None) -> ThumbnailCache:
+    """Get the shared thumbnail cache stored under backend/data/thumbnails"""
+    global _thumbnail_cache
+
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "thumbnails")
+            _thumbnail_cache = ThumbnailCache(cache_dir)
+
+        if max_size_mb:
+            _thumbnail_cache.max_size_bytes = int(max_size_mb) * 1024 * 1024
+
+    return _thumbnail_cache
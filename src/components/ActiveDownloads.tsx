@@ -11,6 +11,8 @@ interface DownloadStatus {
   speed: string;
   eta: string;
   error?: string;
+  message?: string;
+  skipped_files?: string[];
 }
 
 export default function ActiveDownloads() {
@@ -175,6 +177,12 @@ export default function ActiveDownloads() {
               </div>
             )}
             
+            {download.status === 'completed' && download.skipped_files && download.skipped_files.length > 0 && (
+              <p className="text-sm text-yellow-600 dark:text-yellow-400 mt-2" title={download.skipped_files.join('\n')}>
+                {download.message}
+              </p>
+            )}
+            
             {download.status === 'failed' && download.error && (
               <p className="text-sm text-red-600 dark:text-red-400 mt-2">
                 Error: {download.error}
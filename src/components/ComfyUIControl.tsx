@@ -2,10 +2,15 @@
 
 import { useState, useEffect, useRef } from 'react';
 import { PlayIcon, StopIcon, ArrowPathIcon, CloudArrowDownIcon } from '@heroicons/react/24/solid';
-import { startComfyUI, stopComfyUI, getComfyUIStatus, getComfyUILogs, installComfyUI, getInstallStatus } from '@/services/comfyUIService';
+import { startComfyUI, stopComfyUI, restartComfyUI, getComfyUIStatus, getComfyUILogs, installComfyUI, getInstallStatus } from '@/services/comfyUIService';
+
+type ComfyUIStatus = 'stopped' | 'running' | 'running_no_api' | 'starting' | 'stopping' | 'error' | 'not_configured' | 'not_installed' | 'installing';
+
+// Supervisor states in which the process is up (possibly hung) and can be stopped or restarted
+const ACTIVE_STATUSES: ComfyUIStatus[] = ['running', 'running_no_api', 'starting'];
 
 export default function ComfyUIControl() {
-  const [status, setStatus] = useState<'stopped' | 'running' | 'starting' | 'stopping' | 'not_configured' | 'not_installed' | 'installing'>('stopped');
+  const [status, setStatus] = useState<ComfyUIStatus>('stopped');
   const [logs, setLogs] = useState<string[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [comfyUIPath, setComfyUIPath] = useState<string>('');
@@ -40,6 +45,12 @@ export default function ComfyUIControl() {
           } else if (statusData.status === 'running') {
             fetchLogs();
             setError(null);
+          } else if (statusData.status === 'running_no_api') {
+            fetchLogs();
+            setError('ComfyUI is running but its API is not responding. Try restarting it.');
+          } else if (statusData.status === 'error') {
+            fetchLogs();
+            setError(`ComfyUI exited unexpectedly${statusData.exit_code != null ? ` (exit code ${statusData.exit_code})` : ''}.`);
           } else if (statusData.status === 'stopped') {
             setError(null);
           }
@@ -90,7 +101,7 @@ export default function ComfyUIControl() {
   }, [status, autoStartAttempted]);
 
   useEffect(() => {
-    if (status === 'running') {
+    if (ACTIVE_STATUSES.includes(status)) {
       const logsInterval = setInterval(() => {
         fetchLogs();
       }, 2000);
@@ -99,6 +110,9 @@ export default function ComfyUIControl() {
     }
   }, [status]);
 
+  const canStart = status === 'stopped' || status === 'error';
+  const canStop = ACTIVE_STATUSES.includes(status);
+
   const handleStart = async () => {
     try {
       setStatus('starting');
@@ -112,8 +126,8 @@ export default function ComfyUIControl() {
         return;
       }
       
-      setStatus('running');
-      fetchLogs();
+      // Start returns while ComfyUI boots; the status poll picks up when it is ready
+      fetchStatus();
     } catch (err) {
       console.error('Failed to start ComfyUI:', err);
       setError('Failed to start ComfyUI: ' + (err instanceof Error ? err.message : 'Unknown error'));
@@ -138,13 +152,12 @@ export default function ComfyUIControl() {
     try {
       setStatus('stopping');
       setError(null);
-      await stopComfyUI();
-      setTimeout(async () => {
-        setStatus('starting');
-        await startComfyUI();
-        setStatus('running');
-        fetchLogs();
-      }, 2000);
+      const result = await restartComfyUI();
+      
+      if (result.status === 'error') {
+        setError(result.message || 'Failed to restart ComfyUI');
+      }
+      fetchStatus();
     } catch (err) {
       console.error('Failed to restart ComfyUI:', err);
       setError('Failed to restart ComfyUI');
@@ -274,8 +287,8 @@ export default function ComfyUIControl() {
         <div className="flex items-center space-x-4">
           <button
             onClick={handleStart}
-            disabled={status !== 'stopped'}
-            className={`flex items-center px-4 py-2 rounded-md ${status === 'stopped' ? 'bg-green-600 hover:bg-green-700 text-white' : 'bg-gray-300 text-gray-500 cursor-not-allowed'}`}
+            disabled={!canStart}
+            className={`flex items-center px-4 py-2 rounded-md ${canStart ? 'bg-green-600 hover:bg-green-700 text-white' : 'bg-gray-300 text-gray-500 cursor-not-allowed'}`}
           >
             <PlayIcon className="w-5 h-5 mr-2" />
             Start ComfyUI
@@ -283,8 +296,8 @@ export default function ComfyUIControl() {
           
           <button
             onClick={handleStop}
-            disabled={status !== 'running'}
-            className={`flex items-center px-4 py-2 rounded-md ${status === 'running' ? 'bg-red-600 hover:bg-red-700 text-white' : 'bg-gray-300 text-gray-500 cursor-not-allowed'}`}
+            disabled={!canStop}
+            className={`flex items-center px-4 py-2 rounded-md ${canStop ? 'bg-red-600 hover:bg-red-700 text-white' : 'bg-gray-300 text-gray-500 cursor-not-allowed'}`}
           >
             <StopIcon className="w-5 h-5 mr-2" />
             Stop ComfyUI
@@ -292,8 +305,8 @@ export default function ComfyUIControl() {
           
           <button
             onClick={handleRestart}
-            disabled={status !== 'running'}
-            className={`flex items-center px-4 py-2 rounded-md ${status === 'running' ? 'bg-yellow-600 hover:bg-yellow-700 text-white' : 'bg-gray-300 text-gray-500 cursor-not-allowed'}`}
+            disabled={!canStop}
+            className={`flex items-center px-4 py-2 rounded-md ${canStop ? 'bg-yellow-600 hover:bg-yellow-700 text-white' : 'bg-gray-300 text-gray-500 cursor-not-allowed'}`}
           >
             <ArrowPathIcon className="w-5 h-5 mr-2" />
             Restart ComfyUI
@@ -301,8 +314,8 @@ export default function ComfyUIControl() {
           
           <div className="ml-4">
             <span className="text-sm font-medium">Status: </span>
-            <span className={`text-sm font-semibold ${status === 'running' ? 'text-green-600' : status === 'stopped' ? 'text-red-600' : 'text-yellow-600'}`}>
-              {status.charAt(0).toUpperCase() + status.slice(1)}
+            <span className={`text-sm font-semibold ${status === 'running' ? 'text-green-600' : status === 'stopped' || status === 'error' ? 'text-red-600' : 'text-yellow-600'}`}>
+              {status === 'running_no_api' ? 'Running (API not responding)' : status.charAt(0).toUpperCase() + status.slice(1)}
             </span>
           </div>
         </div>
@@ -324,7 +337,7 @@ export default function ComfyUIControl() {
             ))
           ) : (
             <div className="text-gray-500">
-              {status === 'stopped' ? 'ComfyUI is not running.' : 'Starting ComfyUI...'}
+              {status === 'stopped' || status === 'error' ? 'ComfyUI is not running.' : 'Starting ComfyUI...'}
             </div>
           )}
           <div ref={logsEndRef} />
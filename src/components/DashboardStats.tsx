@@ -26,25 +26,38 @@ export default function DashboardStats() {
   const [storageInfo, setStorageInfo] = useState<any>(null);
 
   useEffect(() => {
+    let latestStorage: any = null;
+
+    // Transform the data to match what the component expects
+    const applyStats = (data: any) => {
+      setStats({
+        gpu_usage: data?.gpu?.usage || 0,
+        vram_usage: data?.gpu?.memory_percent_used || 0,
+        cpu_usage: data?.cpu?.usage || 0,
+        ram_usage: data?.ram?.percent || 0, // Fix: Use ram.percent instead of memory.percent_used
+        storage_usage: latestStorage?.disk_space?.percent || 0,
+        gpu_name: data?.gpu?.name || 'GPU'
+      });
+    };
+
+    const refreshStorage = async () => {
+      try {
+        latestStorage = await fetchStorageInfo();
+        setStorageInfo(latestStorage);
+      } catch (error) {
+        console.error('Failed to fetch storage info:', error);
+      }
+    };
+
     const getStats = async () => {
       try {
         // Use the current refreshInterval state value
         const data = await monitoringService.getSystemStats(refreshInterval);
         
         // Get storage info
-        const storage = await fetchStorageInfo();
-        setStorageInfo(storage);
+        await refreshStorage();
         
-        // Transform the data to match what the component expects
-        const transformedData = {
-          gpu_usage: data?.gpu?.usage || 0,
-          vram_usage: data?.gpu?.memory_percent_used || 0,
-          cpu_usage: data?.cpu?.usage || 0,
-          ram_usage: data?.ram?.percent || 0, // Fix: Use ram.percent instead of memory.percent_used
-          storage_usage: storage?.disk_space?.percent || 0,
-          gpu_name: data?.gpu?.name || 'GPU'
-        };
-        setStats(transformedData);
+        applyStats(data);
         setError(null);
       } catch (error) {
         console.error('Failed to fetch system stats:', error);
@@ -96,6 +109,7 @@ export default function DashboardStats() {
     };
 
     let intervalId: NodeJS.Timeout;
+    let unsubscribe: (() => void) | null = null;
     
     // Initialize stats and set up interval
     const initStats = async () => {
@@ -121,9 +135,17 @@ export default function DashboardStats() {
       // Clear any existing interval
       if (intervalId) clearInterval(intervalId);
       
-      // Set new interval for stats
+      // System stats are pushed by the backend from its shared sampler
+      if (unsubscribe) unsubscribe();
+      unsubscribe = monitoringService.subscribeSystemStats(refreshInterval, (data) => {
+        applyStats(data);
+        setError(null);
+        setLoading(false);
+      });
+      
+      // Set new interval for storage and server status
       intervalId = setInterval(async () => {
-        await getStats();
+        await refreshStorage();
         // Only check server status every 10 seconds to reduce API calls
         if (Date.now() % 10000 < refreshInterval) {
           await checkServerStatus();
@@ -133,9 +155,10 @@ export default function DashboardStats() {
 
     initStats();
 
-    // Clean up interval on component unmount
+    // Clean up interval and stats stream on component unmount
     return () => {
       if (intervalId) clearInterval(intervalId);
+      if (unsubscribe) unsubscribe();
     };
   }, []);
 
@@ -16,6 +16,7 @@ interface CivitAIModel {
   type: string;
   nsfw: boolean;
   image?: string; // Direct image URL in the new API format
+  thumbnail?: string; // Cached thumbnail served by the backend
   creator?: {
     username: string;
   };
@@ -374,10 +375,11 @@ export default function CivitAISearch({ onDownload, isDownloading }: CivitAISear
                   className="bg-white dark:bg-gray-800 border border-gray-200 dark:border-gray-700 rounded-md overflow-hidden cursor-pointer hover:shadow-md transition-shadow"
                   onClick={() => handleModelSelect(model)}
                 >
-                  {model.modelVersions && model.modelVersions.length > 0 && model.modelVersions[0]?.images && model.modelVersions[0].images.length > 0 && model.modelVersions[0].images[0]?.url ? (
+                  {model.thumbnail || (model.modelVersions && model.modelVersions.length > 0 && model.modelVersions[0]?.images && model.modelVersions[0].images.length > 0 && model.modelVersions[0].images[0]?.url) ? (
                     <div className="h-48 overflow-hidden">
                       <img
-                        src={model.modelVersions[0].images[0].url}
+                        src={model.thumbnail || model.modelVersions?.[0]?.images?.[0]?.url}
+                        loading="lazy"
                         alt={model.name}
                         className="w-full h-full object-cover"
                         onError={(e) => {
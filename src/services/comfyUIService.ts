@@ -23,6 +23,16 @@ export async function stopComfyUI() {
   }
 }
 
+export async function restartComfyUI() {
+  try {
+    const response = await axios.post(`${API_BASE_URL}/comfyui/restart`);
+    return response.data;
+  } catch (error) {
+    console.error('Error restarting ComfyUI:', error);
+    return { status: 'error', message: 'Failed to restart ComfyUI' };
+  }
+}
+
 export async function getComfyUIStatus() {
   try {
     const response = await axios.get(`${API_BASE_URL}/comfyui/status`);
@@ -79,5 +79,86 @@ export const monitoringService = {
         }
       };
     }
+  },
+
+  /**
+   * Subscribe to live system stats pushed by the backend.
+   * Returns a function that closes the subscription.
+   */
+  subscribeSystemStats: (
+    refreshInterval: number,
+    onStats: (stats: any) => void,
+    onError?: (error: Event) => void
+  ): (() => void) => {
+    let stats: any = null;
+    let source: EventSource | null = null;
+    let closed = false;
+
+    const connect = () => {
+      source = new EventSource(`/api/system/stats/stream?interval=${Math.max(100, refreshInterval)}`);
+
+      // Both events carry the keyed form, which is patched as is and unkeyed for callers
+      source.addEventListener('snapshot', (event) => {
+        stats = JSON.parse((event as MessageEvent).data);
+        onStats(fromKeyed(stats));
+      });
+
+      source.addEventListener('delta', (event) => {
+        stats = applyMergePatch(stats, JSON.parse((event as MessageEvent).data));
+        onStats(fromKeyed(stats));
+      });
+
+      // The backend drops subscribers that fall behind; start over with a fresh snapshot
+      source.addEventListener('dropped', () => {
+        source?.close();
+        if (!closed) connect();
+      });
+
+      source.onerror = (event) => {
+        if (onError) onError(event);
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      source?.close();
+    };
   }
 };
+
+/**
+ * Turn the stream's keyed lists ({"#": [keys in order], key: item}) back into arrays
+ */
+function fromKeyed(value: any): any {
+  if (value === null || typeof value !== 'object') {
+    return value;
+  }
+  if (Array.isArray(value['#'])) {
+    return value['#'].map((key: string) => fromKeyed(value[key]));
+  }
+  const result: any = {};
+  for (const [key, child] of Object.entries(value)) {
+    result[key] = fromKeyed(child);
+  }
+  return result;
+}
+
+/**
+ * Apply a JSON merge patch (RFC 7386) to a stats object
+ */
+function applyMergePatch(target: any, patch: any): any {
+  if (patch === null || typeof patch !== 'object' || Array.isArray(patch)) {
+    return patch;
+  }
+  const result = target && typeof target === 'object' && !Array.isArray(target) ? { ...target } : {};
+  for (const [key, value] of Object.entries(patch)) {
+    if (value === null) {
+      delete result[key];
+    } else {
+      result[key] = applyMergePatch(result[key], value);
+    }
+  }
+  return result;
+}